@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+"""Offline benchmarks of pyhapi's marshalling layer
+Author  : Maajor
+Email   : info@ma-yidong.com
+
+Runs pyhapi against StandInHAPILib, an in memory libHAPIL, so numbers only \
+    depend on pyhapi's python and numpy overhead, not on a houdini license.
+
+Benchmarks:
+    commit_mesh: HGeoMesh.commit_to_node of a triangle strip with P, N, uv
+    extract_mesh: HGeoMesh.extract_from_sop of the same mesh
+    extract_mesh_pooled: the same extraction with attribute arrays recycled by HBufferPool
+    extract_mesh_selective: the same extraction of P only
+    get_faces: HAPI.get_faces of the same mesh
+    ingest_polygons: HGeoMesh.from_ragged of a list of this many triangles and quads
+    extract_strings: HGeo.extract_from_sop of a prim string attribute, 100 unique values
+    collect_parms: HNode.refresh_params and get_param_values of a node with this many parms
+    pool_dispatch: HSessionPool running this many empty tasks on 4 sessions
+
+Example usage:
+
+#run and save as baseline
+python benchmarks/bench_marshalling.py --save baseline.json
+
+#run again and fail if any benchmark is 20% slower than baseline
+python benchmarks/bench_marshalling.py --compare baseline.json --threshold 0.2
+
+#only some benchmarks and sizes
+python benchmarks/bench_marshalling.py --only commit_mesh,get_faces --sizes 1000,10000000
+"""
+import os
+import sys
+import gc
+import json
+import time
+import asyncio
+import argparse
+import platform
+import statistics
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pyhapi as ph # pylint: disable=wrong-import-position
+from pyhapi.hnode import HExistingNode # pylint: disable=wrong-import-position
+from standin_hapi import StandInHAPILib # pylint: disable=wrong-import-position
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000, 10000000]
+
+
+def make_mesh(size):
+    """A triangle strip of size points with normal and uv
+
+    Args:
+        size (int): number of points
+
+    Returns:
+        HGeoMesh: mesh
+    """
+    points = np.zeros((size, 3), dtype=np.float32)
+    points[:, 0] = np.arange(size) // 2
+    points[:, 2] = np.arange(size) % 2
+    first = np.arange(max(size - 2, 0), dtype=np.int32)
+    faces = np.stack([first, first + 1, first + 2], axis=1)
+    mesh = ph.HGeoMesh(vertices=points, faces=faces)
+    normals = np.zeros((size, 3), dtype=np.float32)
+    normals[:, 1] = 1.0
+    mesh.add_attrib(ph.AttributeOwner.POINT, "N", normals)
+    mesh.add_attrib(ph.AttributeOwner.VERTEX, "uv", np.zeros((mesh.vertex_count, 3), dtype=np.float32))
+    return mesh
+
+
+def _committed_node(lib, session, size):
+    node = ph.HInputNode(session, "bench")
+    node.set_geometry(make_mesh(size))
+    return node
+
+
+def bench_commit_mesh(lib, session, size):
+    node = ph.HInputNode(session, "bench")
+    mesh = make_mesh(size)
+    return lambda: mesh.commit_to_node(session, node.node_id)
+
+
+def bench_extract_mesh(lib, session, size):
+    node = _committed_node(lib, session, size)
+    part_info = ph.HAPI.get_part_info(session.hapi_session, node.node_id, 0)
+    return lambda: ph.HGeoMesh().extract_from_sop(session, part_info, node.node_id, 0)
+
+
+def bench_extract_mesh_pooled(lib, session, size):
+    node = _committed_node(lib, session, size)
+    part_info = ph.HAPI.get_part_info(session.hapi_session, node.node_id, 0)
+    buffer_pool = ph.HBufferPool()
+    def run():
+        geo = ph.HGeoMesh()
+        geo.extract_from_sop(session, part_info, node.node_id, 0, buffer_pool=buffer_pool)
+        buffer_pool.release_geos([geo])
+    return run
+
+
+def bench_extract_mesh_selective(lib, session, size):
+    node = _committed_node(lib, session, size)
+    part_info = ph.HAPI.get_part_info(session.hapi_session, node.node_id, 0)
+    return lambda: ph.HGeoMesh().extract_from_sop(session, part_info, node.node_id, 0,\
+        include=[(ph.AttributeOwner.POINT, "P")])
+
+
+def bench_get_faces(lib, session, size):
+    node = _committed_node(lib, session, size)
+    part_info = ph.HAPI.get_part_info(session.hapi_session, node.node_id, 0)
+    return lambda: ph.HAPI.get_faces(session.hapi_session, node.node_id, part_info)
+
+
+def bench_ingest_polygons(lib, session, size):
+    points = np.zeros((size + 3, 3), dtype=np.float32)
+    faces = [[index, index + 1, index + 2] if index % 2 else [index, index + 1, index + 2, index + 3]\
+        for index in range(size)]
+    return lambda: ph.HGeoMesh.from_ragged(points, faces)
+
+
+def bench_extract_strings(lib, session, size):
+    node_id = lib.add_node("strings")
+    part_info = ph.PartInfo()
+    part_info.type = ph.PartType.MESH
+    part_info.pointCount = part_info.faceCount = part_info.vertexCount = size
+    ph.HAPI.set_part_info(session.hapi_session, node_id, part_info)
+    ph.HAPI.commit_geo(session.hapi_session, node_id)
+    lib.set_string_attrib(node_id, ph.AttributeOwner.PRIM, "name",\
+        ["piece{0}".format(index % 100) for index in range(size)])
+    part_info = ph.HAPI.get_part_info(session.hapi_session, node_id, 0)
+    return lambda: ph.HGeo().extract_from_sop(session, part_info, node_id, 0)
+
+
+def bench_collect_parms(lib, session, size):
+    node_id = lib.add_node("parms", ph.NodeType.OBJ)
+    lib.add_parms(node_id, size)
+    node = HExistingNode(session, node_id)
+    return lambda: node.refresh_params().get_param_values()
+
+
+async def _empty_task(session):
+    return session
+
+
+def bench_pool_dispatch(lib, session, size):
+    def run():
+        async def dispatch():
+            pool = ph.HSessionPool(1)
+            pool.sessions.extend(ph.HSession() for _ in range(4))
+            futures = [await pool.enqueue_task_async(_empty_task) for _ in range(size)]
+            consumer = asyncio.ensure_future(pool.run_on_task_producer_async(None))
+            await asyncio.wait(futures)
+            consumer.cancel()
+            await asyncio.gather(consumer, return_exceptions=True)
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(dispatch())
+        finally:
+            loop.close()
+    return run
+
+
+# name to (setup function returning a callable to time, max size run by default)
+BENCHMARKS = {
+    "commit_mesh": (bench_commit_mesh, None),
+    "extract_mesh": (bench_extract_mesh, None),
+    "extract_mesh_pooled": (bench_extract_mesh_pooled, None),
+    "extract_mesh_selective": (bench_extract_mesh_selective, None),
+    "get_faces": (bench_get_faces, None),
+    "ingest_polygons": (bench_ingest_polygons, 1000000),
+    "extract_strings": (bench_extract_strings, 1000000),
+    "collect_parms": (bench_collect_parms, 100000),
+    "pool_dispatch": (bench_pool_dispatch, 10000)
+}
+
+
+def run_benchmark(name, size, repeat):
+    """Run a benchmark of a size on a fresh stand-in library
+
+    Args:
+        name (str): benchmark name
+        size (int): number of elements
+        repeat (int): number of timed runs
+
+    Returns:
+        dict: min, median and mean seconds of runs, HAPI calls of one run \
+            and bytes setters copied in one run
+    """
+    setup, _ = BENCHMARKS[name]
+    lib = StandInHAPILib()
+    saved_lib = ph.HAPI.HAPI_LIB
+    ph.HAPI.HAPI_LIB = lib
+    try:
+        session = ph.HSession()
+        func = setup(lib, session, size)
+        copied = ph.HAPI.copied_bytes()
+        with ph.hapi_profile() as profile:
+            func()
+        copied = ph.HAPI.copied_bytes() - copied
+        times = []
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+        # release sessions while they still reach the stand-in
+        del func, session
+        gc.collect()
+    finally:
+        ph.HAPI.HAPI_LIB = saved_lib
+    return {"min": min(times), "median": statistics.median(times),\
+        "mean": statistics.mean(times), "repeat": repeat,\
+            "hapi_calls": profile.total_calls(), "hapi_bytes":\
+                sum(summary["bytes"] for summary in profile.functions()),\
+                    "copied_bytes": copied}
+
+
+def run_benchmarks(names=None, sizes=None, repeat=5, all_sizes=False, verbose=True):
+    """Run benchmarks across sizes
+
+    Args:
+        names (list(str), optional): benchmarks to run. Defaults to all.
+        sizes (list(int), optional): numbers of elements. Defaults to DEFAULT_SIZES.
+        repeat (int, optional): number of timed runs each. Defaults to 5.
+        all_sizes (bool, optional): run sizes beyond a benchmark's max size. Defaults to False.
+        verbose (bool, optional): print each result. Defaults to True.
+
+    Returns:
+        dict: environment and results keyed by "name/size"
+    """
+    results = {}
+    for name in names or list(BENCHMARKS.keys()):
+        _, max_size = BENCHMARKS[name]
+        for size in sizes or DEFAULT_SIZES:
+            if not all_sizes and max_size is not None and size > max_size:
+                continue
+            result = run_benchmark(name, size, repeat)
+            results["{0}/{1}".format(name, size)] = result
+            if verbose:
+                print("{0:<32}{1:>12.6f}s{2:>10} calls".format(\
+                    "{0}/{1}".format(name, size), result["median"], result["hapi_calls"]))
+    return {
+        "created": datetime.now().isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pyhapi": ph.__version__,
+            "platform": platform.platform()},
+        "results": results}
+
+
+def compare(current, baseline, threshold=0.2):
+    """Compare medians of results with a baseline
+
+    Args:
+        current (dict): results of run_benchmarks
+        baseline (dict): results of run_benchmarks saved before
+        threshold (float, optional): fraction slower than baseline counted as regression. \
+            Defaults to 0.2.
+
+    Returns:
+        list((str, float, float, bool)): key, baseline and current median, \
+            if regressed, of benchmarks in both
+    """
+    rows = []
+    for key, result in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        rows.append((key, base["median"], result["median"],\
+            result["median"] > base["median"] * (1.0 + threshold)))
+    return rows
+
+
+def main(argv=None):
+    """Command line entry
+
+    Returns:
+        int: exit code, 1 if any benchmark regressed
+    """
+    parser = argparse.ArgumentParser(description="Offline benchmarks of pyhapi's marshalling layer")
+    parser.add_argument("--only", help="comma separated benchmarks, of {0}".format(",".join(BENCHMARKS)))
+    parser.add_argument("--sizes", help="comma separated numbers of elements")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs of each benchmark")
+    parser.add_argument("--all-sizes", action="store_true", help="run sizes beyond a benchmark's max size")
+    parser.add_argument("--save", help="save results as json baseline")
+    parser.add_argument("--compare", help="compare with a json baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="fraction slower counted as regression")
+    args = parser.parse_args(argv)
+
+    names = args.only.split(",") if args.only else None
+    sizes = [int(size) for size in args.sizes.split(",")] if args.sizes else None
+    current = run_benchmarks(names, sizes, args.repeat, args.all_sizes)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(current, f, indent=2)
+    if not args.compare:
+        return 0
+
+    with open(args.compare, "r") as f:
+        baseline = json.load(f)
+    regressed = False
+    print("{0:<32}{1:>14}{2:>14}{3:>10}".format("benchmark", "baseline(s)", "current(s)", "ratio"))
+    for key, base, median, is_regressed in compare(current, baseline, args.threshold):
+        regressed = regressed or is_regressed
+        print("{0:<32}{1:>14.6f}{2:>14.6f}{3:>10.2f}{4}".format(\
+            key, base, median, median / base if base > 0 else float("inf"),\
+                "  REGRESSED" if is_regressed else ""))
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
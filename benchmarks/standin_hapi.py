@@ -0,0 +1,534 @@
+# -*- coding: utf-8 -*-
+"""A stand-in of libHAPIL for benchmarking pyhapi without houdini
+Author  : Maajor
+Email   : info@ma-yidong.com
+
+StandInHAPILib:
+    Implements HAPI_* functions pyhapi's geometry and parm marshalling uses, \
+        storing nodes, parts, attributes, parms and strings in memory. \
+            It does no cooking, so it only measures pyhapi's own overhead.
+
+Example usage:
+
+import pyhapi as ph
+from standin_hapi import StandInHAPILib
+
+ph.HAPI.HAPI_LIB = StandInHAPILib()
+session = ph.HSession()
+input_node = ph.HInputNode(session, "Cube")
+input_node.set_geometry(cube_geo)
+geos = input_node.get_display_geos()
+"""
+import ctypes
+
+import numpy as np
+
+from pyhapi import hdata as HDATA
+
+STORAGE_TO_NP_TYPE = {
+    HDATA.StorageType.INT: np.int32,
+    HDATA.StorageType.INT64: np.int64,
+    HDATA.StorageType.FLOAT: np.float32,
+    HDATA.StorageType.FLOAT64: np.float64,
+    HDATA.StorageType.STRING: np.int32
+}
+
+
+def _obj(arg):
+    # object referenced by byref(), or arg itself
+    return getattr(arg, "_obj", arg)
+
+
+def _int(arg):
+    arg = _obj(arg)
+    return int(arg.value) if hasattr(arg, "value") else int(arg)
+
+
+def _text(arg):
+    return arg.value.decode() if isinstance(arg, ctypes.c_char_p) else str(arg)
+
+
+def _read(arg, dtype, count):
+    # copy an input array passed as ctypes array or pointer
+    arg = _obj(arg)
+    if isinstance(arg, ctypes.Array):
+        return np.frombuffer(arg, dtype, count).copy()
+    return np.ctypeslib.as_array(arg, shape=(count,)).view(dtype)[:count].copy()
+
+
+def _write(arg, values):
+    # fill an output ctypes array
+    values = np.ascontiguousarray(values)
+    ctypes.memmove(_obj(arg), values.ctypes.data, values.nbytes)
+
+
+def _write_struct(arg, struct):
+    ctypes.pointer(_obj(arg))[0] = struct
+
+
+class StandInPart():
+    """Geometry of a part
+
+    Attributes:
+        info (PartInfo): part info
+        attribs (dict((int,str),(AttributeInfo,np.ndarray))): attributes by owner and name, \
+            data of string attributes are string handles
+        vertex_list (np.ndarray): vertex-point associations
+        face_counts (np.ndarray): number of vertices each face has
+    """
+
+    def __init__(self, info=None):
+        self.info = HDATA.PartInfo() if info is None else info
+        self.attribs = {}
+        self.vertex_list = np.zeros(0, dtype=np.int32)
+        self.face_counts = np.zeros(0, dtype=np.int32)
+
+
+class StandInNode():
+    """A node holding a display geometry and parms
+
+    Attributes:
+        info (NodeInfo): node info
+        path (str): node path
+        parts (list(StandInPart)): committed display geometry
+        pending (StandInPart): geometry being set, replaces parts on commit
+        parm_infos (Array of ParmInfo): parm infos
+        choice_infos (Array of ParmChoiceInfo): choice infos of all parms
+        int_values (np.ndarray): int parm values
+        float_values (np.ndarray): float parm values
+        string_values (np.ndarray): string handles of string parm values
+    """
+
+    def __init__(self, node_id, name_sh, node_type, path):
+        self.info = HDATA.NodeInfo()
+        self.info.id = node_id
+        self.info.nameSH = name_sh
+        self.info.type = node_type
+        self.info.isValid = True
+        self.path = path
+        self.parts = []
+        self.pending = None
+        self.parm_infos = (HDATA.ParmInfo * 0)()
+        self.choice_infos = (HDATA.ParmChoiceInfo * 0)()
+        self.int_values = np.zeros(0, dtype=np.int32)
+        self.float_values = np.zeros(0, dtype=np.float32)
+        self.string_values = np.zeros(0, dtype=np.int32)
+
+
+class StandInHAPILib():# pylint: disable=invalid-name,too-many-public-methods
+    """In memory implementation of HAPI_* functions used by pyhapi's marshalling
+
+    Attributes:
+        nodes (dict(int,StandInNode)): all nodes
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self._strings = [""]
+        self._string_handles = {"": 0}
+        self._next_node_id = 1
+        self._string_batch = b""
+
+    def intern(self, text):
+        """Get string handle of a string
+
+        Args:
+            text (str): string
+
+        Returns:
+            int: string handle
+        """
+        handle = self._string_handles.get(text)
+        if handle is None:
+            handle = self._string_handles[text] = len(self._strings)
+            self._strings.append(text)
+        return handle
+
+    def add_node(self, name, node_type=HDATA.NodeType.SOP):
+        """Create a node without parms
+
+        Args:
+            name (str): node name
+            node_type (NodeType, optional): node type. Defaults to HDATA.NodeType.SOP.
+
+        Returns:
+            int: node id
+        """
+        node_id = self._next_node_id
+        self._next_node_id += 1
+        self.nodes[node_id] = StandInNode(node_id, self.intern(name), node_type, "/obj/" + name)
+        return node_id
+
+    def add_parms(self, node_id, count):
+        """Fill a node with parms, cycling through int, float vector, string, \
+            toggle and int choice parms
+
+        Args:
+            node_id (int): node id
+            count (int): number of parms
+        """
+        node = self.nodes[node_id]
+        parm_infos = (HDATA.ParmInfo * count)()
+        choices = []
+        int_count = float_count = string_count = 0
+        for index in range(count):
+            info = parm_infos[index]
+            info.id = index
+            info.parentId = -1
+            info.nameSH = self.intern("parm{0}".format(index))
+            info.labelSH = self.intern("Parm {0}".format(index))
+            info.size = 1
+            kind = index % 5
+            if kind == 0:
+                info.type, info.scriptType = HDATA.ParmType.INT, HDATA.PrmScriptType.INT
+            elif kind == 1:
+                info.type, info.scriptType = HDATA.ParmType.FLOAT, HDATA.PrmScriptType.VECTOR3
+                info.size = 3
+            elif kind == 2:
+                info.type, info.scriptType = HDATA.ParmType.STRING, HDATA.PrmScriptType.STRING
+            elif kind == 3:
+                info.type, info.scriptType = HDATA.ParmType.TOGGLE, HDATA.PrmScriptType.TOGGLE
+            else:
+                info.type, info.scriptType = HDATA.ParmType.INT, HDATA.PrmScriptType.INT
+                info.choiceCount = 3
+                info.choiceIndex = len(choices)
+                for choice in range(3):
+                    choices.append((index, self.intern("Choice {0}".format(choice)),\
+                        self.intern("choice{0}".format(choice))))
+            if info.is_int():
+                info.intValuesIndex = int_count
+                int_count += info.size
+            elif info.is_float():
+                info.floatValuesIndex = float_count
+                float_count += info.size
+            else:
+                info.stringValuesIndex = string_count
+                string_count += info.size
+        node.parm_infos = parm_infos
+        node.choice_infos = (HDATA.ParmChoiceInfo * len(choices))()
+        for choice_info, (parent, label_sh, value_sh) in zip(node.choice_infos, choices):
+            choice_info.parentParmId = parent
+            choice_info.labelSH = label_sh
+            choice_info.valueSH = value_sh
+        node.int_values = np.arange(int_count, dtype=np.int32) % 2
+        node.float_values = np.arange(float_count, dtype=np.float32)
+        node.string_values = np.full(string_count, self.intern("value"), dtype=np.int32)
+        node.info.parmCount = count
+        node.info.parmIntValueCount = int_count
+        node.info.parmFloatValueCount = float_count
+        node.info.parmStringValueCount = string_count
+        node.info.parmChoiceCount = len(choices)
+
+    def set_string_attrib(self, node_id, owner, name, strings, part_id=0):
+        """Add a string attribute to a committed part
+
+        Args:
+            node_id (int): node id
+            owner (AttributeOwner): attribute owner
+            name (str): attribute name
+            strings (list(str)): one string per element
+            part_id (int, optional): part id. Defaults to 0.
+        """
+        part = self.nodes[node_id].parts[part_id]
+        unique, inverse = np.unique(np.asarray(strings, dtype=object).astype(str), return_inverse=True)
+        handles = np.array([self.intern(text) for text in unique], dtype=np.int32)[inverse.ravel()]
+        info = HDATA.AttributeInfo()
+        info.exists = True
+        info.owner = owner
+        info.storage = HDATA.StorageType.STRING
+        info.count = len(strings)
+        info.tupleSize = 1
+        part.attribs[(int(owner), name)] = (info, handles)
+        self.__count_attribs(part)
+
+    @staticmethod
+    def __count_attribs(part):
+        for owner in range(HDATA.AttributeOwner.MAX):
+            part.info.attributeCounts[owner] = sum(1 for attrib_owner, _ in part.attribs\
+                if attrib_owner == owner)
+
+    def __node(self, node_id):
+        return self.nodes.get(_int(node_id))
+
+    def __part(self, node_id, part_id):
+        node = self.__node(node_id)
+        part_id = _int(part_id)
+        if node is None or not 0 <= part_id < len(node.parts):
+            return None
+        return node.parts[part_id]
+
+    def __pending(self, node_id):
+        node = self.__node(node_id)
+        if node is None:
+            return None
+        if node.pending is None:
+            node.pending = StandInPart()
+        return node.pending
+
+    # sessions
+
+    def HAPI_IsSessionValid(self, session):
+        # no server behind sessions, so they are never closed
+        return HDATA.Result.FAILURE
+
+    # strings
+
+    def HAPI_GetStringBufLength(self, session, string_handle, buffer_length):
+        handle = _int(string_handle)
+        if not 0 <= handle < len(self._strings):
+            return HDATA.Result.INVALID_ARGUMENT
+        _obj(buffer_length).value = len(self._strings[handle].encode()) + 1
+        return HDATA.Result.SUCCESS
+
+    def HAPI_GetString(self, session, string_handle, string_value, length):
+        handle = _int(string_handle)
+        if not 0 <= handle < len(self._strings):
+            return HDATA.Result.INVALID_ARGUMENT
+        raw = self._strings[handle].encode()[:_int(length) - 1] + b"\0"
+        ctypes.memmove(_obj(string_value), raw, len(raw))
+        return HDATA.Result.SUCCESS
+
+    def HAPI_GetStringBatchSize(self, session, string_handle_array, string_handle_count, buffer_size):
+        handles = _read(string_handle_array, np.int32, _int(string_handle_count))
+        if handles.size and (handles.min() < 0 or handles.max() >= len(self._strings)):
+            return HDATA.Result.INVALID_ARGUMENT
+        self._string_batch = b"".join(self._strings[handle].encode() + b"\0" for handle in handles)
+        _obj(buffer_size).value = len(self._string_batch)
+        return HDATA.Result.SUCCESS
+
+    def HAPI_GetStringBatch(self, session, char_buffer, char_array_length):
+        length = min(_int(char_array_length), len(self._string_batch))
+        ctypes.memmove(_obj(char_buffer), self._string_batch, length)
+        return HDATA.Result.SUCCESS
+
+    # nodes
+
+    def HAPI_CreateInputNode(self, session, node_id, name):
+        _obj(node_id).value = self.add_node("input_" + _text(name))
+        return HDATA.Result.SUCCESS
+
+    def HAPI_GetNodeInfo(self, session, node_id, node_info):
+        node = self.__node(node_id)
+        if node is None:
+            return HDATA.Result.INVALID_ARGUMENT
+        _write_struct(node_info, node.info)
+        return HDATA.Result.SUCCESS
+
+    def HAPI_GetNodePath(self, session, node_id, relative_to_node_id, path):
+        node = self.__node(node_id)
+        if node is None:
+            return HDATA.Result.INVALID_ARGUMENT
+        _obj(path).value = self.intern(node.path)
+        return HDATA.Result.SUCCESS
+
+    # parms
+
+    def HAPI_GetParameters(self, session, node_id, parm_infos_array, start, length):
+        node = self.__node(node_id)
+        if node is None:
+            return HDATA.Result.INVALID_ARGUMENT
+        start, length = _int(start), _int(length)
+        ctypes.memmove(_obj(parm_infos_array), ctypes.byref(node.parm_infos,\
+            start * ctypes.sizeof(HDATA.ParmInfo)), length * ctypes.sizeof(HDATA.ParmInfo))
+        return HDATA.Result.SUCCESS
+
+    def HAPI_GetParmChoiceLists(self, session, node_id, parm_choices_array, start, length):
+        node = self.__node(node_id)
+        if node is None:
+            return HDATA.Result.INVALID_ARGUMENT
+        start, length = _int(start), _int(length)
+        ctypes.memmove(_obj(parm_choices_array), ctypes.byref(node.choice_infos,\
+            start * ctypes.sizeof(HDATA.ParmChoiceInfo)), length * ctypes.sizeof(HDATA.ParmChoiceInfo))
+        return HDATA.Result.SUCCESS
+
+    def HAPI_GetParmIntValues(self, session, node_id, values_array, start, length):
+        node = self.__node(node_id)
+        if node is None:
+            return HDATA.Result.INVALID_ARGUMENT
+        _write(values_array, node.int_values[_int(start):_int(start) + _int(length)])
+        return HDATA.Result.SUCCESS
+
+    def HAPI_GetParmFloatValues(self, session, node_id, values_array, start, length):
+        node = self.__node(node_id)
+        if node is None:
+            return HDATA.Result.INVALID_ARGUMENT
+        _write(values_array, node.float_values[_int(start):_int(start) + _int(length)])
+        return HDATA.Result.SUCCESS
+
+    def HAPI_GetParmStringValues(self, session, node_id, evaluate, values_array, start, length):
+        node = self.__node(node_id)
+        if node is None:
+            return HDATA.Result.INVALID_ARGUMENT
+        _write(values_array, node.string_values[_int(start):_int(start) + _int(length)])
+        return HDATA.Result.SUCCESS
+
+    def HAPI_SetParmIntValues(self, session, node_id, values_array, start, length):
+        node = self.__node(node_id)
+        if node is None:
+            return HDATA.Result.INVALID_ARGUMENT
+        start, length = _int(start), _int(length)
+        node.int_values[start:start + length] = _read(values_array, np.int32, length)
+        return HDATA.Result.SUCCESS
+
+    def HAPI_SetParmFloatValues(self, session, node_id, values_array, start, length):
+        node = self.__node(node_id)
+        if node is None:
+            return HDATA.Result.INVALID_ARGUMENT
+        start, length = _int(start), _int(length)
+        node.float_values[start:start + length] = _read(values_array, np.float32, length)
+        return HDATA.Result.SUCCESS
+
+    # geometry input
+
+    def HAPI_SetPartInfo(self, session, node_id, part_id, part_info):
+        part = self.__pending(node_id)
+        if part is None:
+            return HDATA.Result.INVALID_ARGUMENT
+        ctypes.pointer(part.info)[0] = _obj(part_info)
+        part.info.id = _int(part_id)
+        return HDATA.Result.SUCCESS
+
+    def HAPI_AddAttribute(self, session, node_id, part_id, name, attr_info):
+        part = self.__pending(node_id)
+        if part is None:
+            return HDATA.Result.INVALID_ARGUMENT
+        info = HDATA.AttributeInfo()
+        ctypes.pointer(info)[0] = _obj(attr_info)
+        dtype = STORAGE_TO_NP_TYPE[info.storage]
+        part.attribs[(int(info.owner), _text(name))] = (info, np.zeros(info.count * info.tupleSize, dtype))
+        return HDATA.Result.SUCCESS
+
+    def __set_attribute_data(self, node_id, name, data_array, start, length):
+        part = self.__pending(node_id)
+        name = _text(name)
+        for (_, attrib_name), (info, data) in part.attribs.items() if part is not None else ():
+            if attrib_name == name:
+                start, length = _int(start), _int(length)
+                tuple_size = info.tupleSize
+                data[start * tuple_size:(start + length) * tuple_size] =\
+                    _read(data_array, data.dtype, length * tuple_size)
+                return HDATA.Result.SUCCESS
+        return HDATA.Result.INVALID_ARGUMENT
+
+    def HAPI_SetAttributeIntData(self, session, node_id, part_id, name, attr_info, data_array, start, length):
+        return self.__set_attribute_data(node_id, name, data_array, start, length)
+
+    def HAPI_SetAttributeInt64Data(self, session, node_id, part_id, name, attr_info, data_array, start, length):
+        return self.__set_attribute_data(node_id, name, data_array, start, length)
+
+    def HAPI_SetAttributeFloatData(self, session, node_id, part_id, name, attr_info, data_array, start, length):
+        return self.__set_attribute_data(node_id, name, data_array, start, length)
+
+    def HAPI_SetAttributeFloat64Data(self, session, node_id, part_id, name, attr_info, data_array, start, length):
+        return self.__set_attribute_data(node_id, name, data_array, start, length)
+
+    def HAPI_SetVertexList(self, session, node_id, part_id, vertex_list_array, start, length):
+        part = self.__pending(node_id)
+        if part is None:
+            return HDATA.Result.INVALID_ARGUMENT
+        part.vertex_list = _read(vertex_list_array, np.int32, _int(length))
+        return HDATA.Result.SUCCESS
+
+    def HAPI_SetFaceCounts(self, session, node_id, part_id, face_counts_array, start, length):
+        part = self.__pending(node_id)
+        if part is None:
+            return HDATA.Result.INVALID_ARGUMENT
+        part.face_counts = _read(face_counts_array, np.int32, _int(length))
+        return HDATA.Result.SUCCESS
+
+    def HAPI_CommitGeo(self, session, node_id):
+        node = self.__node(node_id)
+        if node is None or node.pending is None:
+            return HDATA.Result.INVALID_ARGUMENT
+        part = node.pending
+        node.pending = None
+        self.__count_attribs(part)
+        node.parts = [part]
+        return HDATA.Result.SUCCESS
+
+    # geometry output
+
+    def HAPI_GetDisplayGeoInfo(self, session, node_id, geo_info):
+        node = self.__node(node_id)
+        if node is None:
+            return HDATA.Result.INVALID_ARGUMENT
+        info = _obj(geo_info)
+        info.type = HDATA.HGeoType.DEFAULT
+        info.nameSH = node.info.nameSH
+        info.nodeId = node.info.id
+        info.isDisplayGeo = True
+        info.partCount = len(node.parts)
+        return HDATA.Result.SUCCESS
+
+    def HAPI_GetPartInfo(self, session, node_id, part_id, part_info):
+        part = self.__part(node_id, part_id)
+        if part is None:
+            return HDATA.Result.INVALID_ARGUMENT
+        _write_struct(part_info, part.info)
+        return HDATA.Result.SUCCESS
+
+    def HAPI_GetAttributeNames(self, session, node_id, part_id, owner, attribute_names_array, count):
+        part = self.__part(node_id, part_id)
+        if part is None:
+            return HDATA.Result.INVALID_ARGUMENT
+        handles = [self.intern(name) for attrib_owner, name in part.attribs\
+            if attrib_owner == _int(owner)][:_int(count)]
+        _write(attribute_names_array, np.array(handles, dtype=np.int32))
+        return HDATA.Result.SUCCESS
+
+    def HAPI_GetAttributeInfo(self, session, node_id, part_id, name, owner, attr_info):
+        part = self.__part(node_id, part_id)
+        if part is None:
+            return HDATA.Result.INVALID_ARGUMENT
+        attrib = part.attribs.get((_int(owner), _text(name)))
+        if attrib is None:
+            _obj(attr_info).exists = False
+            return HDATA.Result.SUCCESS
+        _write_struct(attr_info, attrib[0])
+        return HDATA.Result.SUCCESS
+
+    def __get_attribute_data(self, node_id, part_id, name, attr_info, data_array, start, length):
+        part = self.__part(node_id, part_id)
+        if part is None:
+            return HDATA.Result.INVALID_ARGUMENT
+        attrib = part.attribs.get((int(_obj(attr_info).owner), _text(name)))
+        if attrib is None:
+            return HDATA.Result.INVALID_ARGUMENT
+        info, data = attrib
+        start, length = _int(start), _int(length)
+        _write(data_array, data[start * info.tupleSize:(start + length) * info.tupleSize])
+        return HDATA.Result.SUCCESS
+
+    def HAPI_GetAttributeIntData(self, session, node_id, part_id, name,# pylint: disable=too-many-arguments
+                                 attr_info, stride, data_array, start, length):
+        return self.__get_attribute_data(node_id, part_id, name, attr_info, data_array, start, length)
+
+    def HAPI_GetAttributeInt64Data(self, session, node_id, part_id, name,# pylint: disable=too-many-arguments
+                                   attr_info, stride, data_array, start, length):
+        return self.__get_attribute_data(node_id, part_id, name, attr_info, data_array, start, length)
+
+    def HAPI_GetAttributeFloatData(self, session, node_id, part_id, name,# pylint: disable=too-many-arguments
+                                   attr_info, stride, data_array, start, length):
+        return self.__get_attribute_data(node_id, part_id, name, attr_info, data_array, start, length)
+
+    def HAPI_GetAttributeFloat64Data(self, session, node_id, part_id, name,# pylint: disable=too-many-arguments
+                                     attr_info, stride, data_array, start, length):
+        return self.__get_attribute_data(node_id, part_id, name, attr_info, data_array, start, length)
+
+    def HAPI_GetAttributeStringData(self, session, node_id, part_id, name,# pylint: disable=too-many-arguments
+                                    attr_info, data_array, start, length):
+        return self.__get_attribute_data(node_id, part_id, name, attr_info, data_array, start, length)
+
+    def HAPI_GetVertexList(self, session, node_id, part_id, vertex_list_array, start, length):
+        part = self.__part(node_id, part_id)
+        if part is None:
+            return HDATA.Result.INVALID_ARGUMENT
+        _write(vertex_list_array, part.vertex_list[_int(start):_int(start) + _int(length)])
+        return HDATA.Result.SUCCESS
+
+    def HAPI_GetFaceCounts(self, session, node_id, part_id, face_counts_array, start, length):
+        part = self.__part(node_id, part_id)
+        if part is None:
+            return HDATA.Result.INVALID_ARGUMENT
+        _write(face_counts_array, part.face_counts[_int(start):_int(start) + _int(length)])
+        return HDATA.Result.SUCCESS
@@ -19,6 +19,8 @@ async def session_task(session : ph.HSession, index1, index2):
     asset_node.set_param_value("filename", "{0}-{1}".format(index1, index2))
     await asset_node.press_button_async("execute", status_report_interval=0.1)
 
+pool_executor = None
+
 def producer(n):
     while True:
         val1 = random.randint(1, 10)
@@ -26,10 +28,8 @@ def producer(n):
         time.sleep(5*random.random())
         print("Task Start on {0}-{1}".format(n, threading.currentThread().getName()))
         try:
-            fut = ph.HSessionManager.get_or_create_session_pool().enqueue_task(session_task, val1, val2)
-            # block this producer thread
-            while not fut.done():
-                time.sleep(0.5)
+            # block this producer thread until task completes
+            pool_executor.submit(session_task, val1, val2).result()
         except Exception as e:
             logging.exception(e)
         finally:
@@ -38,11 +38,12 @@ def producer(n):
 def main():
     """Main
     """
+    global pool_executor
     logging.basicConfig(level=logging.INFO)
     session_pool = ph.HSessionManager.get_or_create_session_pool()
 
     # run consumer on background thread forever
-    session_pool.run_task_consumer_on_background()
+    pool_executor = ph.HSessionPoolExecutor(session_pool)
 
     executor = ThreadPoolExecutor(max_workers=4)
     for i in range(0,4):
@@ -3,11 +3,12 @@
 Author  : Maajor
 Email   : info@ma-yidong.com
 """
-import os, time, datetime
+import os, datetime
 from flask import Flask, request, send_file
 import pyhapi as ph
 
 app = Flask(__name__)
+executor = None
 
 @ph.HSessionTask
 async def session_task(session : ph.HSession, filename, seed):
@@ -22,16 +23,16 @@ def sample():
     try:
         seed = request.json['seed']
         filename = datetime.datetime.now().strftime("%m%d%Y%H%M%S")
-        fut = ph.HSessionManager.get_or_create_session_pool().enqueue_task(session_task, filename, seed)
-        while not fut.done():
-            time.sleep(0.1)
+        # block this request thread until task completes
+        executor.submit(session_task, filename, seed).result()
         return send_file("{0}.obj".format(filename))
     except Exception as e:
         print(e)
 
 def main():
+    global executor
     session_pool = ph.HSessionManager.get_or_create_session_pool()
-    session_pool.run_task_consumer_on_background()
+    executor = ph.HSessionPoolExecutor(session_pool)
     app.run(threaded=True, host='127.0.0.1')
 
 if __name__ == "__main__":
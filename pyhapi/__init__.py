@@ -5,10 +5,17 @@ Email   : info@ma-yidong.com
 """
 import logging
 from .hdata import *
-from .hgeo import HGeo, HGeoMesh, HGeoCurve, HGeoHeightfield, HGeoInstancer
-from .hsession import HSession, HSessionManager, HSessionPool, HSessionTask
+from .hgeo import HGeo, HGeoMesh, HFaceList, HGeoCurve, HGeoHeightfield, HGeoInstancer
+from .hsession import HSession, HSessionManager, HSessionPool, HSessionTask, HSessionExecutor, SessionResetMode, \
+    HSessionPoolExecutor
 from .hnode import HNode, HInputNode, HHeightfieldInputNode, HHeightfieldInputVolumeNode
 from .hasset import HAsset
+from .hcache import HParmSchema, HParmSchemaCache, HGeoCache, HBufferPool
+from .hcook import HCookTimeModel
+from .htask import HSessionTaskItem, HSessionTaskQueue, task_key
+from .hscale import HSessionAutoscaler
+from .hmetrics import HTaskMetrics, HMetricsSink, HMetricsCollector, task_span
+from .htrace import HAPITracer, HAPICallStats, hapi_profile
 from .hparm import *
 from . import hapi as HAPI
 
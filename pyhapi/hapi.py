@@ -7,6 +7,8 @@ Email   : info@ma-yidong.com
 from ctypes import cdll, POINTER, c_int, c_int32, c_int64,\
     c_float, c_double, c_bool, byref, c_char_p, create_string_buffer
 import asyncio
+import time
+import threading
 from datetime import datetime
 import platform
 import logging
@@ -14,6 +16,7 @@ import logging
 import numpy as np
 
 from . import hdata as HDATA
+from .hcook import cook_poll_intervals
 
 
 HAPI_LIB = None
@@ -494,7 +497,8 @@ def delete_node(session, node_id):
         "DeleteNode Failed with {0}".format(HDATA.Result(result).name)
 
 
-def cook_node(session, cook_option, node_id, status_report_interval=0.1, status_verbosity=HDATA.StatusVerbosity.ALL):
+def cook_node(session, cook_option, node_id, status_report_interval=0.1,# pylint: disable=too-many-arguments
+              status_verbosity=HDATA.StatusVerbosity.ALL, expected_time=None):
     """Wrapper for HAPI_CookNode, a sync/blocking call
     Initiate a cook on this node. \
         Note that this may trigger cooks on other nodes if they are connected.
@@ -503,17 +507,24 @@ def cook_node(session, cook_option, node_id, status_report_interval=0.1, status_
         session (int64): The session of Houdini you are interacting with.
         cook_option (CookOption): option for node cook
         node_id (int): The node to cook.
+        status_report_interval (float, optional): max time interval in seconds \
+            to query cook status. Defaults to 0.1.
+        status_verbosity (StatusVerbosity, optional): verbosity of status logged. \
+            Defaults to HDATA.StatusVerbosity.ALL.
+        expected_time (float, optional): expected cook time in seconds. Defaults to None.
+
+    Returns:
+        float: seconds the cook took
     """
     result = HAPI_LIB.HAPI_CookNode(
         byref(session), node_id, byref(cook_option))
     assert result == HDATA.Result.SUCCESS,\
         "CookNode Failed with {0}".format(HDATA.Result(result).name)
-    new_loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(new_loop)
-    new_loop.run_until_complete(wait_cook_async(session, status_report_interval, status_verbosity))
+    return wait_cook(session, status_report_interval, status_verbosity, expected_time)
 
 
-async def cook_node_async(session, cook_option, node_id, status_report_interval=0.1, status_verbosity=HDATA.StatusVerbosity.ALL):
+async def cook_node_async(session, cook_option, node_id, status_report_interval=0.1,# pylint: disable=too-many-arguments
+                          status_verbosity=HDATA.StatusVerbosity.ALL, expected_time=None):
     """Wrapper for HAPI_CookNode, an async call
     Initiate a cook on this node. \
         Note that this may trigger cooks on other nodes if they are connected.
@@ -522,61 +533,148 @@ async def cook_node_async(session, cook_option, node_id, status_report_interval=
         session (int64): The session of Houdini you are interacting with.
         cook_option (CookOption): option for node cook
         node_id (int): The node to cook.
+        status_report_interval (float, optional): max time interval in seconds \
+            to query cook status. Defaults to 0.1.
+        status_verbosity (StatusVerbosity, optional): verbosity of status logged. \
+            Defaults to HDATA.StatusVerbosity.ALL.
+        expected_time (float, optional): expected cook time in seconds. Defaults to None.
+
+    Returns:
+        float: seconds the cook took
     """
     result = HAPI_LIB.HAPI_CookNode(
         byref(session), node_id, byref(cook_option))
     assert result == HDATA.Result.SUCCESS,\
         "CookNodeAsync Failed with {0}".format(HDATA.Result(result).name)
-    await wait_cook_async(session, status_report_interval, status_verbosity)
+    return await wait_cook_async(session, status_report_interval, status_verbosity, expected_time)
 
 
-def wait_cook(session, status_report_interval=0.1, status_verbosity=HDATA.StatusVerbosity.ALL):
-    """An sync call to wait for cooking return result
+def wait_cook(session, status_report_interval=0.1, status_verbosity=HDATA.StatusVerbosity.ALL,
+              expected_time=None):
+    """An sync call to wait for cooking return result, it polls cook state \
+        with backoff, no event loop is created
 
     Args:
         session (int64): The session of Houdini you are interacting with.
-        status_report_interval (int, optional): time interval in seconds to query cook status. \
-            Defaults to 1.
+        status_report_interval (float, optional): max time interval in seconds \
+            to query cook status. Defaults to 0.1.
+        status_verbosity (StatusVerbosity, optional): verbosity of status logged. \
+            Defaults to HDATA.StatusVerbosity.ALL.
+        expected_time (float, optional): expected cook time in seconds, \
+            first query is delayed by it. Defaults to None.
+
+    Returns:
+        float: seconds waited
     """
-    new_loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(new_loop)
-    new_loop.run_until_complete(wait_cook_async(session, status_report_interval, status_verbosity))
+    start = time.perf_counter()
+    verbose = _is_cook_verbose(status_verbosity)
+    if verbose:
+        logging.info("-------------Start  Cooking at Session {0}!---------------".format(session.id))
+    intervals = cook_poll_intervals(status_report_interval, expected_time)
+    while True:
+        cook_result, cook_state = _query_cook_state(session, verbose, status_verbosity)
+        if not _is_cooking(cook_result, cook_state):
+            break
+        time.sleep(next(intervals))
+    _check_cook_state(session, cook_result, cook_state, verbose)
+    return time.perf_counter() - start
 
 
-async def wait_cook_async(session, status_report_interval=0.1, status_verbosity=HDATA.StatusVerbosity.ALL):
-    """An async call to wait for cooking return result
+async def wait_cook_async(session, status_report_interval=0.1, status_verbosity=HDATA.StatusVerbosity.ALL,
+                          expected_time=None):
+    """An async call to wait for cooking return result, it polls cook state \
+        with backoff
 
     Args:
         session (int64): The session of Houdini you are interacting with.
-        status_report_interval (int, optional): time interval in seconds to query cook status. \
-            Defaults to 1.
+        status_report_interval (float, optional): max time interval in seconds \
+            to query cook status. Defaults to 0.1.
+        status_verbosity (StatusVerbosity, optional): verbosity of status logged. \
+            Defaults to HDATA.StatusVerbosity.ALL.
+        expected_time (float, optional): expected cook time in seconds, \
+            first query is delayed by it. Defaults to None.
+
+    Returns:
+        float: seconds waited
     """
-    if status_verbosity>HDATA.StatusVerbosity.WARNINGS:
+    start = time.perf_counter()
+    verbose = _is_cook_verbose(status_verbosity)
+    if verbose:
         logging.info("-------------Start  Cooking at Session {0}!---------------".format(session.id))
-    cook_status = c_int32()
-    cook_result = HDATA.Result.ALREADY_INITIALIZED
+    intervals = cook_poll_intervals(status_report_interval, expected_time)
     while True:
-        cook_result = HAPI_LIB.HAPI_GetStatus(
-            byref(session), 2, byref(cook_status))
-        continuestate = cook_status.value > HDATA.State.MAX_READY_STATE\
-            and cook_result == HDATA.Result.SUCCESS
-        if status_verbosity>HDATA.StatusVerbosity.WARNINGS:
-            logging.info("Cook Status at session {0} {1}: {2}".format(session.id, datetime.now().\
-                strftime('%H:%M:%S'), _get_status_string(session,\
-                HDATA.StatusType.COOK_STATE,\
-                    status_verbosity)))
-        if not continuestate:
+        cook_result, cook_state = _query_cook_state(session, verbose, status_verbosity)
+        if not _is_cooking(cook_result, cook_state):
             break
-        await asyncio.sleep(status_report_interval)
-    if cook_status.value == HDATA.State.READY_WITH_FATAL_ERRORS:
+        await asyncio.sleep(next(intervals))
+    _check_cook_state(session, cook_result, cook_state, verbose)
+    return time.perf_counter() - start
+
+
+def _is_cook_verbose(status_verbosity):
+    # status strings are only fetched when they would be logged
+    return status_verbosity > HDATA.StatusVerbosity.WARNINGS and\
+        logging.getLogger().isEnabledFor(logging.INFO)
+
+
+def _is_cooking(cook_result, cook_state):
+    return cook_state > HDATA.State.MAX_READY_STATE and cook_result == HDATA.Result.SUCCESS
+
+
+def _query_cook_state(session, verbose, status_verbosity):
+    cook_state = c_int32()
+    cook_result = HAPI_LIB.HAPI_GetStatus(
+        byref(session), HDATA.StatusType.COOK_STATE, byref(cook_state))
+    if verbose:
+        logging.info("Cook Status at session {0} {1}: {2}".format(session.id, datetime.now().\
+            strftime('%H:%M:%S'), _get_status_string(session,\
+            HDATA.StatusType.COOK_STATE,\
+                status_verbosity)))
+    return cook_result, cook_state.value
+
+
+def _check_cook_state(session, cook_result, cook_state, verbose):
+    if cook_state == HDATA.State.READY_WITH_FATAL_ERRORS:
         logging.error("Cook with Fatal Error at session {0} {1}".format(session.id, _get_status_string(session)))
-    if status_verbosity>HDATA.StatusVerbosity.WARNINGS:
+    if verbose:
         logging.info("-------------Finish Cooking at Session {0}!---------------".format(session.id))
     assert cook_result == HDATA.Result.SUCCESS and\
-        cook_status.value == HDATA.State.READY,\
+        cook_state == HDATA.State.READY,\
         "CookNode Failed with {0} at session {1} and Cook Status is {2}".\
-        format(HDATA.Result(cook_result).name, session.id, 
-               HDATA.State(cook_status.value).name)
+        format(HDATA.Result(cook_result).name, session.id,
+               HDATA.State(cook_state).name)
+
+
+def interrupt(session):
+    """Wrapper for HAPI_Interrupt
+    Interrupt a cook or load operation. It could be called from another thread\
+        while the session is blocked in a cook.
+
+    Args:
+        session (int64): The session of Houdini you are interacting with.
+    """
+    result = HAPI_LIB.HAPI_Interrupt(byref(session))
+    assert result == HDATA.Result.SUCCESS,\
+        "Interrupt Failed with {0}".format(HDATA.Result(result).name)
+
+
+def get_status(session, status_type=HDATA.StatusType.COOK_STATE):
+    """Wrapper for HAPI_GetStatus
+    Gives back the status code for a specific status type.
+
+    Args:
+        session (int64): The session of Houdini you are interacting with.
+        status_type (StatusType, optional): status type querying. \
+            Defaults to HDATA.StatusType.COOK_STATE.
+
+    Returns:
+        int: status code, a HDATA.State for COOK_STATE, a HDATA.Result for others
+    """
+    status = c_int32()
+    result = HAPI_LIB.HAPI_GetStatus(byref(session), status_type, byref(status))
+    assert result == HDATA.Result.SUCCESS,\
+        "GetStatus Failed with {0}".format(HDATA.Result(result).name)
+    return status.value
 
 
 def query_node_input(session, node_id, input_index=0):
@@ -1141,6 +1239,121 @@ def set_parm_node_value(session, node_id, parmname, value):
         "SetParamNodeValue Failed with {0}".format(
             HDATA.Result(result).name)
 
+def get_parm_int_values(session, node_id, start, length):
+    """Wrapper for HAPI_GetParmIntValues
+    Fill an array of parameter int values. This is more efficient than \
+        calling HAPI_GetParmIntValue() individually for each parameter value.
+
+    Args:
+        session (int): The session of Houdini you are interacting with.
+        node_id (int): The node to get.
+        start (int): First index of range, usually ParmInfo.intValuesIndex
+        length (int): Number of values to get
+
+    Returns:
+        np.ndarray(int): int values of querying range
+    """
+    data_buffer = (c_int32 * length)()
+    if length == 0:
+        return np.frombuffer(data_buffer, np.int32)
+    result = HAPI_LIB.HAPI_GetParmIntValues(
+        byref(session), node_id, byref(data_buffer), c_int32(start), c_int32(length))
+    assert result == HDATA.Result.SUCCESS,\
+        "GetParmIntValues Failed with {0}".format(
+            HDATA.Result(result).name)
+    return np.frombuffer(data_buffer, np.int32)
+
+
+def get_parm_float_values(session, node_id, start, length):
+    """Wrapper for HAPI_GetParmFloatValues
+    Fill an array of parameter float values. This is more efficient than \
+        calling HAPI_GetParmFloatValue() individually for each parameter value.
+
+    Args:
+        session (int): The session of Houdini you are interacting with.
+        node_id (int): The node to get.
+        start (int): First index of range, usually ParmInfo.floatValuesIndex
+        length (int): Number of values to get
+
+    Returns:
+        np.ndarray(float): float values of querying range
+    """
+    data_buffer = (c_float * length)()
+    if length == 0:
+        return np.frombuffer(data_buffer, np.float32)
+    result = HAPI_LIB.HAPI_GetParmFloatValues(
+        byref(session), node_id, byref(data_buffer), c_int32(start), c_int32(length))
+    assert result == HDATA.Result.SUCCESS,\
+        "GetParmFloatValues Failed with {0}".format(
+            HDATA.Result(result).name)
+    return np.frombuffer(data_buffer, np.float32)
+
+
+def get_parm_string_values(session, node_id, start, length, evaluate=True):
+    """Wrapper for HAPI_GetParmStringValues
+    Fill an array of parameter string values. This is more efficient than \
+        calling HAPI_GetParmStringValue() individually for each parameter value.
+
+    Args:
+        session (int): The session of Houdini you are interacting with.
+        node_id (int): The node to get.
+        start (int): First index of range, usually ParmInfo.stringValuesIndex
+        length (int): Number of values to get
+        evaluate (bool, optional): Whether or not to evaluate the string expressions. \
+            Defaults to True.
+
+    Returns:
+        np.ndarray(str): string values of querying range
+    """
+    if length == 0:
+        return get_string_batch(session, [])
+    data_buffer = (c_int32 * length)()
+    result = HAPI_LIB.HAPI_GetParmStringValues(
+        byref(session), node_id, c_bool(evaluate), byref(data_buffer),
+        c_int32(start), c_int32(length))
+    assert result == HDATA.Result.SUCCESS,\
+        "GetParmStringValues Failed with {0}".format(
+            HDATA.Result(result).name)
+    return get_string_batch(session, data_buffer)
+
+
+def set_parm_int_values(session, node_id, values, start):
+    """Wrapper for HAPI_SetParmIntValues
+    Set (push) an array of parameter int values.
+
+    Args:
+        session (int): The session of Houdini you are interacting with.
+        node_id (int): The node to set.
+        values (array of int): Values to set
+        start (int): First index of range, usually ParmInfo.intValuesIndex
+    """
+    data = np.ascontiguousarray(values, dtype=np.int32)
+    result = HAPI_LIB.HAPI_SetParmIntValues(
+        byref(session), node_id, data.ctypes.data_as(POINTER(c_int32)),
+        c_int32(start), c_int32(data.size))
+    assert result == HDATA.Result.SUCCESS,\
+        "SetParmIntValues Failed with {0}".format(
+            HDATA.Result(result).name)
+
+
+def set_parm_float_values(session, node_id, values, start):
+    """Wrapper for HAPI_SetParmFloatValues
+    Set (push) an array of parameter float values.
+
+    Args:
+        session (int): The session of Houdini you are interacting with.
+        node_id (int): The node to set.
+        values (array of float): Values to set
+        start (int): First index of range, usually ParmInfo.floatValuesIndex
+    """
+    data = np.ascontiguousarray(values, dtype=np.float32)
+    result = HAPI_LIB.HAPI_SetParmFloatValues(
+        byref(session), node_id, data.ctypes.data_as(POINTER(c_float)),
+        c_int32(start), c_int32(data.size))
+    assert result == HDATA.Result.SUCCESS,\
+        "SetParmFloatValues Failed with {0}".format(
+            HDATA.Result(result).name)
+
 def set_part_info(session, node_id, part_info):
     """Wrapper for HAPI_SetPartInfo
     Set the main part info struct
@@ -1184,7 +1397,7 @@ def set_curve_counts(session, node_id, part_id, curve_count):
     intp = POINTER(c_int)
     result = HAPI_LIB.HAPI_SetCurveCounts(
         byref(session), node_id, part_id,
-        curve_count.flatten().ctypes.data_as(intp), 0, curve_count.shape[0])
+        _contiguous(curve_count, np.int32).ctypes.data_as(intp), 0, curve_count.shape[0])
     assert result == HDATA.Result.SUCCESS,\
         "SetCurveCounts Failed with {0}".format(HDATA.Result(result).name)
 
@@ -1197,14 +1410,14 @@ def set_curve_knots(session, node_id, part_id, curve_knots):
         session (int): The session of Houdini you are interacting with.
         node_id (int): The node to get.
         part_id (int): Currently unused. Input asset geos are assumed to have only one part.
-        curve_knots (np.ndarray(int)): The knots of each curve.
+        curve_knots (np.ndarray(float)): The knots of each curve.
     """
     if not isinstance(curve_knots, np.ndarray):
         return
-    intp = POINTER(c_int)
+    floatp = POINTER(c_float)
     result = HAPI_LIB.HAPI_SetCurveKnots(
         byref(session), node_id, part_id,
-        curve_knots.flatten().ctypes.data_as(intp), 0, curve_knots.shape[0])
+        _contiguous(curve_knots, np.float32).ctypes.data_as(floatp), 0, curve_knots.shape[0])
     assert result == HDATA.Result.SUCCESS,\
         "SetCurveKnots Failed with {0}".format(HDATA.Result(result).name)
     return
@@ -1290,6 +1503,27 @@ def add_attribute(session, node_id, name, attrib_info):
         "AddAttribute Failed with {0}".format(HDATA.Result(result).name)
 
 
+_COPIED = threading.local()
+
+
+def copied_bytes():
+    """Bytes setters and HGeoMesh.set_topology copied on this thread, to make arrays \
+        passed to HAPI contiguous and in HAPI's dtype. Arrays already so are passed without copy.
+
+    Returns:
+        int: bytes copied since this thread started
+    """
+    return getattr(_COPIED, "nbytes", 0)
+
+
+def _contiguous(data, dtype):
+    # flat C-contiguous view of data in dtype, copied only when layout or dtype differ
+    flat = np.ascontiguousarray(data, dtype=dtype).reshape(-1)
+    if not isinstance(data, np.ndarray) or not np.may_share_memory(flat, data):
+        _COPIED.nbytes = copied_bytes() + flat.nbytes
+    return flat
+
+
 def set_attribute_float_data(session, node_id, name, attrib_info, data):
     """Wrapper for HAPI_SetAttributeFloatData
     Set attribute float data.
@@ -1304,7 +1538,7 @@ def set_attribute_float_data(session, node_id, name, attrib_info, data):
     floatp = POINTER(c_float)
     result = HAPI_LIB.HAPI_SetAttributeFloatData(
         byref(session), node_id, 0, c_char_p(name.encode('utf-8')),
-        byref(attrib_info), data.flatten().ctypes.data_as(floatp), 0, attrib_info.count)
+        byref(attrib_info), _contiguous(data, np.float32).ctypes.data_as(floatp), 0, attrib_info.count)
     assert result == HDATA.Result.SUCCESS,\
         "SetAttributeFloatData Failed with {0}".format(
             HDATA.Result(result).name)
@@ -1324,7 +1558,7 @@ def set_attribute_float64_data(session, node_id, name, attrib_info, data):
     floatp = POINTER(c_double)
     result = HAPI_LIB.HAPI_SetAttributeFloat64Data(
         byref(session), node_id, 0, c_char_p(name.encode('utf-8')),
-        byref(attrib_info), data.flatten().ctypes.data_as(floatp), 0, attrib_info.count)
+        byref(attrib_info), _contiguous(data, np.float64).ctypes.data_as(floatp), 0, attrib_info.count)
     assert result == HDATA.Result.SUCCESS,\
         "SetAttributeFloatData Failed with {0}".format(
             HDATA.Result(result).name)
@@ -1344,7 +1578,7 @@ def set_attribute_int64_data(session, node_id, name, attrib_info, data):
     intp = POINTER(c_int64)
     result = HAPI_LIB.HAPI_SetAttributeInt64Data(
         byref(session), node_id, 0, c_char_p(name.encode('utf-8')),
-        byref(attrib_info), data.flatten().ctypes.data_as(intp), 0, attrib_info.count)
+        byref(attrib_info), _contiguous(data, np.int64).ctypes.data_as(intp), 0, attrib_info.count)
     assert result == HDATA.Result.SUCCESS,\
         "SetAttributeFloatData Failed with {0}".format(
             HDATA.Result(result).name)
@@ -1364,7 +1598,7 @@ def set_attribute_int_data(session, node_id, name, attrib_info, data):
     intp = POINTER(c_int)
     result = HAPI_LIB.HAPI_SetAttributeIntData(
         byref(session), node_id, 0, c_char_p(name.encode('utf-8')),
-        byref(attrib_info), data.flatten().ctypes.data_as(intp), 0, attrib_info.count)
+        byref(attrib_info), _contiguous(data, np.int32).ctypes.data_as(intp), 0, attrib_info.count)
     assert result == HDATA.Result.SUCCESS,\
         "SetAttributeFloatData Failed with {0}".format(
             HDATA.Result(result).name)
@@ -1424,10 +1658,7 @@ def get_attribute_names(session, node_id, part_info,
     assert result == HDATA.Result.SUCCESS,\
         "GetAttributeNames Failed with {0}".format(
             HDATA.Result(result).name)
-    attrib_names = []
-    for string_handle in string_handle_buffer:
-        attrib_names.append(get_string(session, string_handle))
-    return attrib_names
+    return list(get_string_batch(session, string_handle_buffer))
 
 
 def get_attribute_info(session, node_id, part_id, name, attrib_type):
@@ -1454,7 +1685,24 @@ def get_attribute_info(session, node_id, part_id, name, attrib_type):
     return attrib_info
 
 
-def get_attribute_int_data(session, node_id, part_id, name, attrib_info):
+def _array_out(out, shape, dtype):
+    # array data of shape is written into, out reshaped if given
+    size = int(np.prod(shape))
+    if out is None:
+        return np.empty(shape, dtype=dtype)
+    assert out.dtype == dtype and out.size == size\
+        and out.flags.c_contiguous and out.flags.writeable,\
+        "out should be a writable contiguous {0} array of {1} elements".format(\
+            np.dtype(dtype).name, size)
+    return out if out.shape == shape else out.reshape(shape)
+
+
+def _attribute_out(out, attrib_info, dtype):
+    # array attribute data is written into, out reshaped if given
+    return _array_out(out, (attrib_info.count, attrib_info.tupleSize), dtype)
+
+
+def get_attribute_int_data(session, node_id, part_id, name, attrib_info, out=None):# pylint: disable=too-many-arguments
     """Wrapper for HAPI_GetAttributeIntData
     Get attribute integer data.
 
@@ -1464,22 +1712,23 @@ def get_attribute_int_data(session, node_id, part_id, name, attrib_info):
         part_id (int): Part Id
         name (str): Name of attribute querying
         attrib_info (AttributeInfo): AttributeInfo of querying named attribute in node
+        out (np.ndarray, optional): contiguous int32 array of count * tupleSize elements \
+            data is written into, such as one from HBufferPool. Defaults to None, allocate one.
 
     Returns:
         np.ndarray(int): data of querying named attribute
     """
-    data_buffer = (c_int32 * (attrib_info.count * attrib_info.tupleSize))()
+    data = _attribute_out(out, attrib_info, np.int32)
     result = HAPI_LIB.HAPI_GetAttributeIntData(
         byref(session), node_id, part_id, c_char_p(name.encode('utf-8')),
-        byref(attrib_info), -1, byref(data_buffer), 0, attrib_info.count)
+        byref(attrib_info), -1, data.ctypes.data_as(POINTER(c_int32)), 0, attrib_info.count)
     assert result == HDATA.Result.SUCCESS,\
         "GetAttributeIntData Failed with {0}".format(
             HDATA.Result(result).name)
-    data_np = np.frombuffer(data_buffer, np.int32)
-    return np.reshape(data_np, (attrib_info.count, attrib_info.tupleSize))
+    return data
 
 
-def get_attribute_int64_data(session, node_id, part_id, name, attrib_info):
+def get_attribute_int64_data(session, node_id, part_id, name, attrib_info, out=None):# pylint: disable=too-many-arguments
     """Wrapper for HAPI_GetAttributeInt64Data
     Get attribute int64 data.
 
@@ -1489,22 +1738,23 @@ def get_attribute_int64_data(session, node_id, part_id, name, attrib_info):
         part_id (int): Part Id
         name (str): Name of attribute querying
         attrib_info (AttributeInfo): AttributeInfo of querying named attribute in node
+        out (np.ndarray, optional): contiguous int64 array of count * tupleSize elements \
+            data is written into, such as one from HBufferPool. Defaults to None, allocate one.
 
     Returns:
         np.ndarray(int64): data of querying named attribute
     """
-    data_buffer = (c_int64 * (attrib_info.count * attrib_info.tupleSize))()
+    data = _attribute_out(out, attrib_info, np.int64)
     result = HAPI_LIB.HAPI_GetAttributeInt64Data(
         byref(session), node_id, part_id, c_char_p(name.encode('utf-8')),
-        byref(attrib_info), -1, byref(data_buffer), 0, attrib_info.count)
+        byref(attrib_info), -1, data.ctypes.data_as(POINTER(c_int64)), 0, attrib_info.count)
     assert result == HDATA.Result.SUCCESS,\
         "GetAttributeInt64Data Failed with {0}".format(
             HDATA.Result(result).name)
-    data_np = np.frombuffer(data_buffer, np.int64)
-    return np.reshape(data_np, (attrib_info.count, attrib_info.tupleSize))
+    return data
 
 
-def get_attribute_float_data(session, node_id, part_id, name, attrib_info):
+def get_attribute_float_data(session, node_id, part_id, name, attrib_info, out=None):# pylint: disable=too-many-arguments
     """Wrapper for HAPI_GetAttributeFloatData
     Get attribute float data.
 
@@ -1514,22 +1764,23 @@ def get_attribute_float_data(session, node_id, part_id, name, attrib_info):
         part_id (int): Part Id
         name (str): Name of attribute querying
         attrib_info (AttributeInfo): AttributeInfo of querying named attribute in node
+        out (np.ndarray, optional): contiguous float32 array of count * tupleSize elements \
+            data is written into, such as one from HBufferPool. Defaults to None, allocate one.
 
     Returns:
         np.ndarray(float): data of querying named attribute
     """
-    data_buffer = (c_float * (attrib_info.count * attrib_info.tupleSize))()
+    data = _attribute_out(out, attrib_info, np.float32)
     result = HAPI_LIB.HAPI_GetAttributeFloatData(
         byref(session), node_id, part_id, c_char_p(name.encode('utf-8')),
-        byref(attrib_info), -1, byref(data_buffer), 0, attrib_info.count)
+        byref(attrib_info), -1, data.ctypes.data_as(POINTER(c_float)), 0, attrib_info.count)
     assert result == HDATA.Result.SUCCESS,\
         "GetAttributeFloatData Failed with {0}".format(
             HDATA.Result(result).name)
-    data_np = np.frombuffer(data_buffer, np.float32)
-    return np.reshape(data_np, (attrib_info.count, attrib_info.tupleSize))
+    return data
 
 
-def get_attribute_float64_data(session, node_id, part_id, name, attrib_info):
+def get_attribute_float64_data(session, node_id, part_id, name, attrib_info, out=None):# pylint: disable=too-many-arguments
     """Wrapper for HAPI_GetAttributeFloat64Data
     Get attribute float64 data.
 
@@ -1539,22 +1790,23 @@ def get_attribute_float64_data(session, node_id, part_id, name, attrib_info):
         part_id (int): Part Id
         name (str): Name of attribute querying
         attrib_info (AttributeInfo): AttributeInfo of querying named attribute in node
+        out (np.ndarray, optional): contiguous float64 array of count * tupleSize elements \
+            data is written into, such as one from HBufferPool. Defaults to None, allocate one.
 
     Returns:
         np.ndarray(float64): data of querying named attribute
     """
-    data_buffer = (c_double * (attrib_info.count * attrib_info.tupleSize))()
+    data = _attribute_out(out, attrib_info, np.float64)
     result = HAPI_LIB.HAPI_GetAttributeFloat64Data(
         byref(session), node_id, part_id, c_char_p(name.encode('utf-8')),
-        byref(attrib_info), -1, byref(data_buffer), 0, attrib_info.count)
+        byref(attrib_info), -1, data.ctypes.data_as(POINTER(c_double)), 0, attrib_info.count)
     assert result == HDATA.Result.SUCCESS,\
         "GetAttributeFloat64Data Failed with {0}".format(
             HDATA.Result(result).name)
-    data_np = np.frombuffer(data_buffer, np.float64)
-    return np.reshape(data_np, (attrib_info.count, attrib_info.tupleSize))
+    return data
 
 
-def get_attribute_string_data(session, node_id, part_id, name, attrib_info):
+def get_attribute_string_data(session, node_id, part_id, name, attrib_info, out=None):# pylint: disable=too-many-arguments
     """Wrapper for HAPI_GetAttributeStringData
     Get attribute string data.
 
@@ -1564,6 +1816,8 @@ def get_attribute_string_data(session, node_id, part_id, name, attrib_info):
         part_id (int): Part Id
         name (str): Name of attribute querying
         attrib_info (AttributeInfo): AttributeInfo of querying named attribute in node
+        out (np.ndarray, optional): object array of count * tupleSize elements \
+            strings are written into. Defaults to None, allocate one.
 
     Returns:
         np.ndarray(str): data of querying named attribute
@@ -1575,10 +1829,9 @@ def get_attribute_string_data(session, node_id, part_id, name, attrib_info):
     assert result == HDATA.Result.SUCCESS,\
         "GetAttributeStringData Failed with {0}".format(
             HDATA.Result(result).name)
-    data_str = np.ndarray((attrib_info.count * attrib_info.tupleSize), dtype=np.dtype('O'))
-    for i in range(0, attrib_info.count * attrib_info.tupleSize):
-        data_str[i] = get_string(session, c_int(data_buffer[i]))
-    return np.reshape(data_str, (attrib_info.count, attrib_info.tupleSize))
+    data = _attribute_out(out, attrib_info, np.dtype('O'))
+    data.ravel()[:] = get_string_batch(session, data_buffer)
+    return data
 
 
 STORAGE_TYPE_TO_GET_ATTRIB = {
@@ -1603,7 +1856,7 @@ def set_vertex_list(session, node_id, vertex_list_array):
     """
     intp = POINTER(c_int)
     result = HAPI_LIB.HAPI_SetVertexList(
-        byref(session), node_id, 0, vertex_list_array.flatten().ctypes.data_as(intp),
+        byref(session), node_id, 0, _contiguous(vertex_list_array, np.int32).ctypes.data_as(intp),
         0, np.size(vertex_list_array))
     assert result == HDATA.Result.SUCCESS,\
         "SetVertexList Failed with {0}".format(HDATA.Result(result).name)
@@ -1621,33 +1874,34 @@ def set_face_counts(session, node_id, face_counts_array):
     """
     intp = POINTER(c_int)
     result = HAPI_LIB.HAPI_SetFaceCounts(
-        byref(session), node_id, 0, face_counts_array.ctypes.data_as(intp),
+        byref(session), node_id, 0, _contiguous(face_counts_array, np.int32).ctypes.data_as(intp),
         0, face_counts_array.shape[0])
     assert result == HDATA.Result.SUCCESS,\
         "SetFaceCounts Failed with {0}".format(HDATA.Result(result).name)
 
-def get_vertex_list(session, node_id, part_info):
+def get_vertex_list(session, node_id, part_info, out=None):
     """Wrapper for HAPI_GetVertexList
 
     Args:
         session (int): The session of Houdini you are interacting with.
         node_id (int): The node to get.
         part_info (PartInfo): Part info of querying
+        out (np.ndarray, optional): contiguous int32 array of vertexCount elements \
+            data is written into, such as one from HBufferPool. Defaults to None, allocate one.
 
     Returns:
         np.ndarray: Array of vertices
     """
-    data_buffer = (c_int * part_info.vertexCount)()
+    data = _array_out(out, (part_info.vertexCount,), np.int32)
     result = HAPI_LIB.HAPI_GetVertexList(
-        byref(session), node_id, part_info.id, byref(data_buffer),
+        byref(session), node_id, part_info.id, data.ctypes.data_as(POINTER(c_int32)),
         0, part_info.vertexCount)
     assert result == HDATA.Result.SUCCESS,\
         "GetVertexList Failed with {0}".format(HDATA.Result(result).name)
-    data_np = np.frombuffer(data_buffer, np.int32)
-    return data_np
+    return data
 
 
-def get_face_counts(session, node_id, part_info):
+def get_face_counts(session, node_id, part_info, out=None):
     """Wrapper for HAPI_GetFaceCounts
     Get the array of faces where the nth integer in the array \
         is the number of vertices the nth face has.
@@ -1656,18 +1910,19 @@ def get_face_counts(session, node_id, part_info):
         session (int): The session of Houdini you are interacting with.
         node_id (int): The node to get.
         part_info (PartInfo): Part info of querying
+        out (np.ndarray, optional): contiguous int32 array of faceCount elements \
+            data is written into, such as one from HBufferPool. Defaults to None, allocate one.
 
     Returns:
         np.ndarray: Array of face count
     """
-    data_buffer = (c_int * part_info.faceCount)()
+    data = _array_out(out, (part_info.faceCount,), np.int32)
     result = HAPI_LIB.HAPI_GetFaceCounts(
-        byref(session), node_id, part_info.id, byref(data_buffer),
+        byref(session), node_id, part_info.id, data.ctypes.data_as(POINTER(c_int32)),
         0, part_info.faceCount)
     assert result == HDATA.Result.SUCCESS,\
         "GetFaceCounts Failed with {0}".format(HDATA.Result(result).name)
-    data_np = np.frombuffer(data_buffer, np.int32)
-    return data_np
+    return data
 
 def get_faces(session, node_id, part_info):
     """Get faces of a part
@@ -1678,14 +1933,12 @@ def get_faces(session, node_id, part_info):
         part_info (PartInfo): Part info of querying
 
     Returns:
-        np.ndarray: 2D Array of vertex list
+        list(np.ndarray): vertex list of each face, views of one array. \
+            HGeoMesh.extract_from_sop keeps the flat vertex list instead.
     """
     vertex_list = get_vertex_list(session, node_id, part_info)
     face_counts = get_face_counts(session, node_id, part_info)
-    for i in range(1, len(face_counts)):
-        face_counts[i] = face_counts[i-1] + face_counts[i]
-    faces = np.split(vertex_list, face_counts)
-    return faces[:-1]#remove last empty face
+    return np.split(vertex_list, np.cumsum(face_counts)[:-1]) if face_counts.size else []
 
 def set_heightfield_data(session, node_id, part_id, name, data_array):
     """Wrapper for HAPI_SetHeightFieldData
@@ -1705,7 +1958,7 @@ def set_heightfield_data(session, node_id, part_id, name, data_array):
     floatp = POINTER(c_float)
     result = HAPI_LIB.HAPI_SetHeightFieldData(
         byref(session), node_id, part_id, c_char_p(name.encode('utf-8')),
-        data_array.flatten().ctypes.data_as(floatp), 0, np.size(data_array))
+        _contiguous(data_array, np.float32).ctypes.data_as(floatp), 0, np.size(data_array))
     assert result == HDATA.Result.SUCCESS,\
         "SetHeightfieldData Failed with {0}".format(HDATA.Result(result).name)
 
@@ -1794,7 +2047,7 @@ def set_volume_tile_float_data(session, node_id, part_id, volume_tile_info, data
     data_size = 8*8*8*tuple_size
     result = HAPI_LIB.HAPI_SetVolumeTileFloatData(\
         byref(session), node_id, part_id, byref(volume_tile_info),\
-            data_array.flatten().ctypes.data_as(floatp), data_size)
+            _contiguous(data_array, np.float32).ctypes.data_as(floatp), data_size)
     assert result == HDATA.Result.SUCCESS,\
         "SetVolumeTileIntData Failed with {0}".format(HDATA.Result(result).name)
 
@@ -1814,7 +2067,7 @@ def set_volume_tile_int_data(session, node_id, part_id, volume_tile_info, data_a
     data_size = 8*8*8*tuple_size
     result = HAPI_LIB.HAPI_SetVolumeTileIntData(\
         byref(session), node_id, part_id, byref(volume_tile_info),\
-            data_array.flatten().ctypes.data_as(intp), data_size)
+            _contiguous(data_array, np.int32).ctypes.data_as(intp), data_size)
     assert result == HDATA.Result.SUCCESS,\
         "SetVolumeTileIntData Failed with {0}".format(HDATA.Result(result).name)
 
@@ -1952,6 +2205,42 @@ def get_string(session, string_handle):
     return _get_string(session, string_handle, buffer_length)
 
 
+def get_string_batch(session, string_handles):
+    """Get literal strings from a batch of hengine's string handlers
+    Wrapper for HAPI_GetStringBatchSize and HAPI_GetStringBatch, \
+        repeated handlers are deduplicated, so it costs two calls in total.
+
+    Args:
+        session (int64): The session of Houdini you are interacting with.
+        string_handles (array of int): string handlers of querying strings
+
+    Returns:
+        np.ndarray(str): strings queried, in the same order of string_handles
+    """
+    handles = np.asarray(string_handles, dtype=np.int32).ravel()
+    if handles.size == 0:
+        return np.ndarray((0,), dtype=np.dtype('O'))
+    unique_handles, inverse = np.unique(handles, return_inverse=True)
+    unique_handles = np.ascontiguousarray(unique_handles, dtype=np.int32)
+
+    buffer_size = c_int32()
+    result = HAPI_LIB.HAPI_GetStringBatchSize(
+        byref(session), unique_handles.ctypes.data_as(POINTER(c_int32)),
+        c_int32(unique_handles.size), byref(buffer_size))
+    assert result == HDATA.Result.SUCCESS,\
+        "GetStringBatchSize Failed with {0}".format(HDATA.Result(result).name)
+    buffers = create_string_buffer(buffer_size.value)
+    result = HAPI_LIB.HAPI_GetStringBatch(byref(session), buffers, buffer_size)
+    assert result == HDATA.Result.SUCCESS,\
+        "GetStringBatch Failed with {0}".format(HDATA.Result(result).name)
+
+    # buffer holds null-terminated strings of unique handles in order
+    unique_strings = np.ndarray((unique_handles.size,), dtype=np.dtype('O'))
+    unique_strings[:] = [raw.decode() for raw in\
+        buffers.raw[:buffer_size.value].split(b'\0')[:unique_handles.size]]
+    return unique_strings[inverse.ravel()]
+
+
 def _get_status_string(session, status=HDATA.StatusType.COOK_RESULT,
                        verbosity=HDATA.StatusVerbosity.ERRORS):
     """Get current status string
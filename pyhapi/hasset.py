@@ -18,6 +18,7 @@ asset_node = hda_asset.instantiate(node_name="Processor").cook()
 """
 from . import hapi as HAPI
 from .hnode import HNode
+from .hcache import file_digest
 from ctypes import c_int32
 
 class HAsset():
@@ -41,7 +42,7 @@ class HAsset():
         self.hda_path = hdapath
         self.session = session
         self.library_id = 0
-        session.reload_asset_library(self)
+        session.load_asset_library(self)
 
 
     def instantiate(self, node_name="Node", operator_id=0):
@@ -55,9 +56,28 @@ class HAsset():
         Returns:
             HNode: Node instantiated
         """
-        node = HNode(self.session, self.asset_names[operator_id], node_name)
+        operator_name = self.asset_names[operator_id]
+        node = HNode(self.session, operator_name, node_name,\
+            parm_cache_key=self.get_parm_cache_key(operator_name))
         return node
 
+    def get_parm_cache_key(self, operator_name):
+        """Get key of an operator's param schema in session's parm cache
+
+        Args:
+            operator_name (str): Operator name in this asset
+
+        Returns:
+            (str, str): hda file content hash and operator name, \
+                None if session has no parm cache or hda file cannot be read
+        """
+        if self.session.parm_cache is None:
+            return None
+        content_hash = file_digest(self.hda_path)
+        if content_hash is None:
+            return None
+        return (content_hash, operator_name)
+
     @property
     def asset_names(self):
         return HAPI.get_available_assets(
@@ -0,0 +1,719 @@
+# -*- coding: utf-8 -*-
+"""Caches shared across nodes and sessions
+Author  : Maajor
+Email   : info@ma-yidong.com
+
+HParmSchema:
+    Decoded parameter descriptors of an operator, including parm infos,\
+        choice lists and resolved strings
+
+HParmSchemaCache:
+    A cache of HParmSchema keyed by hda file content hash and operator name,\
+        could be shared by sessions and persisted to disk
+
+HGeoCache:
+    An on-disk cache of extracted HGeo parts, keyed by content hash of hda file,\
+        operator name, param values and input geometries, evicted by LRU
+
+HBufferPool:
+    A pool of numpy arrays bucketed by size, recycling attribute buffers\
+        between extractions
+
+Example usage:
+
+import pyhapi as ph
+
+#share a parameter schema cache between all sessions in pool, persisted on close
+with ph.HParmSchemaCache("parm_cache.json") as parm_cache:
+    session_pool = ph.HSessionPool(4, parm_cache=parm_cache)
+    ...
+
+#reuse geometries of a preset cooked before
+geo_cache = ph.HGeoCache("geo_cache", max_bytes=4<<30)
+key = geo_cache.make_key("hda/FourShapes.hda", "Object/FourShapes", {"seed": 1})
+geos = geo_cache.get(key)
+if geos is None:
+    asset_node = ph.HAsset(session, "hda/FourShapes.hda").instantiate(node_name="Processor")
+    asset_node.set_param_values({"seed": 1})
+    geos = asset_node.cook().get_display_geos()
+    geo_cache.put(key, geos)
+
+#extract the same node every frame without reallocating attribute buffers
+buffer_pool = ph.HBufferPool()
+geos = asset_node.get_display_geos(buffer_pool=buffer_pool)
+...
+buffer_pool.release_geos(geos)
+"""
+import os
+import io
+import json
+import hashlib
+import logging
+import pickle
+import threading
+import weakref
+import collections
+import ctypes
+from ctypes import sizeof
+
+import numpy as np
+
+from . import hdata as HDATA
+
+__all__ = [
+    # Classes
+    'HParmSchema', 'HParmSchemaCache', 'HGeoCache', 'HBufferPool',
+    # Functions
+    'file_digest', 'canonicalize', 'canonicalize_file',
+    'content_hash', 'geo_digest'
+]
+
+_FILE_DIGESTS = {}
+_FILE_DIGESTS_LOCK = threading.Lock()
+
+
+def file_digest(file_path):
+    """Get sha1 digest of a file's content, memoized by path, size and mtime
+
+    Args:
+        file_path (str): path of file
+
+    Returns:
+        str: hex digest of file content, None if file cannot be read
+    """
+    try:
+        abs_path = os.path.abspath(file_path)
+        stat = os.stat(abs_path)
+    except OSError:
+        return None
+    key = (abs_path, stat.st_size, stat.st_mtime)
+    with _FILE_DIGESTS_LOCK:
+        digest = _FILE_DIGESTS.get(key)
+    if digest is not None:
+        return digest
+    sha = hashlib.sha1()
+    with open(abs_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+    with _FILE_DIGESTS_LOCK:
+        _FILE_DIGESTS[key] = digest
+    return digest
+
+
+def canonicalize_file(file_path):
+    """Canonical form of a file, by its absolute path and content
+
+    Args:
+        file_path (str): path of file
+
+    Returns:
+        tuple: canonical form
+    """
+    return ("file", os.path.abspath(file_path), file_digest(file_path))
+
+
+def canonicalize(value):
+    """Canonical form of a value for hashing. Dicts and sets are ordered, arrays \
+        and geometries are replaced by their content. Strings are plain values, \
+            use canonicalize_file for a path whose file content matters.
+
+    Args:
+        value: value to canonicalize
+
+    Returns:
+        canonical form of value, made of tuples and plain values
+
+    Raises:
+        pickle.PicklingError: if value contains object cannot be pickled
+    """
+    from .hgeo import HGeo
+    if isinstance(value, (bool, int, float, str, bytes)) or value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(canonicalize(v) for v in value))
+    if isinstance(value, dict):
+        return ("dict", tuple(sorted((pickle.dumps(canonicalize(k), protocol=4), canonicalize(v))\
+            for k, v in value.items())))
+    if isinstance(value, (set, frozenset)):
+        return ("set", tuple(sorted(pickle.dumps(canonicalize(v), protocol=4) for v in value)))
+    if isinstance(value, np.ndarray):
+        return ("ndarray", value.dtype.str, value.shape, np.ascontiguousarray(value).tobytes())
+    if isinstance(value, HGeo):
+        return ("geo", geo_digest([value]))
+    # other objects are compared by their pickled state
+    return ("object", type(value).__module__, type(value).__qualname__,\
+        pickle.dumps(value, protocol=4))
+
+
+def content_hash(value):
+    """Hash of a value's canonical form
+
+    Args:
+        value: value to hash
+
+    Returns:
+        str: hex digest
+    """
+    return hashlib.sha1(pickle.dumps(canonicalize(value), protocol=4)).hexdigest()
+
+
+def geo_digest(geos):
+    """Hash of geometries' content
+
+    Args:
+        geos (list(HGeo)): geometries to hash
+
+    Returns:
+        str: hex digest
+    """
+    manifest, arrays = _encode_geos(geos)
+    sha = hashlib.sha1(json.dumps(manifest, sort_keys=True).encode())
+    for name in sorted(arrays):
+        array = np.ascontiguousarray(arrays[name])
+        sha.update("{0}:{1}:{2}".format(name, array.dtype.str, array.shape).encode())
+        sha.update(array.tobytes())
+    return sha.hexdigest()
+
+
+class HBufferPool():
+    """A pool of numpy arrays bucketed by power of two element counts, \
+        recycling buffers between extractions. Arrays acquired are plain writable \
+            numpy arrays, views of a pooled 1D buffer. It is thread-safe.
+
+    Attributes:
+        max_bytes (int): max total size of free buffers kept
+        hits (int): number of acquire reused a free buffer
+        misses (int): number of acquire allocated a new buffer
+    """
+
+    def __init__(self, max_bytes=1<<30):
+        """Initialize
+
+        Args:
+            max_bytes (int, optional): max total size of free buffers kept. Defaults to 1GB.
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._free = {}
+        self._free_bytes = 0
+        # buffers handed out and not released, by id, only these are taken back
+        self._issued = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _capacity(size):
+        return 1 if size <= 1 else 1 << (int(size) - 1).bit_length()
+
+    def acquire(self, shape, dtype):
+        """Get an uninitialized array, reusing a free buffer of the same bucket if any
+
+        Args:
+            shape (tuple(int)): shape of array
+            dtype (np.dtype): dtype of array, object dtype is not pooled
+
+        Returns:
+            np.ndarray: array of shape and dtype
+        """
+        dtype = np.dtype(dtype)
+        if dtype.hasobject:
+            return np.empty(shape, dtype=dtype)
+        size = int(np.prod(shape))
+        key = (dtype.str, HBufferPool._capacity(size))
+        with self._lock:
+            free = self._free.get(key)
+            buffer = free.pop() if free else None
+            if buffer is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._free_bytes -= buffer.nbytes
+        if buffer is None:
+            buffer = np.empty(key[1], dtype=dtype)
+        with self._lock:
+            self._issued[id(buffer)] = buffer
+        return buffer[:size].reshape(shape)
+
+    def release(self, array):
+        """Return an array to pool, it should not be used afterwards
+
+        Args:
+            array (np.ndarray): array acquired from this pool
+
+        Returns:
+            bool: if its buffer is kept for reuse, False if the array is not \
+                acquired from this pool or already released
+        """
+        buffer = array
+        while isinstance(buffer.base, np.ndarray):
+            buffer = buffer.base
+        with self._lock:
+            if self._issued.get(id(buffer)) is not buffer:
+                return False
+            del self._issued[id(buffer)]
+            if self._free_bytes + buffer.nbytes > self.max_bytes:
+                return False
+            self._free.setdefault((buffer.dtype.str, buffer.size), []).append(buffer)
+            self._free_bytes += buffer.nbytes
+        return True
+
+    def release_geos(self, geos):
+        """Return attribute and topology arrays of extracted geometries to pool
+
+        Args:
+            geos (list(HGeo)): geometries extracted with this pool
+
+        Returns:
+            int: number of arrays kept for reuse
+        """
+        released = 0
+        for geo in geos or []:
+            arrays = [data for _, _, data in geo.attribs.values()]
+            arrays += [getattr(geo, "vertex_list", None), getattr(geo, "face_offsets", None)]
+            for data in arrays:
+                if isinstance(data, np.ndarray) and self.release(data):
+                    released += 1
+        return released
+
+    def stats(self):
+        """Get statistics of this pool
+
+        Returns:
+            dict(str,int): hits, misses, free buffers and their bytes
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,\
+                "buffers": sum(len(free) for free in self._free.values()),\
+                    "bytes": self._free_bytes}
+
+    def clear(self):
+        """Drop all free buffers
+        """
+        with self._lock:
+            self._free.clear()
+            self._free_bytes = 0
+
+
+# fields of HGeo not part of its data
+_GEO_SKIPPED_FIELDS = ("type_to_add_attrib", "copied_bytes", "lazy_attribs")
+
+
+def _encode_geos(geos):
+    # flatten geos into a json manifest and named plain arrays
+    index_of = {id(geo): i for i, geo in enumerate(geos)}
+    manifest, arrays = [], {}
+    for i, geo in enumerate(geos):
+        geo.fetch_attribs()
+        entry = {"class": type(geo).__name__, "fields": {}, "attribs": []}
+        for name, value in vars(geo).items():
+            if name in _GEO_SKIPPED_FIELDS:
+                continue
+            if name == "attribs":
+                for j, (key, (attrib_info, attrib_name, data)) in enumerate(value.items()):
+                    prefix = "{0}.attrib{1}".format(i, j)
+                    arrays[prefix + ".info"] = np.frombuffer(bytes(attrib_info), np.uint8)
+                    arrays[prefix] = data.astype(str) if data.dtype == object else data
+                    entry["attribs"].append([int(key[0]), key[1], attrib_name, prefix,\
+                        bool(data.dtype == object)])
+                continue
+            entry["fields"][name] = _encode_field(value, "{0}.{1}".format(i, name), arrays, index_of)
+        manifest.append(entry)
+    return manifest, arrays
+
+
+def _encode_field(value, name, arrays, index_of):# pylint: disable=too-many-return-statements
+    if isinstance(value, (bool, int, float, str)) or value is None:
+        return {"t": "v", "v": int(value) if isinstance(value, int) and\
+            not isinstance(value, bool) else value}
+    if isinstance(value, np.ndarray):
+        arrays[name] = value.astype(str) if value.dtype == object else value
+        return {"t": "a", "o": bool(value.dtype == object)}
+    if isinstance(value, ctypes.Structure):
+        arrays[name] = np.frombuffer(bytes(value), np.uint8)
+        return {"t": "s", "c": type(value).__name__}
+    if isinstance(value, ctypes.Array) and issubclass(value._type_, ctypes.Structure):
+        arrays[name] = np.frombuffer(bytes(value), np.uint8)
+        return {"t": "sa", "c": value._type_.__name__, "n": len(value)}
+    if isinstance(value, list):
+        if all(isinstance(v, np.ndarray) for v in value):
+            # ragged list of arrays, e.g. faces
+            arrays[name] = np.concatenate(value) if value else np.zeros((0,), np.int32)
+            arrays[name + ".len"] = np.array([len(v) for v in value], np.int64)
+            return {"t": "al"}
+        if all(id(v) in index_of for v in value):
+            return {"t": "g", "v": [index_of[id(v)] for v in value]}
+        if all(isinstance(v, (bool, int, float, str)) for v in value):
+            return {"t": "v", "v": list(value)}
+    raise ValueError("{0} of type {1} cannot be cached".format(name, type(value)))
+
+
+def _decode_geos(manifest, arrays):
+    from . import hgeo as HGEO
+    geos = [getattr(HGEO, entry["class"])() for entry in manifest]
+    for i, (geo, entry) in enumerate(zip(geos, manifest)):
+        for owner, key_name, attrib_name, prefix, is_object in entry["attribs"]:
+            data = arrays[prefix].astype(object) if is_object else arrays[prefix]
+            attrib_info = HDATA.AttributeInfo.from_buffer_copy(arrays[prefix + ".info"].tobytes())
+            geo.attribs[(owner, key_name)] = (attrib_info, attrib_name, data)
+        for name, field in entry["fields"].items():
+            array_name = "{0}.{1}".format(i, name)
+            kind = field["t"]
+            if kind == "v":
+                value = field["v"]
+            elif kind == "a":
+                value = arrays[array_name].astype(object) if field["o"] else arrays[array_name]
+            elif kind == "s":
+                value = getattr(HDATA, field["c"]).from_buffer_copy(arrays[array_name].tobytes())
+            elif kind == "sa":
+                value = (getattr(HDATA, field["c"]) * field["n"]).from_buffer_copy(\
+                    arrays[array_name].tobytes())
+            elif kind == "al":
+                value = np.split(arrays[array_name], np.cumsum(arrays[array_name + ".len"])[:-1])\
+                    if arrays[array_name + ".len"].size else []
+            else:
+                value = [geos[index] for index in field["v"]]
+            setattr(geo, name, value)
+    return geos
+
+
+class HParmSchema():
+    """Decoded parameter descriptors of an operator, identical for every \
+        fresh instance of that operator.
+
+    Attributes:
+        parm_infos (list(ParmInfo)): parm infos of all params
+        choice_lists (list(ParmChoiceInfo)): choice infos of all params
+        string_table (dict(int,str)): string handler to string of names, labels\
+            and choices, handlers are only meaningful as keys of this table
+    """
+
+    def __init__(self, parm_infos, choice_lists, string_table):
+        self.parm_infos = list(parm_infos)
+        self.choice_lists = list(choice_lists)
+        self.string_table = dict(string_table)
+
+    def to_dict(self):
+        """Get this schema as plain data that json could serialize
+
+        Returns:
+            dict: parm infos and choice lists as field values, and string table
+        """
+        return {
+            "parm_infos": [_struct_values(parm_info) for parm_info in self.parm_infos],
+            "choice_lists": [_struct_values(choice) for choice in self.choice_lists],
+            "string_table": [[handle, text] for handle, text in self.string_table.items()]}
+
+    @staticmethod
+    def from_dict(data):
+        """Create schema from plain data of to_dict
+
+        Args:
+            data (dict): plain data of a schema
+
+        Returns:
+            HParmSchema: schema created
+        """
+        return HParmSchema(\
+            [_struct_from_values(HDATA.ParmInfo, values) for values in data["parm_infos"]],\
+            [_struct_from_values(HDATA.ParmChoiceInfo, values) for values in data["choice_lists"]],\
+            {int(handle): str(text) for handle, text in data["string_table"]})
+
+
+def _struct_values(struct):
+    # field values in declaring order, enum fields kept as raw int
+    return [ctypes.Structure.__getattribute__(struct, name) for name, _ in struct._fields_]
+
+
+def _struct_from_values(struct_type, values):
+    if len(values) != len(struct_type._fields_):
+        raise ValueError("{0} layout changed, cached schema is stale".format(struct_type.__name__))
+    struct = struct_type()
+    for (name, _), value in zip(struct_type._fields_, values):
+        setattr(struct, name, value)
+    return struct
+
+
+def _struct_layout(struct_type):
+    return [[name, field_type.__name__] for name, field_type in struct_type._fields_]
+
+
+class HParmSchemaCache():
+    """A cache of HParmSchema keyed by (hda file content hash, operator name).\
+        It is thread-safe, so could be shared by all sessions of an HSessionPool.\
+            Schemas put are only persisted by save or close, as a json file.
+
+    Attributes:
+        path (str): json file path to persist this cache, None if only in memory
+    """
+
+    def __init__(self, path=None):
+        """Initialize, load persisted schemas if path exists
+
+        Args:
+            path (str, optional): json file path to persist this cache. Defaults to None.
+        """
+        self.path = path
+        self._schemas = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def __len__(self):
+        return len(self._schemas)
+
+    def __contains__(self, key):
+        return key in self._schemas
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def get(self, key):
+        """Get schema of an operator
+
+        Args:
+            key ((str, str)): hda file content hash and operator name
+
+        Returns:
+            HParmSchema: schema cached, None if not cached
+        """
+        with self._lock:
+            return self._schemas.get(key)
+
+    def put(self, key, schema):
+        """Put schema of an operator, it is persisted by next save
+
+        Args:
+            key ((str, str)): hda file content hash and operator name
+            schema (HParmSchema): schema to cache
+        """
+        with self._lock:
+            self._schemas[key] = schema
+            self._dirty = True
+
+    def clear(self):
+        """Clear all cached schemas
+        """
+        with self._lock:
+            self._schemas.clear()
+            self._dirty = True
+
+    def load(self):
+        """Load persisted schemas from path, a file of other layout is ignored
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("parm_info") != _struct_layout(HDATA.ParmInfo) or\
+                data.get("parm_choice_info") != _struct_layout(HDATA.ParmChoiceInfo):
+                raise ValueError("ParmInfo layout changed, cached schema is stale")
+            schemas = {tuple(entry["key"]): HParmSchema.from_dict(entry["schema"])\
+                for entry in data["schemas"]}
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            logging.warning("Cannot load parm schema cache {0}: {1}".format(self.path, error))
+            return
+        with self._lock:
+            self._schemas.update(schemas)
+
+    def save(self):
+        """Persist schemas to path, if any changed since last save
+        """
+        if self.path is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            schemas = dict(self._schemas)
+            self._dirty = False
+        data = {
+            "parm_info": _struct_layout(HDATA.ParmInfo),
+            "parm_choice_info": _struct_layout(HDATA.ParmChoiceInfo),
+            "schemas": [{"key": list(key), "schema": schema.to_dict()}\
+                for key, schema in schemas.items()]}
+        tmp_path = "{0}.{1}.tmp".format(self.path, threading.get_ident())
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        """Persist schemas put since last save, same as save
+        """
+        self.save()
+
+
+class HGeoCache():
+    """An on-disk cache of extracted HGeo parts. Each entry is a numpy .npz file\
+        named by its key, least recently used entries are evicted when total size \
+            exceeds max_bytes. It is thread-safe, so could be shared by all sessions \
+                of an HSessionPool.
+
+    Attributes:
+        path (str): directory storing cached entries
+        max_bytes (int): max total size of cached entries
+        hits (int): number of get found entry
+        misses (int): number of get not found entry
+    """
+
+    def __init__(self, path, max_bytes=1<<30):
+        """Initialize, index entries already in path
+
+        Args:
+            path (str): directory storing cached entries
+            max_bytes (int, optional): max total size of cached entries. Defaults to 1GB.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        files = []
+        for file_name in os.listdir(path):
+            if file_name.endswith(".npz"):
+                stat = os.stat(os.path.join(path, file_name))
+                files.append((stat.st_mtime, file_name[:-4], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+        self.__evict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @staticmethod
+    def make_key(hda_path, operator_name, parm_values, inputs=None):
+        """Make key of a cook result
+
+        Args:
+            hda_path (str): path of hda file
+            operator_name (str): operator name in hda cooked
+            parm_values (dict(str,value)): param values set before cook
+            inputs (list(HGeo or str), optional): input geometries or input files. \
+                Defaults to None.
+
+        Returns:
+            str: key of cook result, None if hda file cannot be read
+        """
+        hda_digest = file_digest(hda_path)
+        if hda_digest is None:
+            return None
+        inputs = [canonicalize_file(geo) if isinstance(geo, str) else geo for geo in inputs or []]
+        return content_hash(("geos", hda_digest, operator_name, parm_values, inputs))
+
+    def get(self, key):
+        """Get geometries cached
+
+        Args:
+            key (str): key of cook result
+
+        Returns:
+            list(HGeo): geometries cached, None if not cached
+        """
+        with self._lock:
+            cached = key is not None and key in self._entries
+            if cached:
+                self._entries.move_to_end(key)
+        if not cached:
+            self.__count(hit=False)
+            return None
+        file_path = self.__file_path(key)
+        try:
+            with np.load(file_path, allow_pickle=False) as npz:
+                arrays = {name: npz[name] for name in npz.files}
+            manifest = json.loads(arrays.pop("__manifest__").tobytes().decode())
+            geos = _decode_geos(manifest, arrays)
+            os.utime(file_path)
+        except (OSError, ValueError, KeyError, AttributeError) as error:
+            logging.warning("Cannot load cached geos {0}: {1}".format(file_path, error))
+            self.__remove(key)
+            self.__count(hit=False)
+            return None
+        self.__count(hit=True)
+        return geos
+
+    def put(self, key, geos):
+        """Cache geometries, evict least recently used entries if exceeds max_bytes
+
+        Args:
+            key (str): key of cook result
+            geos (list(HGeo)): geometries to cache
+
+        Returns:
+            bool: if geometries are cached
+        """
+        if key is None or geos is None:
+            return False
+        try:
+            manifest, arrays = _encode_geos(geos)
+        except ValueError as error:
+            logging.warning("Cannot cache geos: {0}".format(error))
+            return False
+        buffer = io.BytesIO()
+        np.savez(buffer, __manifest__=np.frombuffer(json.dumps(manifest).encode(), np.uint8),\
+            **arrays)
+        file_path = self.__file_path(key)
+        tmp_path = "{0}.{1}.tmp".format(file_path, threading.get_ident())
+        with open(tmp_path, "wb") as f:
+            f.write(buffer.getbuffer())
+        os.replace(tmp_path, file_path)
+        with self._lock:
+            self._total_bytes += buffer.tell() - self._entries.pop(key, 0)
+            self._entries[key] = buffer.tell()
+        self.__evict()
+        return True
+
+    def stats(self):
+        """Get statistics of this cache
+
+        Returns:
+            dict(str,int): hits, misses, entries and bytes
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,\
+                "entries": len(self._entries), "bytes": self._total_bytes}
+
+    def clear(self):
+        """Remove all cached entries
+        """
+        with self._lock:
+            keys = list(self._entries)
+        for key in keys:
+            self.__remove(key)
+
+    def __count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def __file_path(self, key):
+        return os.path.join(self.path, "{0}.npz".format(key))
+
+    def __remove(self, key):
+        with self._lock:
+            size = self._entries.pop(key, None)
+            if size is None:
+                return
+            self._total_bytes -= size
+        try:
+            os.remove(self.__file_path(key))
+        except OSError:
+            pass
+
+    def __evict(self):
+        while True:
+            with self._lock:
+                if self._total_bytes <= self.max_bytes or not self._entries:
+                    return
+                key = next(iter(self._entries))
+            self.__remove(key)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""Scheduling of cook state polling
+Author  : Maajor
+Email   : info@ma-yidong.com
+
+HCookTimeModel:
+    Observed cook durations per (operator, node, action), used to schedule\
+        cook state polling
+
+cook_poll_intervals:
+    Seconds to sleep between cook state queries, seeded by expected cook time\
+        and backing off
+
+Example usage:
+
+import pyhapi as ph
+
+#sessions share ph.hcook.COOK_TIME_MODEL by default, give a pool its own model
+session_pool = ph.HSessionPool(4)
+for session in session_pool.sessions:
+    session.cook_time_model = ph.HCookTimeModel(smoothing=0.5)
+"""
+import threading
+
+__all__ = [
+    # Classes
+    'HCookTimeModel',
+    # Functions
+    'cook_poll_intervals'
+]
+
+
+def cook_poll_intervals(max_interval, expected_time=None, min_interval=0.001, backoff=2.0):
+    """Seconds to sleep between cook state queries. It waits most of expected \
+        cook time at first, then polls from min_interval backing off to max_interval,\
+            so short cooks return in milliseconds and long ones are polled rarely.\
+                No interval exceeds max_interval, expected cook time included.
+
+    Args:
+        max_interval (float): max seconds between two queries
+        expected_time (float, optional): expected cook time in seconds. Defaults to None.
+        min_interval (float, optional): first interval of backoff. Defaults to 0.001.
+        backoff (float, optional): factor interval grows by. Defaults to 2.0.
+
+    Yields:
+        float: seconds to sleep before next query
+    """
+    if expected_time:
+        yield min(expected_time * 0.9, max_interval)
+    interval = min(min_interval, max_interval)
+    while True:
+        yield interval
+        interval = min(interval * backoff, max_interval)
+
+
+class HCookTimeModel():
+    """Observed cook durations, smoothed by exponential moving average.\
+        It is thread-safe, so could be shared by all sessions of an HSessionPool.
+
+    Attributes:
+        smoothing (float): weight of latest observation
+    """
+
+    def __init__(self, smoothing=0.3):
+        """Initialize
+
+        Args:
+            smoothing (float, optional): weight of latest observation. Defaults to 0.3.
+        """
+        self.smoothing = smoothing
+        self._durations = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._durations)
+
+    def expected(self, key):
+        """Get expected cook time
+
+        Args:
+            key (tuple): operator, node name and action cooked
+
+        Returns:
+            float: expected seconds, None if never observed
+        """
+        with self._lock:
+            return self._durations.get(key)
+
+    def record(self, key, duration):
+        """Record an observed cook time
+
+        Args:
+            key (tuple): operator, node name and action cooked
+            duration (float): seconds the cook took
+        """
+        with self._lock:
+            previous = self._durations.get(key)
+            self._durations[key] = duration if previous is None else\
+                previous + self.smoothing * (duration - previous)
+
+    def clear(self):
+        """Clear all observations
+        """
+        with self._lock:
+            self._durations.clear()
+
+
+# cook time model shared by sessions by default
+COOK_TIME_MODEL = HCookTimeModel()
@@ -444,6 +444,13 @@ NP_TYPE_TO_HSTORAGE_TYPE = {
     np.dtype('float64'): StorageType.FLOAT64,
     np.dtype('bytes_'): StorageType.STRING}
 
+HSTORAGE_TYPE_TO_NP_TYPE = {
+    StorageType.INT: np.dtype('int32'),
+    StorageType.INT64: np.dtype('int64'),
+    StorageType.FLOAT: np.dtype('float32'),
+    StorageType.FLOAT64: np.dtype('float64'),
+    StorageType.STRING: np.dtype('O')}
+
 
 class PartInfo(StructureWithEnums):
     """Equivalent of HAPI's HAPI_PartInfo
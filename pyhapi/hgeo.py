@@ -10,7 +10,10 @@ HGeo:
             handling volume data.
 
 HGeoMesh:
-    An object containing mesh data
+    An object containing mesh data, topology as a flat vertex list with face offsets
+
+HFaceList:
+    Lazy per face access to a mesh whose faces differ in size
 
 HGeoCurve:
     An object containing curve data
@@ -50,13 +53,53 @@ geo_inputnode.set_geometry(cube_geo)
 """
 import numpy as np
 import logging
+import fnmatch
 import functools
-import operator
+import itertools
+import collections.abc
 from ctypes import c_float
 
 from . import hdata as HDATA
 from . import hapi as HAPI
 
+
+def _count_copied_bytes(func):
+    # record bytes a commit_to_node copied, outermost call of super chain wins
+    @functools.wraps(func)
+    def wrapper(self, session, node_id):
+        start = HAPI.copied_bytes()
+        try:
+            return func(self, session, node_id)
+        finally:
+            self.copied_bytes = HAPI.copied_bytes() - start
+    return wrapper
+
+
+def _attrib_matches(patterns, attrib_type, name):
+    # pattern is a glob of names, or (AttributeOwner, glob) to match one owner only
+    for pattern in patterns:
+        owner, glob = pattern if isinstance(pattern, tuple) else (None, pattern)
+        if (owner is None or owner == attrib_type) and fnmatch.fnmatchcase(name, glob):
+            return True
+    return False
+
+
+def _owner_skipped(include, exclude, attrib_type):
+    # no attribute of this owner could be extracted, skip listing its names
+    if include is not None and not any(not isinstance(pattern, tuple) or pattern[0] == attrib_type\
+        for pattern in include):
+        return True
+    return exclude is not None and (attrib_type, "*") in exclude
+
+
+def _fetch_attrib(session, node_id, part_id, attrib_name, attrib_info, dest, buffer_pool):# pylint: disable=too-many-arguments
+    if dest is None and buffer_pool is not None:
+        dest = buffer_pool.acquire((attrib_info.count, attrib_info.tupleSize),\
+            HDATA.HSTORAGE_TYPE_TO_NP_TYPE[attrib_info.storage])
+    return HAPI.STORAGE_TYPE_TO_GET_ATTRIB[attrib_info.storage](
+        session.hapi_session, node_id, part_id, attrib_name, attrib_info, dest)
+
+
 class HGeo():
 
     """An base class for houdini engine's geometry, including shared operation\
@@ -72,8 +115,12 @@ class HGeo():
         detail_count (int): number of details in this geo, should be 1
         attribs (dict((int,str),(AttributeInfo,str,np.ndarray)): attribute's name\
             to attribute's actual data
+        lazy_attribs (dict((int,str),(AttributeInfo,str,func)): attributes listed by \
+            a lazy extraction whose data is not fetched yet, to the function fetching it
         type_to_add_attrib (dict(int,func)): attribute's type to the function to \
             set the attribute data into hengine
+        copied_bytes (int): bytes the last commit_to_node copied to make arrays \
+            contiguous and in HAPI's dtype, 0 if all arrays are passed as they are
     """
 
     def __init__(self):
@@ -83,6 +130,8 @@ class HGeo():
         self.face_count = 0
         self.detail_count = 1
         self.attribs = {}
+        self.lazy_attribs = {}
+        self.copied_bytes = 0
 
         self.type_to_add_attrib = {
             HDATA.AttributeOwner.VERTEX: self.add_vertex_attrib,
@@ -211,13 +260,30 @@ class HGeo():
             name (str): Name of querying attribute
 
         Returns:
-            ndarray(,): Data of querying attribute
+            ndarray(,): Data of querying attribute, fetched now if listed by a lazy extraction
         """
+        if (attrib_type, name) in self.lazy_attribs:
+            self.fetch_attribs([(attrib_type, name)])
         if (attrib_type, name) in self.attribs:
             _, _, data = self.attribs[(attrib_type, name)]
             return data
         return None
 
+    def fetch_attribs(self, keys=None):
+        """Fetch data of attributes listed by a lazy extraction, \
+            the node extracted from should not be cooked or deleted since
+
+        Args:
+            keys (list((AttributeOwner,str)), optional): attributes to fetch, \
+                by type and name. Defaults to None, all not fetched yet.
+        """
+        for key in list(self.lazy_attribs.keys()) if keys is None else keys:
+            if key not in self.lazy_attribs:
+                continue
+            attrib_info, attrib_name, fetch = self.lazy_attribs[key]
+            self.attribs[key] = (attrib_info, attrib_name, fetch())
+            del self.lazy_attribs[key]
+
     def get_attrib_tuple_size(self, attrib_type, name):
         """Get attribute data of certain type and name
 
@@ -228,9 +294,9 @@ class HGeo():
         Returns:
             ndarray(,): Data of querying attribute
         """
-        if (attrib_type, name) in self.attribs:
-            attrib_info, _, data = self.attribs[(attrib_type, name)]
-            return attrib_info.tupleSize
+        entry = self.attribs.get((attrib_type, name)) or self.lazy_attribs.get((attrib_type, name))
+        if entry is not None:
+            return entry[0].tupleSize
         return None
 
     def get_attrib_data_storage_type(self, attrib_type, name):
@@ -243,9 +309,9 @@ class HGeo():
         Returns:
             ndarray(,): Data of querying attribute
         """
-        if (attrib_type, name) in self.attribs:
-            attrib_info, _, data = self.attribs[(attrib_type, name)]
-            return attrib_info.storage
+        entry = self.attribs.get((attrib_type, name)) or self.lazy_attribs.get((attrib_type, name))
+        if entry is not None:
+            return entry[0].storage
         return None
 
     def get_attrib_names(self):
@@ -255,11 +321,12 @@ class HGeo():
             list((str,AttributeOwner)): All attributes containing in this geo
         """
         attrib_names = []
-        for k, _ in self.attribs.items():
+        for k in list(self.attribs.keys()) + list(self.lazy_attribs.keys()):
             attrib_type, name = k
             attrib_names.append([name, HDATA.AttributeOwner(attrib_type)])
         return attrib_names
 
+    @_count_copied_bytes
     def commit_to_node(self, session, node_id):
         """Set this geo into hengine's node
 
@@ -267,6 +334,7 @@ class HGeo():
             session (int64): The session of Houdini you are interacting with.
             node_id (int): The node to add geo.
         """
+        self.fetch_attribs()
         HAPI.set_part_info(session.hapi_session, node_id, self.part_info)
 
         for attrib_info, name, data in self.attribs.values():
@@ -274,7 +342,8 @@ class HGeo():
             HAPI.STORAGE_TYPE_TO_SET_ATTRIB[attrib_info.storage](
                 session.hapi_session, node_id, name, attrib_info, data)
 
-    def extract_from_sop(self, session, part_info, node_id, part_id=0):
+    def extract_from_sop(self, session, part_info, node_id, part_id=0, out=None, buffer_pool=None,# pylint: disable=too-many-arguments
+                         include=None, exclude=None, lazy=False):
         """Extract geometry from sop
 
         Args:
@@ -282,6 +351,17 @@ class HGeo():
             part_info (PartInfo): The info of part
             node_id (int): The node to add geo.
             part_id (int): Part id. Default to 0
+            out (dict((AttributeOwner,str),np.ndarray), optional): arrays attributes are \
+                written into, by attribute type and name. Defaults to None.
+            buffer_pool (HBufferPool, optional): pool numeric attributes not in out \
+                are acquired from. Defaults to None, allocate new arrays.
+            include (list(str or (AttributeOwner,str)), optional): only extract attributes \
+                matching one of these name globs, a glob in a tuple matches attributes \
+                    of that type only. Defaults to None, all attributes.
+            exclude (list(str or (AttributeOwner,str)), optional): do not extract attributes \
+                matching one of these, same form as include. Defaults to None.
+            lazy (bool, optional): only list attributes, their data is fetched on \
+                get_attrib_data or fetch_attribs. Defaults to False.
         """
         self.part_info = part_info
         self.point_count = part_info.pointCount
@@ -290,6 +370,8 @@ class HGeo():
 
         #Fill attributes
         for attrib_type in range(0, HDATA.AttributeOwner.MAX):
+            if _owner_skipped(include, exclude, attrib_type):
+                continue
             attrib_names = HAPI.get_attribute_names(
                 session.hapi_session,
                 node_id,
@@ -297,13 +379,20 @@ class HGeo():
                 attrib_type)
             for attrib_name in attrib_names:
                 # do not extract private data
-                if not attrib_name.startswith("__"):
-                    attrib_info = HAPI.get_attribute_info(
-                        session.hapi_session, node_id, part_id, attrib_name, attrib_type)
-                    data = HAPI.STORAGE_TYPE_TO_GET_ATTRIB[attrib_info.storage](
-                        session.hapi_session, node_id, part_id, attrib_name, attrib_info)
+                if attrib_name.startswith("__") or\
+                    (include is not None and not _attrib_matches(include, attrib_type, attrib_name)) or\
+                        (exclude is not None and _attrib_matches(exclude, attrib_type, attrib_name)):
+                    continue
+                attrib_info = HAPI.get_attribute_info(
+                    session.hapi_session, node_id, part_id, attrib_name, attrib_type)
+                fetch = functools.partial(_fetch_attrib, session, node_id, part_id, attrib_name,\
+                    attrib_info, out.get((attrib_type, attrib_name)) if out is not None else None,\
+                        buffer_pool)
+                if lazy:
+                    self.lazy_attribs[(attrib_type, attrib_name)] = (attrib_info, attrib_name, fetch)
+                else:
                     self.attribs[(attrib_type, attrib_name)] = (
-                        attrib_info, attrib_name, data)
+                        attrib_info, attrib_name, fetch())
 
 class HGeoInstancer(HGeo):
     def __init__(self):
@@ -311,47 +400,220 @@ class HGeoInstancer(HGeo):
         self.instanced_geos = []
         self.transforms = []
 
+def _ragged_topology(faces):
+    # flat vertex list and face offsets of a list of faces, one linear pass over vertices
+    counts = np.fromiter((len(face) for face in faces), dtype=np.int64, count=len(faces))
+    face_offsets = np.zeros(counts.shape[0] + 1, dtype=np.int64)
+    np.cumsum(counts, out=face_offsets[1:])
+    vertex_list = np.fromiter(itertools.chain.from_iterable(faces), dtype=np.int32,\
+        count=int(face_offsets[-1]))
+    return vertex_list, face_offsets
+
+
+class HFaceList(collections.abc.Sequence):
+    """Faces of a mesh with faces of different sizes, read lazily from \
+        its flat vertex list and face offsets. Each face is a view of the vertex list.
+
+    Attributes:
+        vertex_list (np.ndarray): point index of each vertex, 1D
+        face_offsets (np.ndarray): start of each face in vertex_list, \
+            with the vertex count appended, 1D of face count + 1
+    """
+
+    def __init__(self, vertex_list, face_offsets):
+        self.vertex_list = vertex_list
+        self.face_offsets = face_offsets
+
+    def __len__(self):
+        return self.face_offsets.shape[0] - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("face index out of range")
+        return self.vertex_list[self.face_offsets[index]:self.face_offsets[index + 1]]
+
+    def tolist(self):
+        """Convert to python lists
+
+        Returns:
+            list(list(int)): point indices of each face
+        """
+        return [face.tolist() for face in self]
+
+
 class HGeoMesh(HGeo):
 
-    """A class representing hengine's mesh geometry
+    """A class representing hengine's mesh geometry. Topology is kept as a flat \
+        vertex list with the start of each face in it, and when all faces have \
+            the same size, as that size instead of offsets.
 
     Attributes:
-        faces (np.ndarray): Faces data, should be in 2D such as\
-                (face_count, vertex_each_face).
+        vertex_list (np.ndarray): point index of each vertex, face after face, 1D int32
+        face_size (int): number of vertices of every face, None if faces differ in size
+        face_offsets (np.ndarray): start of each face in vertex_list, with vertex_count \
+            appended, 1D int64 of face_count + 1. None if face_size is set.
     """
 
-    def __init__(self, vertices=None, faces=None):
+    def __init__(self, vertices=None, faces=None, vertex_list=None, face_offsets=None):
         """Initialize
 
         Args:
             vertices (np.ndarray, optional): Verticed data, should be 2D:\
                 (pount_count, 3). Defaults to None.
-            faces (np.ndarray, optional): Faces data, should be in 2D such as\
-                (face_count, vertex_each_face). Defaults to None.
+            faces (np.ndarray or list(list(int)), optional): Faces data, in 2D such as\
+                (face_count, vertex_each_face), or a list of faces of different sizes. \
+                    Defaults to None.
+            vertex_list (np.ndarray, optional): Flat point index of each vertex, \
+                used with face_offsets instead of faces. Defaults to None.
+            face_offsets (np.ndarray, optional): Start of each face in vertex_list \
+                with vertex count appended. Defaults to None.
         """
         super(HGeoMesh, self).__init__()
+        self.vertex_list = np.zeros((0,), dtype=np.int32)
+        self.face_size = 0
+        self.face_offsets = None
         if isinstance(vertices, np.ndarray):
             self.point_count = vertices.shape[0]
 
-            if isinstance(faces, np.ndarray):            
-                self.face_count = faces.shape[0]                
+            if vertex_list is not None:
+                self.set_topology(vertex_list, face_offsets)
+            elif faces is not None:
                 self.faces = faces
-                self.vertex_count = faces.flatten().shape[0]     
-            elif type(faces) is list:
-                self.face_count = len(faces)
-                self.faces = faces
-                self.vertices = np.array(functools.reduce(operator.concat, faces), dtype=np.int32)
-                self.vertex_count = self.vertices.shape[0]
-                self.face_counts = np.array([len(face) for face in self.faces], dtype=np.int32)
 
-            self.part_info.vertexCount = self.vertex_count
             self.part_info.pointCount = self.point_count
-            self.part_info.faceCount = self.face_count
             self.part_info.type = HDATA.PartType.MESH
             self.add_attrib(HDATA.AttributeOwner.POINT, "P", vertices)
 
+    @staticmethod
+    def from_face_counts(vertices, vertex_list, face_counts):
+        """Create a mesh of polygons of any size from a flat vertex list \
+            and the number of vertices of each face
+
+        Args:
+            vertices (np.ndarray): Position of points, (point_count, 3)
+            vertex_list (np.ndarray): point index of each vertex, face after face
+            face_counts (np.ndarray): number of vertices of each face
+
+        Returns:
+            HGeoMesh: mesh
+        """
+        face_counts = np.asarray(face_counts, dtype=np.int64).reshape(-1)
+        face_offsets = np.zeros(face_counts.shape[0] + 1, dtype=np.int64)
+        np.cumsum(face_counts, out=face_offsets[1:])
+        return HGeoMesh(vertices, vertex_list=vertex_list, face_offsets=face_offsets)
+
+    @staticmethod
+    def from_ragged(vertices, faces):
+        """Create a mesh of polygons of any size from a list of faces, \
+            in one pass over their vertices
+
+        Args:
+            vertices (np.ndarray): Position of points, (point_count, 3)
+            faces (list(list(int))): point indices of each face
+
+        Returns:
+            HGeoMesh: mesh
+        """
+        vertex_list, face_offsets = _ragged_topology(faces)
+        return HGeoMesh(vertices, vertex_list=vertex_list, face_offsets=face_offsets)
+
+    @staticmethod
+    def from_polygon_arrays(vertices, *face_arrays):
+        """Create a mesh from arrays of faces of one size each, such as \
+            a triangle and a quad array. Faces are ordered as arrays are given.
+
+        Args:
+            vertices (np.ndarray): Position of points, (point_count, 3)
+            face_arrays (np.ndarray): faces of (face_count, vertex_each_face) each
+
+        Returns:
+            HGeoMesh: mesh
+        """
+        face_arrays = [np.asarray(faces, dtype=np.int32) for faces in face_arrays\
+            if faces is not None and len(faces)]
+        if len(face_arrays) == 1:
+            return HGeoMesh(vertices, face_arrays[0])
+        vertex_list = np.concatenate([faces.reshape(-1) for faces in face_arrays])\
+            if face_arrays else np.zeros((0,), dtype=np.int32)
+        face_counts = np.concatenate([np.full(faces.shape[0], faces.shape[1], dtype=np.int64)\
+            for faces in face_arrays]) if face_arrays else np.zeros((0,), dtype=np.int64)
+        return HGeoMesh.from_face_counts(vertices, vertex_list, face_counts)
+
+    def set_topology(self, vertex_list, face_offsets=None, face_size=None):
+        """Set faces as a flat vertex list and either face offsets or one face size
+
+        Args:
+            vertex_list (np.ndarray): point index of each vertex, face after face
+            face_offsets (np.ndarray, optional): start of each face in vertex_list, \
+                with vertex count appended. Defaults to None.
+            face_size (int, optional): number of vertices of every face, \
+                used if face_offsets is None. Defaults to None, a single face.
+        """
+        self.vertex_list = HAPI._contiguous(vertex_list, np.int32)# pylint: disable=protected-access
+        self.vertex_count = self.vertex_list.shape[0]
+        if face_offsets is not None:
+            face_offsets = HAPI._contiguous(face_offsets, np.int64)# pylint: disable=protected-access
+            assert face_offsets.shape[0] >= 1 and face_offsets[0] == 0\
+                and face_offsets[-1] == self.vertex_count,\
+                    "face_offsets should start at 0 and end at vertex count"
+            counts = np.diff(face_offsets)
+            if counts.size and counts[0] > 0 and (counts == counts[0]).all():
+                face_size = int(counts[0])
+                face_offsets = None
+            elif not counts.size:
+                face_size = 0
+                face_offsets = None
+        elif face_size is None:
+            face_size = self.vertex_count
+        self.face_size = face_size if face_offsets is None else None
+        self.face_offsets = face_offsets
+        if face_offsets is not None:
+            self.face_count = face_offsets.shape[0] - 1
+        else:
+            self.face_count = self.vertex_count // face_size if face_size else 0
+        self.part_info.vertexCount = self.vertex_count
+        self.part_info.faceCount = self.face_count
 
-    def extract_from_sop(self, session, part_info, node_id, part_id=0):
+    def get_face_offsets(self):
+        """Start of each face in vertex_list, with vertex_count appended
+
+        Returns:
+            np.ndarray: 1D int64 array of face_count + 1
+        """
+        if self.face_offsets is not None:
+            return self.face_offsets
+        return np.arange(self.face_count + 1, dtype=np.int64) * self.face_size
+
+    @property
+    def face_counts(self):
+        """np.ndarray: number of vertices of each face, 1D int32"""
+        if self.face_offsets is not None:
+            return np.diff(self.face_offsets).astype(np.int32)
+        return np.full(self.face_count, self.face_size, dtype=np.int32)
+
+    @property
+    def faces(self):
+        """np.ndarray or HFaceList: (face_count, face_size) view of vertex_list \
+            when all faces have the same size, otherwise faces read lazily"""
+        if self.face_offsets is None:
+            return self.vertex_list.reshape(self.face_count, self.face_size)
+        return HFaceList(self.vertex_list, self.face_offsets)
+
+    @faces.setter
+    def faces(self, faces):
+        if isinstance(faces, HFaceList):
+            self.set_topology(faces.vertex_list, faces.face_offsets)
+        elif isinstance(faces, np.ndarray) and faces.ndim == 2:
+            self.set_topology(faces, face_size=faces.shape[1])
+        else:
+            self.set_topology(*_ragged_topology(faces))
+
+    def extract_from_sop(self, session, part_info, node_id, part_id=0, out=None, buffer_pool=None,# pylint: disable=too-many-arguments
+                         include=None, exclude=None, lazy=False):
         """Extract mesh from sop
 
         Args:
@@ -359,11 +621,39 @@ class HGeoMesh(HGeo):
             part_info (PartInfo): The info of part
             node_id (int): The node to add geo.
             part_id (int): Part id. Default to 0
+            out (dict((AttributeOwner,str),np.ndarray), optional): arrays attributes are \
+                written into, by attribute type and name. Defaults to None.
+            buffer_pool (HBufferPool, optional): pool numeric attributes not in out \
+                and topology are acquired from. Defaults to None, allocate new arrays.
+            include (list(str or (AttributeOwner,str)), optional): only extract attributes \
+                matching one of these name globs. Defaults to None, all attributes.
+            exclude (list(str or (AttributeOwner,str)), optional): do not extract attributes \
+                matching one of these. Defaults to None.
+            lazy (bool, optional): only list attributes, fetch their data on first access. \
+                Defaults to False.
         """
-        super().extract_from_sop(session, part_info, node_id, part_id)
-
-        self.faces = HAPI.get_faces(session.hapi_session, node_id, part_info)
-
+        super().extract_from_sop(session, part_info, node_id, part_id, out, buffer_pool,\
+            include, exclude, lazy)
+
+        def acquire(shape, dtype):
+            if buffer_pool is None:
+                return np.empty(shape, dtype=dtype)
+            return buffer_pool.acquire(shape, dtype)
+
+        vertex_list = HAPI.get_vertex_list(session.hapi_session, node_id, part_info,\
+            out=acquire((part_info.vertexCount,), np.int32))
+        face_counts = HAPI.get_face_counts(session.hapi_session, node_id, part_info,\
+            out=acquire((part_info.faceCount,), np.int32))
+        face_offsets = acquire((part_info.faceCount + 1,), np.int64)
+        face_offsets[0] = 0
+        np.cumsum(face_counts, out=face_offsets[1:])
+        self.set_topology(vertex_list, face_offsets)
+        if buffer_pool is not None:
+            buffer_pool.release(face_counts)
+            if self.face_offsets is None:
+                buffer_pool.release(face_offsets)
+
+    @_count_copied_bytes
     def commit_to_node(self, session, node_id):
         """Set this geo into hengine's node
 
@@ -373,13 +663,8 @@ class HGeoMesh(HGeo):
         """
         super().commit_to_node(session, node_id)
 
-        if type(self.faces) is list:
-            HAPI.set_vertex_list(session.hapi_session, node_id, self.vertices)
-            HAPI.set_face_counts(session.hapi_session, node_id, self.face_counts)
-        else:
-            HAPI.set_vertex_list(session.hapi_session, node_id, self.faces)
-            HAPI.set_face_counts(session.hapi_session, node_id, \
-                np.array([len(face) for face in self.faces]))
+        HAPI.set_vertex_list(session.hapi_session, node_id, self.vertex_list)
+        HAPI.set_face_counts(session.hapi_session, node_id, self.face_counts)
         HAPI.commit_geo(session.hapi_session, node_id)
 
 
@@ -430,6 +715,7 @@ class HGeoCurve(HGeo):
             #self.AddPointAttrib("P", vertices)
             self.add_attrib(HDATA.AttributeOwner.POINT, "P", vertices)
 
+    @_count_copied_bytes
     def commit_to_node(self, session, node_id):
         """Set this geo into hengine's node
 
@@ -447,7 +733,8 @@ class HGeoCurve(HGeo):
 
         HAPI.commit_geo(session.hapi_session, node_id)
 
-    def extract_from_sop(self, session, part_info, node_id, part_id=0):
+    def extract_from_sop(self, session, part_info, node_id, part_id=0, out=None, buffer_pool=None,# pylint: disable=too-many-arguments
+                         include=None, exclude=None, lazy=False):
         """Extract curve from sop
 
         Args:
@@ -455,8 +742,19 @@ class HGeoCurve(HGeo):
             part_info (PartInfo): The info of part
             node_id (int): The node to add geo.
             part_id (int): Part id. Default to 0
+            out (dict((AttributeOwner,str),np.ndarray), optional): arrays attributes are \
+                written into, by attribute type and name. Defaults to None.
+            buffer_pool (HBufferPool, optional): pool numeric attributes not in out \
+                are acquired from. Defaults to None, allocate new arrays.
+            include (list(str or (AttributeOwner,str)), optional): only extract attributes \
+                matching one of these name globs. Defaults to None, all attributes.
+            exclude (list(str or (AttributeOwner,str)), optional): do not extract attributes \
+                matching one of these. Defaults to None.
+            lazy (bool, optional): only list attributes, fetch their data on first access. \
+                Defaults to False.
         """
-        super().extract_from_sop(session, part_info, node_id, part_id)
+        super().extract_from_sop(session, part_info, node_id, part_id, out, buffer_pool,\
+            include, exclude, lazy)
         self.curve_info = HAPI.get_curve_info(session.hapi_session, node_id, part_info.id)
         self.point_count = self.curve_info.vertexCount
         self.vertex_count = self.curve_info.vertexCount
@@ -485,7 +783,8 @@ class HGeoVolume(HGeo):
         """
         super(HGeoVolume, self).__init__()
 
-    def extract_from_sop(self, session, part_info, node_id, part_id=0):
+    def extract_from_sop(self, session, part_info, node_id, part_id=0, out=None, buffer_pool=None,# pylint: disable=too-many-arguments
+                         include=None, exclude=None, lazy=False):
         """Extract mesh from sop
 
         Args:
@@ -493,9 +792,21 @@ class HGeoVolume(HGeo):
             part_info (PartInfo): The info of part
             node_id (int): The node to add geo.
             part_id (int): Part id. Default to 0
+            out (dict((AttributeOwner,str),np.ndarray), optional): arrays attributes are \
+                written into, by attribute type and name. Defaults to None.
+            buffer_pool (HBufferPool, optional): pool numeric attributes not in out \
+                are acquired from. Defaults to None, allocate new arrays.
+            include (list(str or (AttributeOwner,str)), optional): only extract attributes \
+                matching one of these name globs. Defaults to None, all attributes.
+            exclude (list(str or (AttributeOwner,str)), optional): do not extract attributes \
+                matching one of these. Defaults to None.
+            lazy (bool, optional): only list attributes, fetch their data on first access. \
+                Defaults to False.
         """
-        super().extract_from_sop(session, part_info, node_id, part_id)
+        super().extract_from_sop(session, part_info, node_id, part_id, out, buffer_pool,\
+            include, exclude, lazy)
 
+    @_count_copied_bytes
     def commit_to_node(self, session, node_id):
         """Set this geo into hengine's node
 
@@ -554,7 +865,8 @@ class HGeoHeightfield(HGeo):
                 self.volume_info.transform = tr
                 self.transform = tr
 
-    def extract_from_sop(self, session, part_info, node_id, part_id=0):
+    def extract_from_sop(self, session, part_info, node_id, part_id=0, out=None, buffer_pool=None,# pylint: disable=too-many-arguments
+                         include=None, exclude=None, lazy=False):
         """Extract mesh from sop
 
         Args:
@@ -562,8 +874,19 @@ class HGeoHeightfield(HGeo):
             part_info (PartInfo): The info of part
             node_id (int): The node to add geo.
             part_id (int): Part id. Default to 0
+            out (dict((AttributeOwner,str),np.ndarray), optional): arrays attributes are \
+                written into, by attribute type and name. Defaults to None.
+            buffer_pool (HBufferPool, optional): pool numeric attributes not in out \
+                are acquired from. Defaults to None, allocate new arrays.
+            include (list(str or (AttributeOwner,str)), optional): only extract attributes \
+                matching one of these name globs. Defaults to None, all attributes.
+            exclude (list(str or (AttributeOwner,str)), optional): do not extract attributes \
+                matching one of these. Defaults to None.
+            lazy (bool, optional): only list attributes, fetch their data on first access. \
+                Defaults to False.
         """
-        super().extract_from_sop(session, part_info, node_id, part_id)
+        super().extract_from_sop(session, part_info, node_id, part_id, out, buffer_pool,\
+            include, exclude, lazy)
         self.volume_info = HAPI.get_volume_info(session.hapi_session, node_id, part_id)
         self.xsize = self.volume_info.xLength
         self.ysize = self.volume_info.yLength
@@ -573,6 +896,7 @@ class HGeoHeightfield(HGeo):
             node_id, part_id, self.volume_info)
         self.volume_name = HAPI.get_string(session.hapi_session, self.volume_info.nameSH)
 
+    @_count_copied_bytes
     def commit_to_node(self, session, node_id):
         """Set this geo into hengine's node
 
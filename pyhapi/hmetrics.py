@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""Latency instrumentation of session tasks
+Author  : Maajor
+Email   : info@ma-yidong.com
+
+HTaskMetrics:
+    Spans of time one task spent in each stage, such as queue wait, library\
+        load, parm set, cook, extraction and session reset
+
+HMetricsSink:
+    Base class of sinks receiving HTaskMetrics of finished tasks
+
+HMetricsCollector:
+    A sink aggregating spans into histograms, exporting Prometheus text or JSON
+
+Example usage:
+
+import pyhapi as ph
+
+collector = ph.HMetricsCollector()
+session_pool = ph.HSessionPool(4, metrics_sink=collector)
+...
+print(collector.to_prometheus())
+"""
+import time
+import json
+import bisect
+import asyncio
+import logging
+import functools
+import threading
+import contextlib
+import collections
+
+__all__ = [
+    # Classes
+    'HTaskMetrics', 'HMetricsSink', 'HMetricsCollector',
+    # Functions
+    'task_span', 'node_span', 'record_task_metrics'
+]
+
+# stages of a task
+SPAN_QUEUE_WAIT = "queue_wait"
+SPAN_LOAD_LIBRARY = "load_library"
+SPAN_SET_PARMS = "set_parms"
+SPAN_COOK = "cook"
+SPAN_EXTRACT = "extract"
+SPAN_RESET = "reset"
+SPAN_RUN = "run"
+
+
+class HTaskMetrics():
+    """Spans of time one task spent in each stage
+
+    Attributes:
+        task_name (str): name of task function
+        session_id (str): pipe name of session running the task
+        spans (dict(str,float)): stage name to seconds, stages could repeat \
+            in a task and are summed
+        asset_spans (dict((str,str),float)): (stage name, asset name) to seconds
+        asset_names (list(str)): assets touched by the task
+        status (str): "ok", "error", "timeout" or "cancelled"
+        start_time (float): time.time() when the task is enqueued
+    """
+
+    def __init__(self, task_name, session_id, start_time=None):
+        self.task_name = task_name
+        self.session_id = session_id
+        self.spans = {}
+        self.asset_spans = {}
+        self.asset_names = []
+        self.status = "ok"
+        self.start_time = time.time() if start_time is None else start_time
+
+    def add_span(self, name, seconds, asset=None):
+        """Add time spent in a stage
+
+        Args:
+            name (str): stage name
+            seconds (float): seconds spent
+            asset (str, optional): asset name of this stage. Defaults to None.
+        """
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+        if asset:
+            key = (name, asset)
+            self.asset_spans[key] = self.asset_spans.get(key, 0.0) + seconds
+            if asset not in self.asset_names:
+                self.asset_names.append(asset)
+
+    def to_dict(self):
+        """Convert to a json serializable dict
+
+        Returns:
+            dict: metrics of this task
+        """
+        return {
+            "task": self.task_name,
+            "session": self.session_id,
+            "status": self.status,
+            "start_time": self.start_time,
+            "assets": list(self.asset_names),
+            "spans": dict(self.spans),
+            "asset_spans": [{"span": name, "asset": asset, "seconds": seconds}\
+                for (name, asset), seconds in self.asset_spans.items()]}
+
+
+@contextlib.contextmanager
+def task_span(session, name, asset=None):
+    """Time a stage of the task running on a session, it does nothing if \
+        the session is not running an instrumented task
+
+    Args:
+        session (HSession): session running the task
+        name (str): stage name
+        asset (str, optional): asset name of this stage. Defaults to None.
+    """
+    metrics = getattr(session, "task_metrics", None)
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_span(name, time.perf_counter() - start, asset)
+
+
+def node_span(name):
+    """Decorator timing a method of HNodeBase as a stage of the task running \
+        on node's session, attributed to node's operator
+
+    Args:
+        name (str): stage name
+    """
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                with task_span(self.session, name, self.operator_name or self.name):
+                    return await func(self, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with task_span(self.session, name, self.operator_name or self.name):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class HMetricsSink():
+    """Base class of sinks receiving metrics of finished tasks, \
+        override record to forward them to a monitoring system
+    """
+
+    def record(self, metrics):
+        """Receive metrics of a finished task
+
+        Args:
+            metrics (HTaskMetrics): metrics of the task
+        """
+        raise NotImplementedError
+
+
+class HMetricsCollector(HMetricsSink):
+    """A sink aggregating spans into histograms by stage and asset. \
+        It is thread-safe.
+
+    Attributes:
+        buckets (list(float)): upper bounds of histogram buckets in seconds
+        recent (collections.deque(HTaskMetrics)): metrics of latest tasks
+    """
+
+    DEFAULT_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0]
+
+    def __init__(self, buckets=None, keep_recent=100):
+        """Initialize
+
+        Args:
+            buckets (list(float), optional): upper bounds of histogram buckets \
+                in seconds. Defaults to DEFAULT_BUCKETS.
+            keep_recent (int, optional): number of latest task metrics kept. Defaults to 100.
+        """
+        self.buckets = sorted(buckets or HMetricsCollector.DEFAULT_BUCKETS)
+        self.recent = collections.deque(maxlen=keep_recent)
+        self._histograms = {}
+        self._task_counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, metrics):
+        """Aggregate metrics of a finished task
+
+        Args:
+            metrics (HTaskMetrics): metrics of the task
+        """
+        with self._lock:
+            self.recent.append(metrics)
+            count_key = (metrics.task_name, metrics.session_id, metrics.status)
+            self._task_counts[count_key] = self._task_counts.get(count_key, 0) + 1
+            attributed = {}
+            for (name, asset), seconds in metrics.asset_spans.items():
+                self.__observe((name, asset), seconds)
+                attributed[name] = attributed.get(name, 0.0) + seconds
+            for name, seconds in metrics.spans.items():
+                # part of a stage not attributed to any asset
+                rest = seconds - attributed.get(name, 0.0)
+                if name not in attributed or rest > 1e-9:
+                    self.__observe((name, ""), rest)
+
+    def __observe(self, key, seconds):
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect.bisect_left(self.buckets, seconds)
+        if index < len(self.buckets):
+            histogram[0][index] += 1
+        histogram[1] += seconds
+        histogram[2] += 1
+
+    def to_prometheus(self, prefix="pyhapi"):
+        """Export in Prometheus text exposition format
+
+        Args:
+            prefix (str, optional): prefix of metric names. Defaults to "pyhapi".
+
+        Returns:
+            str: metrics text
+        """
+        lines = ["# HELP {0}_task_span_seconds Seconds session tasks spent in each stage".format(prefix),
+                 "# TYPE {0}_task_span_seconds histogram".format(prefix)]
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            task_counts = sorted(self._task_counts.items())
+        for (name, asset), (counts, total, count) in histograms:
+            labels = 'span="{0}",asset="{1}"'.format(_escape_label(name), _escape_label(asset))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append('{0}_task_span_seconds_bucket{{{1},le="{2}"}} {3}'.format(\
+                    prefix, labels, bound, cumulative))
+            lines.append('{0}_task_span_seconds_bucket{{{1},le="+Inf"}} {2}'.format(prefix, labels, count))
+            lines.append('{0}_task_span_seconds_sum{{{1}}} {2}'.format(prefix, labels, total))
+            lines.append('{0}_task_span_seconds_count{{{1}}} {2}'.format(prefix, labels, count))
+        lines.append("# HELP {0}_tasks_total Session tasks finished".format(prefix))
+        lines.append("# TYPE {0}_tasks_total counter".format(prefix))
+        for (task_name, session_id, status), count in task_counts:
+            lines.append('{0}_tasks_total{{task="{1}",session="{2}",status="{3}"}} {4}'.format(\
+                prefix, _escape_label(task_name), _escape_label(session_id),\
+                    _escape_label(status), count))
+        return "\n".join(lines) + "\n"
+
+    def to_json(self, include_recent=True):
+        """Export as json
+
+        Args:
+            include_recent (bool, optional): include metrics of latest tasks. Defaults to True.
+
+        Returns:
+            str: metrics json
+        """
+        with self._lock:
+            data = {
+                "buckets": self.buckets,
+                "spans": [{"span": name, "asset": asset, "bucket_counts": list(counts),\
+                    "sum": total, "count": count}\
+                        for (name, asset), (counts, total, count) in sorted(self._histograms.items())],
+                "tasks": [{"task": task_name, "session": session_id, "status": status, "count": count}\
+                    for (task_name, session_id, status), count in sorted(self._task_counts.items())]}
+            if include_recent:
+                data["recent"] = [metrics.to_dict() for metrics in self.recent]
+        return json.dumps(data)
+
+    def clear(self):
+        """Clear all aggregated metrics
+        """
+        with self._lock:
+            self.recent.clear()
+            self._histograms.clear()
+            self._task_counts.clear()
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def record_task_metrics(sink, metrics):
+    """Pass metrics to a sink, errors of sink are logged and ignored
+
+    Args:
+        sink (HMetricsSink): sink to receive metrics
+        metrics (HTaskMetrics): metrics of a finished task
+    """
+    try:
+        sink.record(metrics)
+    except Exception as error:# pylint: disable=broad-except
+        logging.exception(error)
+        logging.error("Metrics sink failed")
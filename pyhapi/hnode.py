@@ -44,7 +44,9 @@ import traceback
 from . import hapi as HAPI
 from . import hdata as HDATA
 from .hgeo import HGeoMesh, HGeoCurve, HGeo, HGeoHeightfield, HGeoVolume, HGeoInstancer
-from .hparm import HParmFactory, HParmChoice, HParmToggle, HParmButton
+from .hparm import HParmFactory, HParmChoice, HParmToggle, HParmButton, HParmLabel
+from .hcache import HParmSchema
+from .hmetrics import node_span, SPAN_SET_PARMS, SPAN_COOK, SPAN_EXTRACT
 
 class HNodeBase():
     """A base class for houdini engine's node, including shared operation\
@@ -56,6 +58,8 @@ class HNodeBase():
         instantiated (bool): instantiated
         node_id (int): Current node id
         name (str): Current node name
+        operator_name (str): Operator name of this node, empty if not created by operator name
+        parms (dict(str,HParm)): Params of this node, collected on first access
     """
 
     def __init__(self, session):
@@ -64,8 +68,25 @@ class HNodeBase():
         self.node_id = -1
         self.name = ""
         self.path = ""
+        self.operator_name = ""
         self.node_info = HDATA.NodeInfo()
-        self.parms = {}
+        self.param_info = []
+        self._parms = None
+        self._parm_cache_key = None
+
+    @property
+    def parms(self):
+        """Params of this node, they are collected on first access, \
+            call refresh_params to collect again
+
+        Returns:
+            dict(str,HParm): param name to param
+        """
+        if self._parms is None:
+            if not self.instantiated:
+                return {}
+            self._collect_params(use_cache=True)
+        return self._parms
 
     def is_inited(self):
         """If this node is inited
@@ -146,7 +167,7 @@ class HNodeBase():
         """
         geo.commit_to_node(self.session, self.node_id)
 
-    def __get_display_geo_by_node(self, node_id):
+    def __get_display_geo_by_node(self, node_id, buffer_pool=None, include=None, exclude=None, lazy=False):# pylint: disable=too-many-arguments
         all_geos = []
         id2geo = {}
         instancers = []
@@ -172,7 +193,8 @@ class HNodeBase():
                 logging.critical("Type of geo extraction not implemented {0}".format(part_info.type))
                 extract_geo = HGeo()
             
-            extract_geo.extract_from_sop(self.session, part_info, geo_info.nodeId, part_info.id)
+            extract_geo.extract_from_sop(self.session, part_info, geo_info.nodeId, part_info.id,\
+                buffer_pool=buffer_pool, include=include, exclude=exclude, lazy=lazy)
             id2geo[part_info.id] = extract_geo
 
             if add_to_result:
@@ -187,21 +209,38 @@ class HNodeBase():
 
         return all_geos
 
-    def _collect_params(self):
+    def _collect_node_info(self):
         self.node_info = HAPI.get_node_info(self.session.hapi_session, self.node_id)
         # update name and path
         self.name = HAPI.get_string(self.session.hapi_session, self.node_info.nameSH)
         self.path = HAPI.get_node_path(self.session.hapi_session, self.node_id)
-        
-        self.param_info = HAPI.get_parameters(\
-            self.session.hapi_session, self.node_id, self.node_info)
-        
-        parm_factory = HParmFactory(self.session, self.node_id)
-        for i in range(0, self.node_info.parmCount):
-            parm = parm_factory.get_parm(self.param_info[i])
+
+    def _collect_params(self, use_cache=False):
+        # parm schema is only valid for a fresh instance, so only use cache on first collection
+        cache = self.session.parm_cache\
+            if use_cache and self._parm_cache_key is not None else None
+        schema = cache.get(self._parm_cache_key) if cache is not None else None
+
+        if schema is not None:
+            self.param_info = schema.parm_infos
+            parm_factory = HParmFactory(self.session, self.node_id, schema.parm_infos,\
+                schema.choice_lists, schema.string_table)
+        else:
+            self._collect_node_info()
+            self.param_info = HAPI.get_parameters(\
+                self.session.hapi_session, self.node_id, self.node_info)
+            parm_factory = HParmFactory(self.session, self.node_id, self.param_info)
+            if cache is not None:
+                cache.put(self._parm_cache_key, HParmSchema(\
+                    self.param_info, parm_factory.choice_lists, parm_factory.string_table))
+
+        parms = {}
+        for parm_info in self.param_info:
+            parm = parm_factory.get_parm(parm_info)
             # not collect invisible parms!
             if parm:
-                self.parms[parm.get_name()] = parm
+                parms[parm.get_name()] = parm
+        self._parms = parms
 
     def get_visible_params(self):
         """Get all visible param in this node
@@ -220,7 +259,13 @@ class HNodeBase():
         return self.parms.values()
 
     def refresh_params(self):
+        """Collect params of this node again, such as after multiparm changed
+
+        Returns:
+            HNodeBase: Current node itself
+        """
         self._collect_params()
+        return self
 
     def get_param_names(self):
         """Get all param in this node
@@ -262,6 +307,7 @@ class HNodeBase():
             return None
         return self.parms[param_name].get_value()
 
+    @node_span(SPAN_SET_PARMS)
     def set_param_value(self, param_name, value, tupleid=0):
         """Set parameter value
 
@@ -292,6 +338,117 @@ class HNodeBase():
             logging.error(error)
             return False
 
+    def get_param_values(self, param_names=None):
+        """Get values of many params in bulk, int, float and string values\
+            are fetched with one HAPI call per value type
+
+        Args:
+            param_names (list(str), optional): Parameter names to retrieve. \
+                Defaults to None, retrieve all params.
+
+        Returns:
+            dict(str, int/float/str/list): Values of params, depends on param type
+        """
+        if not self.is_inited():
+            return None
+        if param_names is None:
+            param_names = self.get_param_names()
+        parms_by_type = ([], [], [])
+        for param_name in param_names:
+            parm = self.parms[param_name]
+            if isinstance(parm, (HParmButton, HParmLabel)):
+                continue
+            parm_info = parm.get_parm_info()
+            if parm_info.is_int():
+                parms_by_type[0].append(parm)
+            elif parm_info.is_float():
+                parms_by_type[1].append(parm)
+            elif parm_info.is_string():
+                parms_by_type[2].append(parm)
+
+        values = {}
+        for parms, index_field, getter in zip(parms_by_type,\
+            ("intValuesIndex", "floatValuesIndex", "stringValuesIndex"),\
+            (HAPI.get_parm_int_values, HAPI.get_parm_float_values, HAPI.get_parm_string_values)):
+            if len(parms) == 0:
+                continue
+            start = min(getattr(parm.get_parm_info(), index_field) for parm in parms)
+            end = max(getattr(parm.get_parm_info(), index_field) + parm.get_size() for parm in parms)
+            data = getter(self.session.hapi_session, self.node_id, start, end - start)
+            for parm in parms:
+                offset = getattr(parm.get_parm_info(), index_field) - start
+                values[parm.get_name()] = parm._from_tuple_values(data[offset:offset + parm.get_size()])
+        return values
+
+    @node_span(SPAN_SET_PARMS)
+    def set_param_values(self, param_values):
+        """Set values of many params in bulk, int and float values of params\
+            adjacent in value arrays are pushed with one HAPI call
+
+        Args:
+            param_values (dict(str, int/float/str/list)): Parameter names to values, \
+                value depends on param type
+
+        Returns:
+            bool: set successed
+        """
+        if not self.is_inited():
+            return False
+        for param_name in param_values.keys():
+            if param_name not in self.parms.keys():
+                logging.error("Parameter {0} not exist in node".format(param_name))
+                return False
+        try:
+            int_values = {}
+            float_values = {}
+            for param_name, value in param_values.items():
+                parm = self.parms[param_name]
+                if isinstance(parm, HParmButton):
+                    raise TypeError("{0} is a button, use press button".format(param_name))
+                tuple_values = parm._to_tuple_values(value)
+                if tuple_values is None:
+                    # no array setter for this parm, e.g. string and node
+                    parm.set_value(value)
+                elif parm.get_parm_info().is_int():
+                    int_values[parm.get_parm_info().intValuesIndex] = tuple_values
+                else:
+                    float_values[parm.get_parm_info().floatValuesIndex] = tuple_values
+            self.__set_values_in_runs(int_values, HAPI.set_parm_int_values)
+            self.__set_values_in_runs(float_values, HAPI.set_parm_float_values)
+            return True
+        except AssertionError as error:
+            logging.error("HAPI excecution failed")
+            logging.error(error)
+            return False
+
+    def __set_values_in_runs(self, values_by_index, setter):
+        # merge values adjacent in value array, so each run is one call
+        run_start = None
+        run_values = []
+        for index in sorted(values_by_index.keys()):
+            if run_start is not None and index != run_start + len(run_values):
+                setter(self.session.hapi_session, self.node_id, run_values, run_start)
+                run_start = None
+            if run_start is None:
+                run_start = index
+                run_values = []
+            run_values.extend(values_by_index[index])
+        if run_start is not None:
+            setter(self.session.hapi_session, self.node_id, run_values, run_start)
+
+    def get_cook_time_key(self, action="cook"):
+        """Get key of this node's cook time in session's cook_time_model
+
+        Args:
+            action (str, optional): "cook" or name of button pressed. Defaults to "cook".
+
+        Returns:
+            (str, str, str): operator, node path and action
+        """
+        operator = self._parm_cache_key if self._parm_cache_key is not None else self.operator_name
+        return (operator, self.path or self.name, action)
+
+    @node_span(SPAN_COOK)
     def cook(self, cook_option : HDATA.CookOptions = None, status_report_interval=1.0, status_verbosity=HDATA.StatusVerbosity.ALL):
         """Cook this node in sync/blocking manner
 
@@ -302,10 +459,13 @@ class HNodeBase():
             return None
         if cook_option == None:
             cook_option = self.session.cook_option
-        HAPI.cook_node(self.session.hapi_session, cook_option, self.node_id,\
-            status_report_interval, status_verbosity)
+        key = self.get_cook_time_key()
+        duration = HAPI.cook_node(self.session.hapi_session, cook_option, self.node_id,\
+            status_report_interval, status_verbosity, self.session.cook_time_model.expected(key))
+        self.session.cook_time_model.record(key, duration)
         return self
 
+    @node_span(SPAN_COOK)
     async def cook_async(self, cook_option : HDATA.CookOptions = None, status_report_interval=1.0, status_verbosity=HDATA.StatusVerbosity.ALL):
         """Cook this node in async/non-blocking manner
 
@@ -316,9 +476,13 @@ class HNodeBase():
             return
         if cook_option == None:
             cook_option = self.session.cook_option
-        await HAPI.cook_node_async(self.session.hapi_session, \
-            cook_option, self.node_id, status_report_interval, status_verbosity)
+        key = self.get_cook_time_key()
+        duration = await HAPI.cook_node_async(self.session.hapi_session, \
+            cook_option, self.node_id, status_report_interval, status_verbosity,\
+                self.session.cook_time_model.expected(key))
+        self.session.cook_time_model.record(key, duration)
 
+    @node_span(SPAN_COOK)
     def press_button(self, param_name, status_report_interval=5.0, status_verbosity=HDATA.StatusVerbosity.ALL):
         """Press button in this node in sync/blocking manner
 
@@ -332,8 +496,12 @@ class HNodeBase():
         #paramid = self.param_id_dict[param_name]
         #paraminfo = self.param_info[paramid]
         param = self.parms[param_name]
-        param.press(status_report_interval, status_verbosity)
+        key = self.get_cook_time_key(param_name)
+        duration = param.press(status_report_interval, status_verbosity,\
+            self.session.cook_time_model.expected(key))
+        self.session.cook_time_model.record(key, duration)
 
+    @node_span(SPAN_COOK)
     async def press_button_async(self, param_name, status_report_interval=5.0, status_verbosity=HDATA.StatusVerbosity.ALL):
         """Press button in this node in async/non-blocking manner
 
@@ -347,11 +515,28 @@ class HNodeBase():
         #paramid = self.param_id_dict[param_name]
         #paraminfo = self.param_info[paramid]
         param = self.parms[param_name]
-        await param.press_async(status_report_interval, status_verbosity)
+        key = self.get_cook_time_key(param_name)
+        duration = await param.press_async(status_report_interval, status_verbosity,\
+            self.session.cook_time_model.expected(key))
+        self.session.cook_time_model.record(key, duration)
 
-    def get_display_geos(self):
+    @node_span(SPAN_EXTRACT)
+    def get_display_geos(self, buffer_pool=None, include=None, exclude=None, lazy=False):
         """Get display geo of this node
 
+        Args:
+            buffer_pool (HBufferPool, optional): pool numeric attribute arrays are \
+                acquired from, release them with buffer_pool.release_geos. \
+                    Defaults to None, allocate new arrays.
+            include (list(str or (AttributeOwner,str)), optional): only extract attributes \
+                matching one of these name globs, a glob in a tuple matches attributes \
+                    of that type only, such as ["P", (AttributeOwner.POINT, "N")]. \
+                        Defaults to None, all attributes.
+            exclude (list(str or (AttributeOwner,str)), optional): do not extract attributes \
+                matching one of these, such as ["debug_*"]. Defaults to None.
+            lazy (bool, optional): only list attributes, their data is fetched on first \
+                get_attrib_data, before this node cooks again. Defaults to False.
+
         Returns:
             list of HGeo: List of geos in this node
         """
@@ -359,19 +544,22 @@ class HNodeBase():
             all_geos = []
             child_sop_count = HAPI.compose_object_list(self.session.hapi_session, self.node_id)
             if child_sop_count == 0:
-                return self.__get_display_geo_by_node(self.node_id)
+                return self.__get_display_geo_by_node(self.node_id, buffer_pool,\
+                    include, exclude, lazy)
             child_object_infos = HAPI.get_composed_object_list(self.session.hapi_session,\
                 self.node_id, child_sop_count)
             for objectinfo in child_object_infos:
                 try:
-                    sop_geo = self.__get_display_geo_by_node(objectinfo.nodeId)
+                    sop_geo = self.__get_display_geo_by_node(objectinfo.nodeId, buffer_pool,\
+                        include, exclude, lazy)
                     all_geos.extend(sop_geo)
                 except AssertionError as error:
                     nodename = HAPI.get_string(self.session.hapi_session, objectinfo.nameSH)
                     logging.error("Operator:{0}, cannot retrieve geo, skipped".format(nodename))
             return all_geos
         if self.get_node_type() == HDATA.NodeType.SOP:
-            return self.__get_display_geo_by_node(self.node_id)
+            return self.__get_display_geo_by_node(self.node_id, buffer_pool,\
+                include, exclude, lazy)
         logging.error("Operator type is {0}, cannot retrieve geo".format(self.get_node_type()))
         return None
 
@@ -398,7 +586,7 @@ class HNode(HNodeBase):
     """A node user created for operator name or hda assets, could get/set\
         params, press button and cook.
     """
-    def __init__(self, session, operator_name, node_name, parent_node=None):
+    def __init__(self, session, operator_name, node_name, parent_node=None, parm_cache_key=None):# pylint: disable=too-many-arguments
         """Init
 
         Args:
@@ -406,6 +594,8 @@ class HNode(HNodeBase):
             operator_name (str): Operator name of this node
             node_name (str): Name of this node
             parent_node (HNodeBase, optional): Parent node. Defaults to None.
+            parm_cache_key ((str, str), optional): Key of this operator's param schema \
+                in session's parm_cache. Defaults to None, not use cache.
         """
         super(HNode, self).__init__(session)
         self.node_id = HAPI.create_node(self.session.hapi_session, operator_name, node_name,\
@@ -414,7 +604,9 @@ class HNode(HNodeBase):
         self.instantiated = True
         self.session.nodes[self.node_id] = self
         self.name = node_name
-        self._collect_params()
+        self.operator_name = operator_name
+        self._parm_cache_key = parm_cache_key
+        self._collect_node_info()
 
 class HInputNode(HNodeBase):
 
@@ -438,9 +630,7 @@ class HExistingNode(HNodeBase):
         super(HExistingNode, self).__init__(session)
         self.node_id = node_id
         try:
-            self.node_info = HAPI.get_node_info(self.session.hapi_session, self.node_id)
-            self.name = HAPI.get_string(self.session.hapi_session, self.node_info.nameSH)
-            self._collect_params()
+            self._collect_node_info()
             self.instantiated = True
             self.session.nodes[self.node_id] = self
         except AssertionError as error:
@@ -464,8 +654,7 @@ class HHeightfieldInputNode(HNodeBase):
         self.instantiated = True
         self.name = node_name
         self.session.nodes[self.node_id] = self
-        self.node_info = HAPI.get_node_info(self.session.hapi_session, self.node_id)
-        self._collect_params()
+        self._collect_node_info()
         #hacking.....otherwise voxel size will be 0
         self.set_param_value("gridspacing", voxel_size)
         self.cook()
@@ -484,8 +673,7 @@ class HHeightfieldInputVolumeNode(HNodeBase):
         self.instantiated = True
         self.name = node_name
         self.session.nodes[self.node_id] = self
-        self.node_info = HAPI.get_node_info(self.session.hapi_session, self.node_id)
-        self._collect_params()
+        self._collect_node_info()
         #hacking.....otherwise voxel size will be 0
         self.set_param_value("divsize", voxel_size)
         self.cook()
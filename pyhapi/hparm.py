@@ -23,20 +23,23 @@ class HParm():
         id (int): Current param name
     """
 
-    def __init__(self, session, parm_info, node_id):
+    def __init__(self, session, parm_info, node_id, string_table=None):
         """Init
 
         Args:
             session (HSession): HEngine session containing this node
             parm_info (ParmInfo): retrieved parm info of this parm
             node_id (int): node id containing this param
+            string_table (dict(int,str), optional): string handler to string resolved\
+                in batch beforehand. Defaults to None.
         """
         self.session = session
         self.node_id = node_id
         self.__parm_info = parm_info
         self.id = parm_info.id
-        self.__name = HAPI.get_string(self.session.hapi_session, parm_info.nameSH)
-        self.__label = HAPI.get_string(self.session.hapi_session, parm_info.labelSH)
+        self._string_table = string_table
+        self.__name = self._resolve_string(parm_info.nameSH)
+        self.__label = self._resolve_string(parm_info.labelSH)
         self.__hasMin = parm_info.hasMin
         self.__hasMax = parm_info.hasMax
         self.__invisible = parm_info.invisible
@@ -45,6 +48,19 @@ class HParm():
         self.__max = parm_info.max
         self.__size = parm_info.size
 
+    def _resolve_string(self, string_handle):
+        """Get literal string of a string handler, use string table if resolved
+
+        Args:
+            string_handle (int): string handler of querying string
+
+        Returns:
+            str: string queried
+        """
+        if self._string_table is not None and string_handle in self._string_table:
+            return self._string_table[string_handle]
+        return HAPI.get_string(self.session.hapi_session, string_handle)
+
     @property
     def invisible(self):
         """Get invisible property of this parm
@@ -107,6 +123,38 @@ class HParm():
         """
         return self.__size
 
+    def get_parm_info(self):
+        """Get parm info of this parm
+
+        Returns:
+            ParmInfo: parm info of this parm
+        """
+        return self.__parm_info
+
+    def _to_tuple_values(self, value):
+        """Convert a value into values of each tuple slot for bulk setting
+
+        Args:
+            value (): value to set
+
+        Returns:
+            list: values of each tuple slot, None if not support bulk setting
+        """
+        return None
+
+    def _from_tuple_values(self, values):
+        """Convert values of each tuple slot from bulk getting into value
+
+        Args:
+            values (np.ndarray): values of each tuple slot
+
+        Returns:
+            depend on implement: value of this param
+        """
+        if self.get_size() == 1:
+            return values[0].item() if isinstance(values[0], np.generic) else values[0]
+        return values.tolist()
+
     def _check_range(self, value):
         """Check of a value is in valid range
 
@@ -150,6 +198,18 @@ class HParmFloat(HParm):
         else:
             raise TypeError("Parameter to set is not float or list/ndarray of float")
 
+    def _to_tuple_values(self, value):
+        if (isinstance(value, float) or isinstance(value, int)) and self.get_size() == 1:
+            values = [float(value)]
+        elif (isinstance(value, list) or isinstance(value, np.ndarray)) and len(value)==self.get_size():
+            values = [float(v) for v in value]
+        else:
+            raise TypeError("Parameter to set is not float or list/ndarray of float")
+        for i, val in enumerate(values):
+            if not self._check_range(val):
+                logging.warning("Trying to set {0}.{1} as {2}, it's outside of range {3}".format(self.get_name(), i, val, self.get_range()))
+        return values
+
     def get_value(self):
         """get value for this parameter
 
@@ -228,6 +288,18 @@ class HParmInt(HParm):
         else:
             raise TypeError("Parameter to set is not int or list/ndarray of int")
 
+    def _to_tuple_values(self, value):
+        if (isinstance(value, float) or isinstance(value, int)) and self.get_size() == 1:
+            values = [int(value)]
+        elif (isinstance(value, list) or isinstance(value, np.ndarray)) and len(value)==self.get_size():
+            values = [int(v) for v in value]
+        else:
+            raise TypeError("Parameter to set is not int or list/ndarray of int")
+        for i, val in enumerate(values):
+            if not self._check_range(val):
+                logging.warning("Trying to set {0}.{1} as {2}, it's outside of range {3}".format(self.get_name(), i, val, self.get_range()))
+        return values
+
     def get_value(self):
         """get value for this parameter
 
@@ -332,29 +404,43 @@ class HParmButton(HParm):
     """A class for houdini engine's button parameter
     """
 
-    def press(self, status_report_interval=5.0, status_verbosity=HDATA.StatusVerbosity.ALL):
+    def press(self, status_report_interval=5.0, status_verbosity=HDATA.StatusVerbosity.ALL,
+              expected_time=None):
         """Press button in sync/blocking manner
 
         Args:
-            param_name (str): Button name to press
-            status_report_interval (float): Time interval \
-                in seconds to report status
+            status_report_interval (float): Max time interval \
+                in seconds to query cook status
+            status_verbosity (StatusVerbosity, optional): verbosity of status logged
+            expected_time (float, optional): expected cook time in seconds. Defaults to None.
+
+        Returns:
+            float: seconds the cook took
         """
         HAPI.set_parm_int_value(self.session.hapi_session, self.node_id, self.get_name(), 1)
-        HAPI.wait_cook(self.session.hapi_session, status_report_interval, status_verbosity)
+        duration = HAPI.wait_cook(self.session.hapi_session, status_report_interval,\
+            status_verbosity, expected_time)
         HAPI.set_parm_int_value(self.session.hapi_session, self.node_id, self.get_name(), 0)
+        return duration
 
-    async def press_async(self, status_report_interval=5.0, status_verbosity=HDATA.StatusVerbosity.ALL):
+    async def press_async(self, status_report_interval=5.0, status_verbosity=HDATA.StatusVerbosity.ALL,
+                          expected_time=None):
         """Press button in async/non-blocking manner
 
         Args:
-            param_name (str): Button name to press
-            status_report_interval (float): Time interval \
-                in seconds to report status
+            status_report_interval (float): Max time interval \
+                in seconds to query cook status
+            status_verbosity (StatusVerbosity, optional): verbosity of status logged
+            expected_time (float, optional): expected cook time in seconds. Defaults to None.
+
+        Returns:
+            float: seconds the cook took
         """
         HAPI.set_parm_int_value(self.session.hapi_session, self.node_id, self.get_name(), 1)
-        await HAPI.wait_cook_async(self.session.hapi_session, status_report_interval, status_verbosity)
+        duration = await HAPI.wait_cook_async(self.session.hapi_session, status_report_interval,\
+            status_verbosity, expected_time)
         HAPI.set_parm_int_value(self.session.hapi_session, self.node_id, self.get_name(), 0)
+        return duration
 
     def set_value(self, value):
         """set value for this parameter, it will log a error as button has no value
@@ -393,17 +479,25 @@ class HParmToggle(HParm):
         val = HAPI.get_parm_int_value(self.session.hapi_session, self.node_id, self.get_name(), 0)
         return True if val == 1 else False
 
+    def _to_tuple_values(self, value):
+        if (not isinstance(value, int)) and (not isinstance(value, bool)):
+            raise TypeError("Parameter to set is not int")
+        return [int(value)]
+
+    def _from_tuple_values(self, values):
+        return True if values[0] == 1 else False
+
 class HParmChoice(HParm):
     """A class for houdini engine's choice parameter
     """
     
-    def __init__(self, session, parm_info, node_id, param_choice_lists):
-        super(HParmChoice, self).__init__(session, parm_info, node_id)
+    def __init__(self, session, parm_info, node_id, param_choice_lists, string_table=None):
+        super(HParmChoice, self).__init__(session, parm_info, node_id, string_table)
         choices = param_choice_lists[parm_info.id]
         self.choice_labels = []
         self.choice_values = []
         for choice in choices:
-            self.choice_labels.append(HAPI.get_string(session.hapi_session, choice.labelSH))
+            self.choice_labels.append(self._resolve_string(choice.labelSH))
 
     def get_choice_labels(self):
         """get value for this parameter
@@ -425,8 +519,8 @@ class HParmIntChoice(HParmChoice):
     """A class for houdini engine's int choice parameter
     """
 
-    def __init__(self, session, parm_info, node_id, param_choice_lists):
-        super(HParmIntChoice, self).__init__(session, parm_info, node_id, param_choice_lists)
+    def __init__(self, session, parm_info, node_id, param_choice_lists, string_table=None):
+        super(HParmIntChoice, self).__init__(session, parm_info, node_id, param_choice_lists, string_table)
         self.choice_values = list(range(0, parm_info.choiceCount))
 
     def set_value(self, index):
@@ -442,6 +536,13 @@ class HParmIntChoice(HParmChoice):
         HAPI.set_parm_int_value(self.session.hapi_session, \
                     self.node_id, self.get_name(), int(self.choice_values[index]), 0)
 
+    def _to_tuple_values(self, index):
+        if not isinstance(index, int):
+            raise TypeError("Index to set is not int")
+        if index < 0 or index >= len(self.choice_values):
+            raise IndexError("Index should be between 0 and {0}".format(len(self.choice_values)))
+        return [int(self.choice_values[index])]
+
     def get_value(self):
         """get value for this parameter
 
@@ -454,11 +555,11 @@ class HParmStringChoice(HParmChoice):
     """A class for houdini engine's string choice parameter
     """
 
-    def __init__(self, session, parm_info, node_id, param_choice_lists):
-        super(HParmStringChoice, self).__init__(session, parm_info, node_id, param_choice_lists)
+    def __init__(self, session, parm_info, node_id, param_choice_lists, string_table=None):
+        super(HParmStringChoice, self).__init__(session, parm_info, node_id, param_choice_lists, string_table)
         choices = param_choice_lists[parm_info.id]
         for choice in choices:
-            self.choice_values.append(HAPI.get_string(session.hapi_session, choice.valueSH))
+            self.choice_values.append(self._resolve_string(choice.valueSH))
 
     def set_value(self, index):
         """set value for this parameter
@@ -471,7 +572,7 @@ class HParmStringChoice(HParmChoice):
         if index < 0 or index >= len(self.choice_values):
             raise IndexError("Index should be between 0 and {0}".format(len(self.choice_values)))
         HAPI.set_parm_string_value(self.session.hapi_session, \
-                    self.node_id, self.get_name(), self.choice_values[index], 0)
+                    self.node_id, self.id, self.choice_values[index], 0)
 
     def get_value(self):
         """get value for this parameter
@@ -530,24 +631,45 @@ class HParmFactory():
     """A class to create HParm according to ParmInfo
     """
 
-    def __init__(self, session, node_id):
+    def __init__(self, session, node_id, parm_infos=None, choice_lists=None, string_table=None):# pylint: disable=too-many-arguments
         """set value for this parameter
 
         Args:
             session (HSession): session of this node
             node_id (int) : id of this node
+            parm_infos (list(ParmInfo), optional): parm infos to create, if given, \
+                names, labels and choice strings of them are resolved in one batch
+            choice_lists (list(ParmChoiceInfo), optional): choice infos of this node, \
+                queried from node if not given, such as restoring from HParmSchema
+            string_table (dict(int,str), optional): resolved strings of parm_infos \
+                and choice_lists, resolved from node if not given
         """
         self.session = session
         self.node_id = node_id
         self.param_choice_lists = {}
+        self.string_table = string_table
 
-        choice_lists = HAPI.get_parm_choice_lists(self.session.hapi_session, self.node_id)
+        if choice_lists is None:
+            choice_lists = HAPI.get_parm_choice_lists(self.session.hapi_session, self.node_id)
+        self.choice_lists = choice_lists
         self.param_choice_lists.clear()
         for c in choice_lists:
             if c.parentParmId not in self.param_choice_lists:
                 self.param_choice_lists[c.parentParmId] = []
             self.param_choice_lists[c.parentParmId].append(c)
 
+        if parm_infos is not None and self.string_table is None:
+            self.string_table = self.__resolve_strings(parm_infos, choice_lists)
+
+    def __resolve_strings(self, parm_infos, choice_lists):
+        handles = []
+        for parm_info in parm_infos:
+            handles.extend((parm_info.nameSH, parm_info.labelSH))
+        for choice in choice_lists:
+            handles.extend((choice.labelSH, choice.valueSH))
+        strings = HAPI.get_string_batch(self.session.hapi_session, handles)
+        return dict(zip(handles, strings))
+
     def get_parm(self, parm_info):
         """Create a HParm from info
 
@@ -560,13 +682,16 @@ class HParmFactory():
         if parm_info.is_non_value() or parm_info.type == HDATA.ParmType.FOLDERLIST:
             parm = None
         elif parm_info.scriptType is HDATA.PrmScriptType.TOGGLE: # toggle has choice count, check beforehand
-            parm = HParmToggle(self.session, parm_info, self.node_id)
+            parm = HParmToggle(self.session, parm_info, self.node_id, self.string_table)
         elif parm_info.choiceCount > 0 and parm_info.is_int():
-            parm = HParmIntChoice(self.session, parm_info, self.node_id, self.param_choice_lists)
+            parm = HParmIntChoice(self.session, parm_info, self.node_id,\
+                self.param_choice_lists, self.string_table)
         elif parm_info.choiceCount > 0 and parm_info.is_string():
-            parm = HParmStringChoice(self.session, parm_info, self.node_id, self.param_choice_lists)
+            parm = HParmStringChoice(self.session, parm_info, self.node_id,\
+                self.param_choice_lists, self.string_table)
         elif parm_info.scriptType in PARMTYPE_TO_HPARM.keys():
-            parm = PARMTYPE_TO_HPARM[parm_info.scriptType](self.session, parm_info, self.node_id)
+            parm = PARMTYPE_TO_HPARM[parm_info.scriptType](self.session, parm_info,\
+                self.node_id, self.string_table)
         else:
             #parm = HParm(self.session, parm_info, self.node_id)
             parm = None
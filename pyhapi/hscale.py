@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""Autoscaling of HSessionPool
+Author  : Maajor
+Email   : info@ma-yidong.com
+
+HSessionAutoscaler:
+    Grows a session pool when tasks wait too long or queue is too deep, \
+        retires idle sessions after a cooldown, bounded by min/max sizes and \
+            a memory budget
+
+Example usage:
+
+import pyhapi as ph
+
+#keep 1 to 16 sessions, grow when a task waits over 2 seconds, \
+#   retire sessions idle for 10 minutes
+autoscaler = ph.HSessionAutoscaler(min_sessions=1, max_sessions=16,\
+    max_queue_wait=2.0, idle_cooldown=600.0, memory_budget=32<<30)
+session_pool = ph.HSessionPool(1, autoscaler=autoscaler)
+"""
+import os
+import asyncio
+import logging
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+__all__ = [
+    # Classes
+    'HSessionAutoscaler'
+]
+
+_warned_unmeasurable = False
+
+
+def _process_memory(pid):
+    # resident memory of a process in bytes, by psutil if installed, else by /proc on linux,
+    # None if not measurable on this platform
+    global _warned_unmeasurable # pylint: disable=global-statement
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return None
+    try:
+        with open("/proc/{0}/statm".format(pid), "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        if not _warned_unmeasurable:
+            _warned_unmeasurable = True
+            logging.warning("Cannot measure session memory, install psutil to measure it. "\
+                "Memory budget uses session_memory estimate instead")
+        return None
+
+
+class HSessionAutoscaler():
+    """Grows a session pool when tasks wait too long or queue is too deep, \
+        and retires sessions idle longer than a cooldown. Tasks in flight are \
+            never interrupted, only idle sessions are retired.
+
+    Attributes:
+        min_sessions (int): lower bound of pool size
+        max_sessions (int): upper bound of pool size
+        max_queue_wait (float): grow if the oldest waiting task waited more \
+            than this seconds, None to ignore
+        max_queue_depth (int): grow if more than this number of tasks are waiting,\
+            None to ignore
+        idle_cooldown (float): retire a session idle for more than this seconds
+        memory_budget (int): bytes all sessions of the pool could use, None if unbounded.\
+            Resident memory of sessions is measured by psutil if installed, or /proc on linux
+        session_memory (int): estimated bytes a session uses, \
+            for sessions whose memory cannot be measured and sessions to start
+        scale_step (int): max number of sessions started at a time
+        interval (float): seconds between two scaling checks
+    """
+
+    def __init__(self, min_sessions=1, max_sessions=8, max_queue_wait=1.0,# pylint: disable=too-many-arguments
+                 max_queue_depth=None, idle_cooldown=300.0, memory_budget=None,
+                 session_memory=2<<30, scale_step=1, interval=1.0):
+        """Initialize
+
+        Args:
+            min_sessions (int, optional): lower bound of pool size. Defaults to 1.
+            max_sessions (int, optional): upper bound of pool size. Defaults to 8.
+            max_queue_wait (float, optional): grow if the oldest waiting task waited \
+                more than this seconds, None to ignore. Defaults to 1.0.
+            max_queue_depth (int, optional): grow if more than this number of tasks \
+                are waiting, None to ignore. Defaults to None.
+            idle_cooldown (float, optional): retire a session idle for more than \
+                this seconds. Defaults to 300.0.
+            memory_budget (int, optional): bytes all sessions of the pool could use, \
+                None if unbounded. Defaults to None.
+            session_memory (int, optional): estimated bytes a session uses. Defaults to 2GB.
+            scale_step (int, optional): max number of sessions started at a time. Defaults to 1.
+            interval (float, optional): seconds between two scaling checks. Defaults to 1.0.
+        """
+        assert 0 <= min_sessions <= max_sessions, "min_sessions should be in [0, max_sessions]"
+        self.min_sessions = min_sessions
+        self.max_sessions = max_sessions
+        self.max_queue_wait = max_queue_wait
+        self.max_queue_depth = max_queue_depth
+        self.idle_cooldown = idle_cooldown
+        self.memory_budget = memory_budget
+        self.session_memory = session_memory
+        self.scale_step = scale_step
+        self.interval = interval
+
+    def session_memory_usage(self, session):
+        """Get bytes a session's server process uses
+
+        Args:
+            session (HSession): session to measure
+
+        Returns:
+            int: resident bytes of its process, session_memory if cannot be measured
+        """
+        measured = _process_memory(session.process_id) if session.process_id > 0 else None
+        return self.session_memory if measured is None else measured
+
+    def capacity(self, sessions):
+        """Get max pool size allowed by max_sessions and memory budget
+
+        Args:
+            sessions (list(HSession)): sessions currently in pool
+
+        Returns:
+            int: max pool size, below number of sessions if they use more than the budget
+        """
+        if self.memory_budget is None:
+            return self.max_sessions
+        in_use = sum(self.session_memory_usage(session) for session in sessions)
+        # floor division, negative when over budget so sessions are retired
+        startable = (self.memory_budget - in_use) // self.session_memory
+        return max(0, min(self.max_sessions, len(sessions) + startable))
+
+    def scale_delta(self, session_count, capacity, queue_depth, queue_wait, idle_times):
+        """Decide how to resize the pool
+
+        Args:
+            session_count (int): number of sessions in pool
+            capacity (int): max pool size, see capacity()
+            queue_depth (int): number of tasks waiting
+            queue_wait (float): seconds the oldest waiting task waited
+            idle_times (list(float)): seconds each idle session has been idle
+
+        Returns:
+            int: number of sessions to start if positive, \
+                number of idle sessions to retire if negative
+        """
+        if session_count < self.min_sessions:
+            return max(0, min(self.min_sessions, capacity) - session_count)
+        overloaded = queue_depth > 0 and (\
+            (self.max_queue_wait is not None and queue_wait > self.max_queue_wait) or\
+            (self.max_queue_depth is not None and queue_depth > self.max_queue_depth))
+        if overloaded:
+            return max(0, min(self.scale_step, capacity - session_count))
+        if session_count > capacity:
+            # over memory budget, retire idle sessions without waiting for cooldown
+            return -min(len(idle_times), session_count - max(capacity, self.min_sessions))
+        if queue_depth == 0:
+            cooled = sum(1 for idle_time in idle_times if idle_time >= self.idle_cooldown)
+            return -min(cooled, session_count - self.min_sessions)
+        return 0
+
+    async def run(self, pool):
+        """Check and scale a session pool every interval, until cancelled
+
+        Args:
+            pool (HSessionPool): session pool to scale
+        """
+        while True:
+            try:
+                await self.scale_once(pool)
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:# pylint: disable=broad-except
+                logging.exception(error)
+                logging.error("Autoscale failed")
+            await asyncio.sleep(self.interval)
+
+    async def scale_once(self, pool):
+        """Check and scale a session pool once
+
+        Args:
+            pool (HSessionPool): session pool to scale
+
+        Returns:
+            int: number of sessions started if positive, retired if negative
+        """
+        sessions = list(pool.sessions)
+        capacity = self.capacity(sessions)
+        idle_times = pool.get_idle_times()
+        delta = self.scale_delta(len(sessions), capacity, pool.task_queue.qsize(),\
+            pool.task_queue.oldest_wait(), list(idle_times.values()))
+        if delta > 0:
+            logging.info("Autoscale up {0} sessions from {1}".format(delta, len(sessions)))
+            return await pool.scale_up_async(delta)
+        if delta < 0:
+            min_idle = 0 if len(sessions) > capacity else self.idle_cooldown
+            retired = await pool.retire_idle_sessions_async(-delta, min_idle)
+            if retired:
+                logging.info("Autoscale down {0} sessions from {1}".format(retired, len(sessions)))
+            return -retired
+        return 0
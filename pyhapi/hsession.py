@@ -12,6 +12,16 @@ HSession:
 HSessionManager:
     Use this object to get HSession object
 
+HSessionPoolExecutor:
+    A concurrent.futures.Executor running session tasks on an HSessionPool
+
+HSessionExecutor:
+    A dedicated thread with its own event loop, running all houdini engine\
+         calls of one HSession
+
+SessionResetMode:
+    How a session is reset after an HSessionTask
+
 Example usage:
 
 import pyhapi as ph
@@ -27,23 +37,124 @@ session.save_hip("test.hip")
 
 """
 import os
+import signal
 import logging
 import asyncio
 import threading
 import enum
 import time
+import functools
+import concurrent.futures
 import pyhapi
 from . import hdata as HDATA
 from . import hapi as HAPI
 from .hnode import HExistingNode
+from .hasset import HAsset
+from .hcache import file_digest
+from .hcook import COOK_TIME_MODEL
+from .htask import HSessionTaskItem, HSessionTaskQueue, task_key
+from .hmetrics import HTaskMetrics, task_span, record_task_metrics,\
+    SPAN_QUEUE_WAIT, SPAN_LOAD_LIBRARY, SPAN_RESET, SPAN_RUN
 
 
 __all__ = [
     # Classes
-    'HSession', 'HSessionManager', 'HSessionPool', 'HSessionTask'
+    'HSession', 'HSessionManager', 'HSessionPool', 'HSessionPoolExecutor', 'HSessionTask', 'HSessionExecutor',
+    # Enums
+    'SessionResetMode'
 ]
 
 
+class SessionResetMode(enum.IntEnum):
+    """How a session is reset after an HSessionTask
+    """
+    # cleanup and initialize houdini engine, unload all asset libraries
+    RESTART = 0
+    # delete nodes created during the task, keep asset libraries and persistent nodes
+    DELETE_NODES = 1
+
+
+class HSessionExecutor():
+
+    """A dedicated thread with its own event loop, running all houdini engine\
+        calls of one HSession. HAPI calls are blocking ctypes calls, running \
+            them on per-session thread let sessions in a pool work in parallel.
+
+    Attributes:
+        name (str): name of the executor thread
+    """
+
+    def __init__(self, name="hsession"):
+        """Initialize and start the executor thread
+
+        Args:
+            name (str, optional): name of the executor thread. Defaults to "hsession".
+        """
+        self.name = name
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.__run_loop, name=name, daemon=True)
+        self._thread.start()
+
+    def __run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+        self._loop.close()
+
+    def is_running(self):
+        """Check if the executor thread is alive
+
+        Returns:
+            bool: if the executor thread is alive
+        """
+        return self._thread.is_alive()
+
+    def in_executor_thread(self):
+        """Check if caller is running on the executor thread
+
+        Returns:
+            bool: if caller is running on the executor thread
+        """
+        return threading.current_thread() is self._thread
+
+    def submit(self, coro):
+        """Schedule a coroutine on the executor's event loop
+
+        Args:
+            coro (coroutine): coroutine to run
+
+        Returns:
+            concurrent.futures.Future: future of the coroutine's result
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def call(self, func, *args, **kwargs):
+        """Schedule a blocking function call on the executor thread
+
+        Args:
+            func (func): function to call
+            *args : arguments pass to this function
+            **kwargs : keyword arguments pass to this function
+
+        Returns:
+            concurrent.futures.Future: future of the function's result
+        """
+        async def call_wrapper():
+            return func(*args, **kwargs)
+        return self.submit(call_wrapper())
+
+    def shutdown(self, wait=True):
+        """Stop the executor's event loop and thread
+
+        Args:
+            wait (bool, optional): wait for the thread to finish. Defaults to True.
+        """
+        if not self.is_running():
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if wait and not self.in_executor_thread():
+            self._thread.join()
+
+
 class HSession():
 
     """A wrapper fou houdini engine's session, it contains the session itself\
@@ -57,6 +168,22 @@ class HSession():
         cook_option (hdata.CookOptions): cook option of this session
         root_path (str): file path to hsession project's root path, \
                 it could contain /hda folder
+        executor (HSessionExecutor): dedicated thread running this session's \
+            HAPI calls, None if calls run on caller's thread
+        parm_cache (HParmSchemaCache): cache of param schema of hda operators, \
+            None if not caching
+        reset_mode (SessionResetMode): how this session is reset after an HSessionTask
+        restart_interval (int): in DELETE_NODES mode, do a full restart every \
+            this number of tasks, 0 to never
+        preload_hdas (list(str)): hda files loaded when session starts or restarts
+        startup_timings (dict(str,float)): seconds spent on each startup stage, \
+            start_server, connect and preload
+        cook_time_model (HCookTimeModel): observed cook times scheduling cook polling, \
+            shared by all sessions by default
+        task_metrics (HTaskMetrics): spans of the task running on this session, \
+            None if not instrumented
+        needs_reclaim (bool): an HSessionTask was cancelled on this session and \
+            it is not reset yet, next begin_task restarts it unless reclaim_async does
     """
 
     def __init__(self):
@@ -69,8 +196,75 @@ class HSession():
         self.cook_option = HAPI.get_cook_options()
         self.root_path = ""
         self.pipe_name = "hapi"
+        self.executor = None
+        self.parm_cache = None
+        self.reset_mode = SessionResetMode.RESTART
+        self.restart_interval = 0
+        self.preload_hdas = []
+        self.startup_timings = {}
+        self.cook_time_model = COOK_TIME_MODEL
+        self.task_metrics = None
+        self.needs_reclaim = False
 
         self.asset_libs = {}
+        self._asset_lib_files = {}
+        self._persistent_nodes = {}
+        self._persistent_node_ids = set()
+        self._baseline_nodes = {}
+        self._baseline_node_ids = set()
+        self._tasks_since_restart = 0
+        self._auto_close = True
+        self._server_timeout = 10000.0
+
+    def start_executor(self):
+        """Start a dedicated thread to run all HAPI calls of this session
+
+        Returns:
+            HSession: session itself
+        """
+        if self.executor is None or not self.executor.is_running():
+            self.executor = HSessionExecutor("hsession-{0}".format(self.pipe_name))
+        return self
+
+    def stop_executor(self):
+        """Stop the dedicated thread of this session
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    async def run_async(self, func, *args, **kwargs):
+        """Run a blocking function, such as an HAPI call, on this session's\
+            executor thread and await its result. It runs in place if \
+                there is no executor or caller is already on executor thread.
+
+        Args:
+            func (func): function to call
+            *args : arguments pass to this function
+            **kwargs : keyword arguments pass to this function
+
+        Returns:
+            result of the function
+        """
+        if self.executor is None or self.executor.in_executor_thread():
+            return func(*args, **kwargs)
+        return await asyncio.wrap_future(self.executor.call(func, *args, **kwargs))
+
+    async def run_task_async(self, task, *args, **kwargs):
+        """Run a session task coroutine on this session's executor thread
+
+        Args:
+            task (func): coroutine function, its first parameter is HSession
+            *args : arguments pass to this task
+            **kwargs : keyword arguments pass to this task
+
+        Returns:
+            result of the task
+        """
+        coro = task(self, *args, **kwargs)
+        if self.executor is None or self.executor.in_executor_thread():
+            return await coro
+        return await asyncio.wrap_future(self.executor.submit(coro))
 
     def get_node(self, node_id):
         """Get node in this session by HAPI_NodeId
@@ -92,17 +286,72 @@ class HSession():
             return existing_node
         return None
 
+    def load_asset_library(self, asset):
+        """Load asset library of an HAsset, reuse the library already loaded\
+            in this session if its hda file is not changed
+
+        Args:
+            asset (HAsset): asset to load
+        """
+        loaded = self._asset_lib_files.get(os.path.abspath(asset.hda_path))
+        if loaded is not None and loaded[1] is not None\
+            and loaded[1] == file_digest(asset.hda_path):
+            asset.session = self
+            asset.library_id = loaded[0]
+            self.asset_libs[asset.library_id.value] = asset
+            return
+        self.reload_asset_library(asset)
+
+    def has_asset_library(self, hda_path):
+        """Check if an hda file is loaded in this session
+
+        Args:
+            hda_path (str): path of hda file
+
+        Returns:
+            bool: if the hda file is loaded
+        """
+        return os.path.abspath(hda_path) in self._asset_lib_files
+
     def reload_asset_library(self, asset):
         asset.session = self
-        asset_lib_id = HAPI.load_asset_library_from_file(
-            self.hapi_session, asset.hda_path)
+        with task_span(self, SPAN_LOAD_LIBRARY, os.path.basename(asset.hda_path)):
+            asset_lib_id = HAPI.load_asset_library_from_file(
+                self.hapi_session, asset.hda_path)
 
         asset.library_id = asset_lib_id
         self.asset_libs[asset.library_id.value] = asset
+        self._asset_lib_files[os.path.abspath(asset.hda_path)] =\
+            (asset_lib_id, file_digest(asset.hda_path))
 
         # asset.asset_names = HAPI.get_available_assets(
         #    self.hapi_session, asset_lib_id)
 
+    def preload_asset_libraries(self, hda_paths):
+        """Load hda files into this session ahead of tasks, they are loaded \
+            again after every restart of this session
+
+        Args:
+            hda_paths (list(str)): paths of hda files to load
+
+        Returns:
+            bool: true if all hda files loaded successfully, false not.
+        """
+        self.preload_hdas = list(hda_paths)
+        return self.__load_preload_hdas()
+
+    def __load_preload_hdas(self):
+        start = time.perf_counter()
+        success = True
+        for hda_path in self.preload_hdas:
+            try:
+                HAsset(self, hda_path)
+            except AssertionError as error:
+                logging.error("Preload {0} failed".format(hda_path))
+                logging.error(error)
+                success = False
+        self.startup_timings["preload"] = time.perf_counter() - start
+        return success
 
     def create_thrift_pipe_session(self, rootpath, pipe_name, auto_close=True, timeout=10000.0):
         """Create the session in thrift-pipe manner
@@ -123,6 +372,8 @@ class HSession():
         """
         self.root_path = rootpath
         self.pipe_name = pipe_name
+        self._auto_close = auto_close
+        self._server_timeout = timeout
         return self.__internal_create_thrift_pipe_session(rootpath, pipe_name, True, auto_close, timeout)
 
     def __internal_create_thrift_pipe_session(\
@@ -134,12 +385,16 @@ class HSession():
             self.hapi_session = HDATA.Session(HDATA.SessionType.THRIFT, 0)
             self.connected_state = HDATA.SessionConnectionState.FAILED_TO_CONNECT
 
+            start = time.perf_counter()
             if create_session:
                 server_options = HDATA.ThriftServerOptions(auto_close, timeout)
                 self.process_id = HAPI.start_thrift_named_pipe_server(server_options, pipe_name)
+            connect_start = time.perf_counter()
+            self.startup_timings["start_server"] = connect_start - start
 
             HAPI.create_thrift_named_pipe_session(self.hapi_session, pipe_name)
             self.__initialize_session(rootpath)
+            self.startup_timings["connect"] = time.perf_counter() - connect_start
             return True
         except AssertionError as error:
             logging.error("HAPI excecution failed")
@@ -199,8 +454,208 @@ class HSession():
         """
         HAPI.cleanup(self.hapi_session)
         self.__initialize_session(self.root_path)
+        self.__forget_session_state()
+        if self.preload_hdas:
+            self.__load_preload_hdas()
+        return self
+
+    def interrupt(self):
+        """Interrupt the running cook of this session, it could be called \
+            from another thread while this session is blocked in a cook
+
+        Returns:
+            bool: if the interrupt succeed
+        """
+        try:
+            HAPI.interrupt(self.hapi_session)
+            return True
+        except AssertionError as error:
+            logging.error("Interrupt session {0} failed".format(self.pipe_name))
+            logging.error(error)
+            return False
+
+    async def interrupt_async(self, ready_timeout=10.0, poll_interval=0.05):
+        """Interrupt the running cook and wait until this session is ready \
+            for next task, hard restart it if it is not ready in time
+
+        Args:
+            ready_timeout (float, optional): seconds to wait for ready state. Defaults to 10.0.
+            poll_interval (float, optional): seconds between two status queries. Defaults to 0.05.
+
+        Returns:
+            bool: true if the session gets ready, false if it is hard restarted
+        """
+        deadline = time.monotonic() + ready_timeout
+        if self.interrupt():
+            try:
+                while time.monotonic() < deadline:
+                    state = HAPI.get_status(self.hapi_session, HDATA.StatusType.COOK_STATE)
+                    if state <= HDATA.State.MAX_READY_STATE and\
+                        await self.__wait_executor_idle(deadline - time.monotonic()):
+                        return True
+                    await asyncio.sleep(poll_interval)
+            except AssertionError as error:
+                logging.error(error)
+        logging.warning("Session {0} is not ready after interrupt".format(self.pipe_name))
+        # killing and respawning server blocks, keep other workers of the loop running
+        await asyncio.get_event_loop().run_in_executor(None, self.hard_restart)
+        return False
+
+    async def reclaim_async(self, ready_timeout=10.0, poll_interval=0.05):
+        """Make this session ready for next task after its task is cancelled or \
+            timed out. It interrupts the cook, then restarts the session, or hard \
+                restarts it if not ready in time. This is the only reset of a cancelled task.
+
+        Args:
+            ready_timeout (float, optional): seconds to wait for ready state. Defaults to 10.0.
+            poll_interval (float, optional): seconds between two status queries. Defaults to 0.05.
+
+        Returns:
+            bool: true if the session gets ready and restarted, false if it is hard restarted
+        """
+        if not await self.interrupt_async(ready_timeout, poll_interval):
+            return False
+        if self.executor is not None and not self.executor.in_executor_thread():
+            await asyncio.wrap_future(self.executor.call(self.restart_session))
+        else:
+            await asyncio.get_event_loop().run_in_executor(None, self.restart_session)
+        return True
+
+    async def __wait_executor_idle(self, timeout):
+        # executor thread could still be blocked in the interrupted HAPI call
+        if self.executor is None or self.executor.in_executor_thread():
+            return True
+        try:
+            await asyncio.wait_for(asyncio.wrap_future(self.executor.call(lambda: None)),\
+                max(timeout, 0))
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def hard_restart(self):
+        """Kill the server process of this session and start a new one with \
+            same pipe name, used when the server does not respond
+
+        Returns:
+            bool: true if the session created successfully, false not.
+        """
+        logging.warning("Hard restart session {0}".format(self.pipe_name))
+        threaded = self.executor is not None
+        if threaded:
+            # executor thread may stay blocked until server process is killed
+            self.executor.shutdown(wait=False)
+            self.executor = None
+        try:
+            HAPI.close_session(self.hapi_session)
+        except AssertionError as error:
+            logging.error(error)
+        if self.process_id > 0:
+            try:
+                os.kill(self.process_id, signal.SIGTERM)
+            except OSError as error:
+                logging.error(error)
+        self.connected_state = HDATA.SessionConnectionState.FAILED_TO_CONNECT
+        self.__forget_session_state()
+        success = self.__internal_create_thrift_pipe_session(\
+            self.root_path, self.pipe_name, True, self._auto_close, self._server_timeout)
+        if success and self.preload_hdas:
+            self.__load_preload_hdas()
+        if threaded:
+            self.start_executor()
+        return success
+
+    def __forget_session_state(self):
+        # cleanup unloads all asset libraries and nodes
+        for node in self.nodes.values():
+            node.instantiated = False
+        self.nodes = {}
+        self.asset_libs = {}
+        self._asset_lib_files = {}
+        self._persistent_nodes = {}
+        self._persistent_node_ids = set()
+        self._baseline_nodes = {}
+        self._baseline_node_ids = set()
+        self._tasks_since_restart = 0
+        self.needs_reclaim = False
+
+    def add_persistent_node(self, node):
+        """Keep a node and its top-level object across task resets in \
+            DELETE_NODES mode, until next full restart
+
+        Args:
+            node (HNodeBase): node to keep
+        """
+        self._persistent_nodes[node.node_id] = node
+        self._persistent_node_ids.add(self.__get_top_level_node_id(node.node_id))
+
+    def begin_task(self):
+        """Record nodes existing before a task, they are kept when resetting \
+            after the task in DELETE_NODES mode. A session left by a cancelled task \
+            is restarted first.
+        """
+        if self.needs_reclaim:
+            logging.warning("Session {0} is not reclaimed after a cancelled task, restart it"\
+                .format(self.pipe_name))
+            self.restart_session()
+        if self.reset_mode == SessionResetMode.DELETE_NODES:
+            self._baseline_nodes = dict(self.nodes)
+            self._baseline_node_ids = self.__get_top_level_node_ids()
+
+    def reset_after_task(self, failed=False):
+        """Reset this session after a task according to reset_mode. \
+            It fallbacks to a full restart if the task failed, every \
+                restart_interval tasks, or deleting nodes failed.
+
+        Args:
+            failed (bool, optional): if the task failed. Defaults to False.
+
+        Returns:
+            HSession: session itself
+        """
+        self._tasks_since_restart += 1
+        if self.reset_mode == SessionResetMode.RESTART or failed or\
+            (self.restart_interval > 0 and self._tasks_since_restart >= self.restart_interval):
+            return self.restart_session()
+        try:
+            self.delete_task_nodes()
+        except AssertionError as error:
+            logging.error("Delete task nodes failed, restart session")
+            logging.error(error)
+            self.restart_session()
         return self
 
+    def delete_task_nodes(self):
+        """Delete top-level nodes created since begin_task, except persistent nodes
+
+        Returns:
+            HSession: session itself
+        """
+        keep_ids = self._baseline_node_ids | self._persistent_node_ids
+        for node_id in self.__get_top_level_node_ids() - keep_ids:
+            HAPI.delete_node(self.hapi_session, node_id)
+        kept_nodes = dict(self._baseline_nodes)
+        kept_nodes.update(self._persistent_nodes)
+        for node_id, node in self.nodes.items():
+            if node_id not in kept_nodes:
+                node.instantiated = False
+        self.nodes = kept_nodes
+        return self
+
+    def __get_top_level_node_ids(self):
+        obj_id = HAPI.get_manager_node_id(self.hapi_session, HDATA.NodeType.OBJ)
+        child_count = HAPI.compose_child_node_list(self.hapi_session, obj_id)
+        if child_count == 0:
+            return set()
+        return set(HAPI.get_composed_child_node_list(self.hapi_session, obj_id, child_count))
+
+    def __get_top_level_node_id(self, node_id):
+        obj_id = HAPI.get_manager_node_id(self.hapi_session, HDATA.NodeType.OBJ)
+        node_info = HAPI.get_node_info(self.hapi_session, node_id)
+        while node_info.parentId not in (obj_id, -1):
+            node_id = node_info.parentId
+            node_info = HAPI.get_node_info(self.hapi_session, node_id)
+        return node_id
+
     def load_hip(self, filename, cook_on_load=False):
         """Loads a .hip file into the main Houdini scene
 
@@ -218,6 +673,7 @@ class HSession():
 
     def __del__(self):
         self.check_and_close_existing_session()
+        self.stop_executor()
 
 class HSessionManager():
 
@@ -286,13 +742,17 @@ class HSessionManager():
         return None
 
     @staticmethod
-    def get_or_create_session_pool(session_count=4, rootpath=os.getcwd(), pipe_name = "hapi"):
+    def get_or_create_session_pool(session_count=4, rootpath=os.getcwd(), pipe_name = "hapi",# pylint: disable=too-many-arguments
+                                   threaded_sessions=False, preload_hdas=None):
         """Get or create an session pool
 
         Args:
             session_count (int, optional): number of sessions to start
             rootpath (str, optional): working directory of sessions
             pipe_name (str, optional): name prefix of pipe name communicate with hsession
+            threaded_sessions (bool, optional): run each session's task on a dedicated thread
+            preload_hdas (list(str), optional): hda files loaded into every session \
+                before the pool is ready
 
         Returns:
             HSessionPool: session pool created
@@ -306,8 +766,9 @@ class HSessionManager():
             HSessionManager._rootpath = rootpath
         if pipe_name:
             HSessionManager._pipe_name = pipe_name
-        session_pool = HSessionPool(session_count)
-        if session_pool.create_thrift_pipe_session(HSessionManager._rootpath, HSessionManager._pipe_name, True):
+        session_pool = HSessionPool(session_count, threaded_sessions=threaded_sessions)
+        if session_pool.create_thrift_pipe_session(HSessionManager._rootpath, HSessionManager._pipe_name, True,\
+            preload_hdas=preload_hdas):
             HSessionManager._defaultSessionPool = session_pool
             return HSessionManager._defaultSessionPool
         return None
@@ -315,25 +776,69 @@ class HSessionManager():
 
 class HSessionPool():
 
-    def __init__(self, session_count, max_task_time: int = 10000):
+    def __init__(self, session_count, max_task_time: int = 10000, threaded_sessions=False, parm_cache=None,# pylint: disable=too-many-arguments
+                 reset_mode=SessionResetMode.RESTART, restart_interval=0, affinity_wait=0.5,
+                 autoscaler=None, max_queue_size=0, interrupt_timeout=10.0, coalesce=False,
+                 metrics_sink=None):
         """Initialize the session pool
 
         Args:
             session_count (int): number of sessions
             max_task_time (int, optional): max running time of a session, otherwise kill the task
+            threaded_sessions (bool, optional): run each session's task on a dedicated \
+                executor thread, so blocking HAPI calls of different sessions run in parallel. \
+                    Defaults to False.
+            parm_cache (HParmSchemaCache, optional): param schema cache shared by all \
+                sessions of this pool. Defaults to None.
+            reset_mode (SessionResetMode, optional): how sessions are reset after each task. \
+                Defaults to SessionResetMode.RESTART.
+            restart_interval (int, optional): in DELETE_NODES mode, fully restart a session \
+                every this number of tasks, 0 to never. Defaults to 0.
+            affinity_wait (float, optional): seconds a task declaring hda files waits \
+                for a session already loaded them, before any idle session takes it. \
+                    Only useful with DELETE_NODES reset mode. Defaults to 0.5.
+            autoscaler (HSessionAutoscaler, optional): resize this pool by load \
+                while tasks are consumed. Defaults to None.
+            max_queue_size (int, optional): max number of tasks waiting in queue, \
+                producers wait for room when it is full, 0 if unbounded. Defaults to 0.
+            interrupt_timeout (float, optional): seconds to wait for a session to get \
+                ready after interrupting a task exceeding max_task_time, before hard \
+                    restarting it. Defaults to 10.0.
+            coalesce (bool, optional): a task identical to one queued or running, by \
+                task_key of its function, arguments and input files, attaches to that \
+                    execution instead of running again. Defaults to False.
+            metrics_sink (HMetricsSink, optional): receives spans of every finished task,\
+                e.g. an HMetricsCollector. Defaults to None.
 
         """
         self.sessions = []
         self._session_count = session_count
         self.current_id = 0
-        self.task_queue = asyncio.Queue()
+        self.task_queue = HSessionTaskQueue(self.sessions, affinity_wait, max_queue_size)
         self._loop = asyncio.get_event_loop()
         self._max_task_time = max_task_time
+        self._interrupt_timeout = interrupt_timeout
+        self._coalesce = coalesce
+        self.metrics_sink = metrics_sink
+        self._inflight = {}
         self._workers = None
         self._pipe_name_prefix = "hapi"
         self._root_path = os.getcwd()
         self._timeout = 10000
         self._auto_close = True
+        self._threaded_sessions = threaded_sessions
+        self._parm_cache = parm_cache
+        self._reset_mode = reset_mode
+        self._restart_interval = restart_interval
+        self._preload_hdas = []
+        self._next_session_index = 0
+        self._busy_sessions = set()
+        self._idle_since = {}
+        self._autoscale_task = None
+        self._consumer_thread = None
+        self._consumer_task = None
+        self._consumer_started = threading.Event()
+        self.autoscaler = autoscaler
 
     def __iter__(self):
         return iter(self.sessions)
@@ -350,32 +855,193 @@ class HSessionPool():
         return self.sessions[key]
 
     # for producer to add task
-    def enqueue_task(self, task, *args):
+    def enqueue_task(self, task, *args, hdas=None, priority=0, deadline=None):
         """enqueue a session task into session pool
 
         Args:
             task (func): a houdini task to run
             *args : arguments pass to this task
+            hdas (list(str), optional): hda files this task needs, \
+                prefer sessions already loaded them
+            priority (int, optional): tasks with higher priority run first. Defaults to 0.
+            deadline (float, optional): seconds from now the task must start in, \
+                otherwise it is dropped with asyncio.TimeoutError. Defaults to None.
+
+        Returns:
+            asyncio.Future: future object of task execution, with the task's result \
+                or exception. It gets asyncio.QueueFull if the queue is bounded and full,\
+                    use submit_task to wait for room
+        """
+        fut = self._loop.create_future()
+        logging.debug("enqueue task {0} with param {1}".format(task, args))
+        key = task_key(task, args, hdas) if self._coalesce else None
+        self._loop.call_soon_threadsafe(self.__put_or_reject,\
+            HSessionTaskItem(fut, task, args, hdas, priority, deadline), key)
+        return fut
+
+    def __put_or_reject(self, item, key=None):
+        if self.__attach_inflight(item, key):
+            return
+        fut = self.__share_inflight(item, key)
+        try:
+            self.task_queue.put_nowait(item)
+        except asyncio.QueueFull as error:
+            logging.warning("Task queue is full, reject task {0}".format(item.task))
+            self.__forget_inflight(key, item.fut)
+            fut.set_exception(error)
+
+    def __attach_inflight(self, item, key):
+        # attach caller's future to an identical task queued or running,
+        # a queued one takes the higher priority and later deadline of both callers
+        shared = self._inflight.get(key) if key is not None else None
+        if shared is None:
+            return False
+        logging.debug("coalesce task {0} with param {1}".format(item.task, item.args))
+        self.task_queue.merge(shared, item)
+        HSessionPool.__chain_future(shared.fut, item.fut)
+        return True
+
+    def __share_inflight(self, item, key):
+        # run the task with a shared future, so a caller cancelling its own future
+        # does not cancel others attached
+        fut = item.fut
+        if key is None:
+            return fut
+        item.fut = self._loop.create_future()
+        HSessionPool.__chain_future(item.fut, fut)
+        self._inflight[key] = item
+        item.fut.add_done_callback(functools.partial(self.__forget_inflight, key))
+        return fut
+
+    def __forget_inflight(self, key, shared):
+        inflight = self._inflight.get(key) if key is not None else None
+        if inflight is not None and inflight.fut is shared:
+            del self._inflight[key]
+
+    @staticmethod
+    def __chain_future(source, target):
+        def copy_state(source):
+            if target.done():
+                return
+            if source.cancelled():
+                target.cancel()
+            elif source.exception() is not None:
+                target.set_exception(source.exception())
+            else:
+                target.set_result(source.result())
+        source.add_done_callback(copy_state)
+
+    def submit_task(self, task, *args, timeout=None, **kwargs):
+        """enqueue a session task from a producer thread, block until the queue \
+            has room. The task consumer should be running on another thread, \
+                e.g. by run_task_consumer_on_background.
+
+        Args:
+            task (func): a houdini task to run
+            *args : arguments pass to this task
+            timeout (float, optional): max seconds to wait for room, None to wait forever
+            **kwargs : hdas, priority and deadline, see enqueue_task
 
         Returns:
             asyncio.Future: future object of task execution
         """
+        if self.__in_loop_thread():
+            raise RuntimeError("submit_task blocks the task consumer, use enqueue_task_async")
+        handle = asyncio.run_coroutine_threadsafe(\
+            self.__enqueue_item(task, args, **kwargs), self._loop)
+        try:
+            return handle.result(timeout)
+        except concurrent.futures.TimeoutError:
+            handle.cancel()
+            raise
+
+    def enqueue_many(self, tasks, timeout=None, **kwargs):
+        """enqueue session tasks from a producer thread, pulling them from an \
+            iterable only when the queue has room, so a generator of a large \
+                parameter sweep is never materialized
+
+        Args:
+            tasks (iterable((func, tuple))): task and its arguments
+            timeout (float, optional): max seconds to wait for room of each task, \
+                None to wait forever
+            **kwargs : hdas, priority and deadline of all tasks, see enqueue_task
+
+        Returns:
+            list(asyncio.Future): future objects of task execution
+        """
+        return [self.submit_task(task, *args, timeout=timeout, **kwargs) for task, args in tasks]
+
+    async def enqueue_many_async(self, tasks, **kwargs):
+        """enqueue session tasks asynch, pulling them from an iterable only when \
+            the queue has room
+
+        Args:
+            tasks (iterable((func, tuple))): task and its arguments
+            **kwargs : hdas, priority and deadline of all tasks, see enqueue_task
+
+        Returns:
+            list(asyncio.Future): future objects of task execution
+        """
+        futures = []
+        for task, args in tasks:
+            futures.append(await self.__enqueue_item(task, args, **kwargs))
+        return futures
+
+    @staticmethod
+    async def as_completed(futures):
+        """Iterate futures of enqueued tasks in completion order
+
+        Args:
+            futures (iterable(asyncio.Future)): futures returned by enqueue methods
+
+        Yields:
+            asyncio.Future: a completed future, get the task's return value or \
+                exception by its result()
+        """
+        pending = set(futures)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for fut in done:
+                yield fut
+
+    def __in_loop_thread(self):
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    async def __enqueue_item(self, task, args, hdas=None, priority=0, deadline=None):
         fut = self._loop.create_future()
         logging.debug("enqueue task {0} with param {1}".format(task, args))
-        self._loop.call_soon_threadsafe(self.task_queue.put_nowait, (fut, task, *args))
+        item = HSessionTaskItem(fut, task, args, hdas, priority, deadline)
+        key = task_key(task, args, hdas) if self._coalesce else None
+        while not self.__attach_inflight(item, key):
+            if not self.task_queue.full():
+                self.__share_inflight(item, key)
+                self.task_queue.put_nowait(item)
+                break
+            # an identical task could be enqueued while waiting for room
+            await self.task_queue.wait_not_full()
         return fut
 
     # for producer to add task
-    async def enqueue_task_async(self, task, *args):
+    async def enqueue_task_async(self, task, *args, hdas=None, priority=0, deadline=None):
         """enque a session task asynch
 
         Args:
             task (func): a houdini task to run
             *args : arguments pass to this task
+            hdas (list(str), optional): hda files this task needs, \
+                prefer sessions already loaded them
+            priority (int, optional): tasks with higher priority run first. Defaults to 0.
+            deadline (float, optional): seconds from now the task must start in, \
+                otherwise it is dropped with asyncio.TimeoutError. Defaults to None.
+
+        Returns:
+            asyncio.Future: future object of task execution, with the task's result \
+                or exception
         """
-        fut = self._loop.create_future()
-        logging.debug("enqueue task {0} with param {1}".format(task, args))
-        await self.task_queue.put((fut, task, *args))
+        return await self.__enqueue_item(task, args, hdas, priority, deadline)
 
     def run_on_task_producer(self, producer):
         """run a task producer and consuming task with session pool
@@ -392,12 +1058,13 @@ class HSessionPool():
         Args:
             producer (func): producer function to generate and enqueue tasks
         """
-        self._workers = [asyncio.create_task(self.__worker_loop(i)) for i in range(self._session_count)]
-        if producer is None:
-            await asyncio.gather(*self._workers, return_exceptions=True)
-        else:
-            task_producer = asyncio.create_task(producer())
-            await asyncio.gather(*self._workers, task_producer, return_exceptions=True)
+        self.__start_workers()
+        running = list(self._workers.values())
+        if self._autoscale_task is not None:
+            running.append(self._autoscale_task)
+        if producer is not None:
+            running.append(asyncio.create_task(producer()))
+        await asyncio.gather(*running, return_exceptions=True)
 
     def run_all_tasks(self):
         """run all enqueued tasks by now
@@ -408,10 +1075,36 @@ class HSessionPool():
     def run_task_consumer_on_background(self):
         """run task consumer on background thread
         """
-        t = threading.Thread(target=self.__loop_in_thread, args=(self._loop,self.run_on_task_producer_async(None)))
-        t.start()
+        if self.is_consuming_on_background():
+            return
+        self._consumer_started.clear()
+        self._consumer_thread = threading.Thread(target=self.__loop_in_thread,\
+            args=(self._loop,self.run_on_task_producer_async(None)))
+        self._consumer_thread.start()
+        self._consumer_started.wait()
+
+    def is_consuming_on_background(self):
+        """Check if task consumer is running on background thread
 
-    def create_thrift_pipe_session(self, rootpath, pipe_name_prefix, auto_close=True, timeout=10000.0):
+        Returns:
+            bool: if background consumer is running
+        """
+        return self._consumer_thread is not None and self._consumer_thread.is_alive()
+
+    def stop_task_consumer_on_background(self, wait=True):
+        """stop task consumer running on background thread, tasks running are cancelled
+
+        Args:
+            wait (bool, optional): wait for the background thread to finish. Defaults to True.
+        """
+        if not self.is_consuming_on_background():
+            return
+        self._loop.call_soon_threadsafe(self._consumer_task.cancel)
+        if wait:
+            self._consumer_thread.join()
+
+    def create_thrift_pipe_session(self, rootpath, pipe_name_prefix, auto_close=True, timeout=10000.0,# pylint: disable=too-many-arguments
+                                   preload_hdas=None):
         """Create the session in thrift-pipe manner
 
         Args:
@@ -425,20 +1118,20 @@ class HSessionPool():
                     fails to signal within this time interval, the start server \
                         call fails and the server process is terminated. \
                             Defaults to 10000.0.
+            preload_hdas (list(str), optional): hda files loaded into every session \
+                before this pool is ready. Defaults to None.
 
         Returns:
             bool: true if the session created successfully, false not.
         """
-        valid_session = 0
         self._root_path = rootpath
         self._timeout = timeout
         self._auto_close = auto_close
         self._pipe_name_prefix = pipe_name_prefix
-        for i in range(self._session_count):
-            session = HSession()
-            if session.create_thrift_pipe_session(rootpath, pipe_name_prefix+str(i), auto_close, timeout):
-                valid_session += 1
-                self.sessions.append(session)
+        self._preload_hdas = list(preload_hdas) if preload_hdas else []
+        for session in self.__start_sessions(self.__next_session_indices(self._session_count)):
+            self.__append_session(session)
+        valid_session = len(self.sessions)
         self._session_count = valid_session
         if valid_session>1:
             return True
@@ -457,75 +1150,360 @@ class HSessionPool():
     def resize(self, session_count):
         """resize the session pool to desired size
 
+        Sessions removed are closed at once, tasks running on them are cancelled,\
+            use an HSessionAutoscaler to shrink a running pool gracefully.
+
         Args:
             session_count (int): target size of this session pool
+
+        Returns:
+            HSessionPool: this session pool itself
         """
         if session_count < self._session_count:
-            for i in range(session_count, self._session_count):
-                self.sessions[i].check_and_close_existing_session()
-            for i in range(session_count, self._session_count):
-                self.sessions.remove(session_count)
-            self._session_count = session_count
+            removed = self.sessions[session_count:]
+            # sessions list is shared with task queue, shrink it in place
+            del self.sessions[session_count:]
+            for session in removed:
+                self.__remove_session(session)
+                self.__close_session(session)
+            self._session_count = len(self.sessions)
         elif session_count > self._session_count:
-            valid_session = 0
-            for i in range(self._session_count, session_count):
-                session = HSession()
-                if session.create_thrift_pipe_session(self._root_path, self._pipe_name_prefix+str(i), self._auto_close, self._timeout):
-                    valid_session += 1
-                    self.sessions.append(session)
-            self._session_count += valid_session
+            started = self.__start_sessions(\
+                self.__next_session_indices(session_count - self._session_count))
+            for session in started:
+                self.__append_session(session)
+            self._session_count = len(self.sessions)
+        return self
+
+    async def scale_up_async(self, count):
+        """Start sessions without blocking the event loop, and start their \
+            workers if tasks are being consumed
+
+        Args:
+            count (int): number of sessions to start
+
+        Returns:
+            int: number of sessions started
+        """
+        indices = self.__next_session_indices(count)
+        started = await asyncio.get_event_loop().run_in_executor(\
+            None, self.__start_sessions, indices)
+        for session in started:
+            self.__append_session(session)
+        self._session_count = len(self.sessions)
+        return len(started)
+
+    async def retire_idle_sessions_async(self, count, min_idle=0.0):
+        """Close sessions idle the longest, sessions running a task are never retired
+
+        Args:
+            count (int): max number of sessions to retire
+            min_idle (float, optional): only retire sessions idle for more than \
+                this seconds. Defaults to 0.0.
+
+        Returns:
+            int: number of sessions retired
+        """
+        idle_times = sorted(self.get_idle_times().items(), key=lambda kv: kv[1], reverse=True)
+        retired = 0
+        for session, idle_time in idle_times[:count]:
+            # check again, a session could take a task while others are closing
+            if idle_time < min_idle or session in self._busy_sessions\
+                or session not in self.sessions:
+                continue
+            self.sessions.remove(session)
+            self._session_count = len(self.sessions)
+            worker = self.__remove_session(session)
+            if worker is not None:
+                await asyncio.gather(worker, return_exceptions=True)
+            await asyncio.get_event_loop().run_in_executor(None, self.__close_session, session)
+            retired += 1
+        return retired
+
+    def get_idle_times(self):
+        """Get seconds each idle session has been idle
+
+        Returns:
+            dict(HSession,float): idle session to seconds idle
+        """
+        now = time.monotonic()
+        return {session: now - self._idle_since.get(session, now)\
+            for session in self.sessions if session not in self._busy_sessions}
+
+    def get_startup_timings(self):
+        """Get seconds each session spent on startup stages
+
+        Returns:
+            dict(str,dict(str,float)): pipe name to timings of start_server, \
+                connect, preload and total
+        """
+        return {session.pipe_name: dict(session.startup_timings) for session in self.sessions}
+
+    def __start_sessions(self, indices):
+        # servers block on start until ready, start them all in parallel threads
+        if not indices:
+            return []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(indices)) as executor:
+            sessions = list(executor.map(self.__start_session, indices))
+        return [session for session in sessions if session is not None]
+
+    def __start_session(self, index):
+        start = time.perf_counter()
+        session = HSession()
+        if not session.create_thrift_pipe_session(self._root_path, self._pipe_name_prefix+str(index),\
+            self._auto_close, self._timeout):
+            return None
+        if self._preload_hdas:
+            session.preload_asset_libraries(self._preload_hdas)
+        session.startup_timings["total"] = time.perf_counter() - start
+        logging.info("Session {0} ready in {1:.2f}s {2}".format(\
+            session.pipe_name, session.startup_timings["total"], session.startup_timings))
+        return session
+
+    def __append_session(self, session):
+        session.parm_cache = self._parm_cache
+        session.reset_mode = self._reset_mode
+        session.restart_interval = self._restart_interval
+        if self._threaded_sessions:
+            session.start_executor()
+        self.sessions.append(session)
+        self._idle_since[session] = time.monotonic()
+        if self._workers is not None:
+            self._workers[session] = asyncio.create_task(self.__worker_loop(session))
+
+    def __remove_session(self, session):
+        # forget a session already removed from sessions list, cancel its worker
+        self._idle_since.pop(session, None)
+        self._busy_sessions.discard(session)
+        worker = self._workers.pop(session, None) if self._workers is not None else None
+        if worker is not None:
+            worker.cancel()
+        return worker
+
+    @staticmethod
+    def __close_session(session):
+        session.check_and_close_existing_session()
+        session.stop_executor()
+
+    def __next_session_indices(self, count):
+        # pipe names are never reused, retired sessions' servers may still be closing
+        indices = list(range(self._next_session_index, self._next_session_index + count))
+        self._next_session_index += count
+        return indices
+
+    def __start_workers(self):
+        self._workers = {}
+        for session in self.sessions:
+            self._workers[session] = asyncio.create_task(self.__worker_loop(session))
+        if self.autoscaler is not None:
+            self._autoscale_task = asyncio.create_task(self.autoscaler.run(self))
 
     async def __run_tasks_available(self):
         """run all current tasks until queue is empty.
         """
-        self._workers = [asyncio.create_task(self.__worker_loop(i)) for i in range(self._session_count)]
+        self.__start_workers()
         await self.task_queue.join()
-        for worker in self._workers:
+        for worker in self._workers.values():
             worker.cancel()
+        if self._autoscale_task is not None:
+            self._autoscale_task.cancel()
+        self._workers = None
+        self._autoscale_task = None
 
-    async def __worker_loop(self, i):
+    async def __worker_loop(self, avail_session):
         """a consumer worker per houdini engine session
             ref: https://github.com/CaliDog/asyncpool
 
         Args:
-            i (int): id of HSession
+            avail_session (HSession): session this worker runs tasks on
         """
         while True:
             got_obj = False
+            metrics = None
 
             try:
-                avail_session = self.sessions[i]
-                fut, task_to_proceed, *args = await self.task_queue.get()
+                item = await self.task_queue.get(avail_session)
+                fut, task_to_proceed, args = item.fut, item.task, item.args
                 got_obj = True
-
-                running_coro = asyncio.wait_for(task_to_proceed(avail_session, *args), self._max_task_time, loop=self._loop)
-                await running_coro
+                if fut.cancelled():
+                    continue
+                self._busy_sessions.add(avail_session)
+                if self.metrics_sink is not None:
+                    metrics = self.__begin_task_metrics(avail_session, item)
+
+                # run_task_async dispatch to session's executor thread in threaded mode
+                running_coro = asyncio.wait_for(avail_session.run_task_async(task_to_proceed, *args), self._max_task_time)
+                with task_span(avail_session, SPAN_RUN):
+                    result = await running_coro
+                if not fut.done():
+                    fut.set_result(result)
             except asyncio.CancelledError as e:
-                logging.info("Worker {0} is Cancelled".format(i))
+                logging.info("Worker {0} is Cancelled".format(avail_session.pipe_name))
+                if metrics is not None:
+                    metrics.status = "cancelled"
+                if got_obj and not fut.done():
+                    fut.cancel()
                 break
             except KeyboardInterrupt as e:
-                logging.info("Worker {0} is Interrupt".format(i))
+                logging.info("Worker {0} is Interrupt".format(avail_session.pipe_name))
+                if metrics is not None:
+                    metrics.status = "cancelled"
+                if got_obj and not fut.done():
+                    fut.cancel()
                 break
+            except asyncio.TimeoutError as e:
+                logging.error("Task {0} exceeds max task time at session {1}".format(\
+                    task_to_proceed, avail_session.pipe_name))
+                if metrics is not None:
+                    metrics.status = "timeout"
+                if got_obj and not fut.done():
+                    fut.set_exception(e)
+                # release session only after houdini stops cooking and it is reset
+                with task_span(avail_session, SPAN_RESET):
+                    await avail_session.reclaim_async(self._interrupt_timeout)
             except (MemoryError, SystemExit) as e:
                 logging.exception(e)
+                if metrics is not None:
+                    metrics.status = "error"
+                if got_obj and not fut.done():
+                    fut.set_exception(e)
                 raise
             except BaseException as e:
                 logging.exception(e)
                 logging.exception("Worker Call Failed")
+                if metrics is not None:
+                    metrics.status = "error"
+                if got_obj and not fut.done():
+                    fut.set_exception(e)
             finally:
+                if metrics is not None:
+                    avail_session.task_metrics = None
+                    record_task_metrics(self.metrics_sink, metrics)
                 if got_obj:
-                    fut.set_result(True)
+                    self._busy_sessions.discard(avail_session)
+                    if avail_session in self.sessions:
+                        self._idle_since[avail_session] = time.monotonic()
                     self.task_queue.task_done()
 
+    @staticmethod
+    def __begin_task_metrics(session, item):
+        # spans of the task are collected on session while it runs
+        now = time.monotonic()
+        task_name = getattr(item.task, "__qualname__", None) or repr(item.task)
+        metrics = HTaskMetrics(task_name, session.pipe_name, time.time() - (now - item.enqueue_time))
+        metrics.add_span(SPAN_QUEUE_WAIT, now - item.enqueue_time)
+        session.task_metrics = metrics
+        return metrics
+
     def __loop_in_thread(self, loop, task):
         asyncio.set_event_loop(loop)
-        loop.run_until_complete(task)
+        self._consumer_task = loop.create_task(task)
+        loop.call_soon(self._consumer_started.set)
+        try:
+            loop.run_until_complete(self._consumer_task)
+        except asyncio.CancelledError:
+            logging.info("Task consumer is stopped")
+
+class HSessionPoolExecutor(concurrent.futures.Executor):
+
+    """A concurrent.futures.Executor running session tasks on an HSessionPool,\
+        so synchronous code such as thread based web servers could block on \
+            a task's future instead of polling it.
+
+    Attributes:
+        session_pool (HSessionPool): session pool running tasks
+    """
+
+    def __init__(self, session_pool):
+        """Initialize, start the pool's task consumer on background thread \
+            if it is not running
+
+        Args:
+            session_pool (HSessionPool): session pool running tasks
+        """
+        self.session_pool = session_pool
+        self._owns_consumer = not session_pool.is_consuming_on_background()
+        if self._owns_consumer:
+            session_pool.run_task_consumer_on_background()
+        self._futures = set()
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def submit(self, fn, *args, **kwargs):# pylint: disable=arguments-differ
+        """Submit a session task, block while the pool's task queue is full
+
+        Args:
+            fn (func): a houdini task to run, its first parameter is HSession
+            *args : arguments pass to this task
+            **kwargs : keyword arguments pass to this task
+
+        Returns:
+            concurrent.futures.Future: future of the task's result
+        """
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+        task = functools.partial(fn, **kwargs) if kwargs else fn
+        pool_fut = self.session_pool.submit_task(task, *args)
+        fut = asyncio.run_coroutine_threadsafe(\
+            HSessionPoolExecutor.__await_result(pool_fut), self.session_pool._loop)
+        with self._lock:
+            self._futures.add(fut)
+        fut.add_done_callback(self.__forget)
+        return fut
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        """Stop accepting tasks, and stop the pool's background consumer if \
+            this executor started it
+
+        Args:
+            wait (bool, optional): wait for submitted tasks to finish. Defaults to True.
+            cancel_futures (bool, optional): cancel tasks not started yet. Defaults to False.
+        """
+        with self._lock:
+            self._shutdown = True
+            futures = list(self._futures)
+        if cancel_futures:
+            for fut in futures:
+                fut.cancel()
+        if wait:
+            concurrent.futures.wait(futures)
+        if self._owns_consumer:
+            self.session_pool.stop_task_consumer_on_background(wait)
+
+    def __forget(self, fut):
+        with self._lock:
+            self._futures.discard(fut)
+
+    @staticmethod
+    async def __await_result(pool_fut):
+        # cancelling executor's future cancels pool's future, worker then skips the task
+        return await pool_fut
+
 
 def HSessionTask(task):
-    """A decorator for houdini's task
+    """A decorator for houdini's task, it resets the session after the task\
+        according to session's reset_mode. A cancelled task only interrupts the \
+            cook, the session is reset by HSession.reclaim_async, as HSessionPool \
+                does on timeout, or at the start of next task.
     """
+    @functools.wraps(task)
     async def wrapper(*args, **kwargs):
         assert isinstance(args[0], HSession), "{0}'s first parameter should be HSession".format(task)
-        await task(*args, **kwargs)
-        args[0].restart_session()
+        session = args[0]
+        session.begin_task()
+        try:
+            result = await task(*args, **kwargs)
+        except asyncio.CancelledError:
+            # houdini may still be cooking, leave reset to reclaim
+            session.interrupt()
+            session.needs_reclaim = True
+            raise
+        except BaseException:
+            with task_span(session, SPAN_RESET):
+                session.reset_after_task(True)
+            raise
+        with task_span(session, SPAN_RESET):
+            session.reset_after_task(False)
+        return result
     return wrapper
\ No newline at end of file
@@ -0,0 +1,422 @@
+# -*- coding: utf-8 -*-
+"""Task queue of HSessionPool
+Author  : Maajor
+Email   : info@ma-yidong.com
+
+HSessionTaskItem:
+    A task waiting in queue, with its future, arguments and scheduling hints
+
+HSessionTaskQueue:
+    A queue dispatching tasks to pool's workers by priority, then earliest\
+        deadline, then enqueue order. Each worker gets the first task fitting\
+            its session, e.g. prefer sessions which already loaded hda files \
+                the task needs. Tasks whose deadline passed are dropped. A bounded\
+                    queue makes producers wait for room.
+
+task_key:
+    Canonical hash of a task function, its arguments and input files they\
+        reference, identical requests share the same key
+
+Example usage:
+
+import pyhapi as ph
+
+session_pool = ph.HSessionManager.get_or_create_session_pool()
+
+#declare hda files the task needs, it prefers a session already loaded them
+session_pool.enqueue_task(session_task, 1, 2, hdas=["hda/save_cube.hda"])
+
+#an interactive task runs before batch ones, dropped if not started in 5 seconds
+session_pool.enqueue_task(session_task, 1, 2, priority=10, deadline=5.0)
+
+#duplicate requests in flight share one execution
+session_pool = ph.HSessionPool(4, coalesce=True)
+"""
+import os
+import time
+import asyncio
+import heapq
+import collections
+import functools
+import itertools
+import logging
+import pickle
+
+from .hcache import content_hash, canonicalize_file
+
+__all__ = [
+    # Classes
+    'HSessionTaskItem', 'HSessionTaskQueue',
+    # Functions
+    'task_key'
+]
+
+
+def task_key(task, args, hdas=None):
+    """Canonical hash of a task request. Hda files are hashed by file content, \
+        arguments by value, dicts and sets regardless of order.
+
+    Args:
+        task (func): a houdini task to run
+        args (tuple): arguments pass to this task
+        hdas (list(str), optional): hda files this task needs. Defaults to None.
+
+    Returns:
+        str: hex digest of the request, None if some argument cannot be hashed
+    """
+    try:
+        return content_hash((_canonical_task(task), tuple(args),\
+            sorted(canonicalize_file(hda) for hda in hdas or [])))
+    except (TypeError, ValueError, AttributeError, pickle.PicklingError) as error:
+        logging.debug("Task {0} cannot be hashed: {1}".format(task, error))
+        return None
+
+
+def _canonical_task(task):
+    if isinstance(task, functools.partial):
+        return ("partial", _canonical_task(task.func), task.args, task.keywords)
+    return ("func", task.__module__, task.__qualname__)
+
+
+class HSessionTaskItem():
+    """A task waiting in queue
+
+    Attributes:
+        fut (asyncio.Future): future of task execution
+        task (func): a houdini task to run
+        args (tuple): arguments pass to this task
+        hdas (list(str)): hda files this task needs
+        priority (int): tasks with higher priority run first
+        enqueue_time (float): time.monotonic() when enqueued
+        deadline (float): time.monotonic() the task must start before, None if no deadline
+    """
+
+    _counter = itertools.count()
+
+    def __init__(self, fut, task, args, hdas=None, priority=0, deadline=None):# pylint: disable=too-many-arguments
+        """Initialize
+
+        Args:
+            fut (asyncio.Future): future of task execution
+            task (func): a houdini task to run
+            args (tuple): arguments pass to this task
+            hdas (list(str), optional): hda files this task needs. Defaults to None.
+            priority (int, optional): tasks with higher priority run first. Defaults to 0.
+            deadline (float, optional): seconds from now the task must start in, \
+                None if no deadline. Defaults to None.
+        """
+        self.fut = fut
+        self.task = task
+        self.args = args
+        self.hdas = [os.path.abspath(hda) for hda in hdas] if hdas else []
+        self.priority = priority
+        self.enqueue_time = time.monotonic()
+        self.deadline = None if deadline is None else self.enqueue_time + deadline
+        self.sort_key = self.__make_sort_key()
+
+    def __make_sort_key(self):
+        return (-self.priority, float("inf") if self.deadline is None else self.deadline,\
+            next(HSessionTaskItem._counter))
+
+    def merge(self, other):
+        """Take the higher priority and the later deadline of an identical task, \
+            so running this one serves both. Sort key is renewed if either changed.
+
+        Args:
+            other (HSessionTaskItem): identical task
+
+        Returns:
+            bool: if priority or deadline changed
+        """
+        priority = max(self.priority, other.priority)
+        deadline = None if self.deadline is None or other.deadline is None\
+            else max(self.deadline, other.deadline)
+        if (priority, deadline) == (self.priority, self.deadline):
+            return False
+        self.priority, self.deadline = priority, deadline
+        self.sort_key = self.__make_sort_key()
+        return True
+
+    def is_expired(self, now=None):
+        """Check if the task's deadline passed
+
+        Args:
+            now (float, optional): current time.monotonic(). Defaults to None.
+
+        Returns:
+            bool: if deadline passed
+        """
+        if self.deadline is None:
+            return False
+        return (time.monotonic() if now is None else now) > self.deadline
+
+    def fits_session(self, session):
+        """Check if session already loaded all hda files this task needs
+
+        Args:
+            session (HSession): session to check
+
+        Returns:
+            bool: if session loaded all hda files
+        """
+        return all(session.has_asset_library(hda) for hda in self.hdas)
+
+
+class HSessionTaskQueue():
+    """A queue dispatching tasks to pool's workers, ordered by priority, then \
+        earliest deadline, then enqueue order. A task declaring hda files \
+        goes to a session which loaded them, if no such session is idle, it waits \
+            for at most affinity_wait seconds before any session could take it. \
+                A task whose deadline passed is dropped with asyncio.TimeoutError.
+
+    Attributes:
+        affinity_wait (float): seconds a task waits for a session loaded its hda files
+        maxsize (int): max number of tasks waiting in queue, 0 if unbounded
+    """
+
+    def __init__(self, sessions, affinity_wait=0.5, maxsize=0):
+        """Initialize
+
+        Args:
+            sessions (list(HSession)): all sessions of the pool
+            affinity_wait (float, optional): seconds a task waits for a session loaded\
+                its hda files. Defaults to 0.5.
+            maxsize (int, optional): max number of tasks waiting in queue, \
+                0 if unbounded. Defaults to 0.
+        """
+        self.affinity_wait = affinity_wait
+        self.maxsize = maxsize
+        self._sessions = sessions
+        self._putters = collections.deque()
+        # heaps of (order, item) entries, removed items are left and skipped at head
+        self._heap = []
+        self._deadlines = []
+        self._enqueued = []
+        self._queued = set()
+        self._waiters = set()
+        self._unfinished = 0
+        self._finished = asyncio.Event()
+        self._finished.set()
+
+    def qsize(self):
+        """Number of tasks waiting in queue
+
+        Returns:
+            int: number of tasks
+        """
+        return len(self._queued)
+
+    def empty(self):
+        """Check if no task waiting in queue
+
+        Returns:
+            bool: if queue is empty
+        """
+        return not self._queued
+
+    def full(self):
+        """Check if queue has no room for another task
+
+        Returns:
+            bool: if queue is full
+        """
+        return 0 < self.maxsize <= len(self._queued)
+
+    def oldest_wait(self):
+        """Seconds the oldest task in queue has waited
+
+        Returns:
+            float: seconds waited, 0 if queue is empty
+        """
+        self._prune(self._enqueued)
+        if not self._enqueued:
+            return 0.0
+        return time.monotonic() - self._enqueued[0][0]
+
+    def drop_expired(self):
+        """Drop tasks whose deadline passed, their futures get asyncio.TimeoutError
+
+        Returns:
+            int: number of tasks dropped
+        """
+        now = time.monotonic()
+        expired = []
+        while True:
+            self._prune(self._deadlines)
+            if not self._deadlines or not self._deadlines[0][-1].is_expired(now):
+                break
+            expired.append(heapq.heappop(self._deadlines)[-1])
+        for item in expired:
+            self._remove(item)
+            logging.warning("Drop task {0}, its deadline passed".format(item.task))
+            if item.fut is not None and not item.fut.done():
+                item.fut.set_exception(asyncio.TimeoutError(\
+                    "Deadline of task {0} passed before it started".format(item.task)))
+            self.task_done()
+        return len(expired)
+
+    def put_nowait(self, item):
+        """Put a task into queue
+
+        Args:
+            item (HSessionTaskItem): task to put
+
+        Raises:
+            asyncio.QueueFull: if queue is full
+        """
+        if self.full():
+            raise asyncio.QueueFull
+        self._push(item)
+        self._unfinished += 1
+        self._finished.clear()
+        self._wakeup()
+
+    def merge(self, item, other):
+        """Let a task in queue also serve an identical task not put, it takes \
+            the higher priority and the later deadline of both
+
+        Args:
+            item (HSessionTaskItem): task in queue
+            other (HSessionTaskItem): identical task
+
+        Returns:
+            bool: if item is still in queue, False if it is already running
+        """
+        sequence = item.sort_key[-1]
+        if sequence not in self._queued:
+            return False
+        if item.merge(other):
+            # entries of old sort key are left and skipped as removed ones
+            self._queued.discard(sequence)
+            self._push(item)
+        return True
+
+    async def put(self, item):
+        """Put a task into queue, wait until there is room if queue is full
+
+        Args:
+            item (HSessionTaskItem): task to put
+        """
+        await self.wait_not_full()
+        self.put_nowait(item)
+
+    async def wait_not_full(self):
+        """Wait until queue has room for another task
+        """
+        while self.full():
+            putter = asyncio.get_event_loop().create_future()
+            self._putters.append(putter)
+            try:
+                await putter
+            except BaseException:
+                putter.cancel()
+                try:
+                    self._putters.remove(putter)
+                except ValueError:
+                    pass
+                # pass the room to next producer if this one is cancelled after woken up
+                if not self.full() and not putter.cancelled():
+                    self._wakeup_putter()
+                raise
+
+    async def get(self, session):
+        """Get the task best fitting a session, wait if there is none
+
+        Args:
+            session (HSession): session of the worker getting task
+
+        Returns:
+            HSessionTaskItem: task to run
+        """
+        while True:
+            self.drop_expired()
+            item, retry_in = self._select(session)
+            if item is not None:
+                self._remove(item)
+                return item
+            waiter = asyncio.get_event_loop().create_future()
+            self._waiters.add(waiter)
+            try:
+                await asyncio.wait([waiter], timeout=retry_in)
+            finally:
+                self._waiters.discard(waiter)
+                if not waiter.done():
+                    waiter.cancel()
+
+    def task_done(self):
+        """Indicate a task got from queue is complete
+        """
+        self._unfinished -= 1
+        if self._unfinished <= 0:
+            self._unfinished = 0
+            self._finished.set()
+
+    async def join(self):
+        """Wait until all tasks put into queue are complete
+        """
+        await self._finished.wait()
+
+    def _push(self, item):
+        sequence = item.sort_key[-1]
+        self._queued.add(sequence)
+        heapq.heappush(self._heap, (item.sort_key, item))
+        heapq.heappush(self._enqueued, (item.enqueue_time, sequence, item))
+        if item.deadline is not None:
+            heapq.heappush(self._deadlines, (item.deadline, sequence, item))
+
+    def _remove(self, item):
+        self._queued.discard(item.sort_key[-1])
+        # rebuild heaps mostly made of removed items, keeps memory bounded by queue size
+        for heap in (self._heap, self._deadlines, self._enqueued):
+            if len(heap) > 2 * len(self._queued) + 64:
+                heap[:] = [entry for entry in heap if entry[-1].sort_key[-1] in self._queued]
+                heapq.heapify(heap)
+        self._wakeup_putter()
+
+    def _prune(self, heap):
+        # pop removed items at head of a heap
+        while heap and heap[0][-1].sort_key[-1] not in self._queued:
+            heapq.heappop(heap)
+
+    def _wakeup_putter(self):
+        while self._putters:
+            putter = self._putters.popleft()
+            if not putter.done():
+                putter.set_result(None)
+                break
+
+    def _select(self, session):
+        # first task in order eligible for this session, and seconds until an ineligible one
+        # becomes eligible or a deadline passes
+        # popping heap in order, ineligible tasks popped are pushed back
+        now = time.monotonic()
+        retry_in = None
+        selected = None
+        skipped = []
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            item = entry[-1]
+            if item.sort_key[-1] not in self._queued:
+                continue
+            waited = now - item.enqueue_time
+            if not item.hdas or item.fits_session(session) or waited >= self.affinity_wait or\
+                not any(item.fits_session(other) for other in self._sessions):
+                selected = item
+                break
+            skipped.append(entry)
+            remaining = self.affinity_wait - waited
+            retry_in = remaining if retry_in is None else min(retry_in, remaining)
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+        if selected is not None:
+            return selected, None
+        self._prune(self._deadlines)
+        if self._deadlines:
+            remaining = self._deadlines[0][0] - now
+            retry_in = remaining if retry_in is None else min(retry_in, remaining)
+        return None, retry_in
+
+    def _wakeup(self):
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
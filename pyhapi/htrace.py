@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""Tracing of HAPI calls
+Author  : Maajor
+Email   : info@ma-yidong.com
+
+HAPITracer:
+    A proxy of HAPI_LIB counting and timing every HAPI_* call per session, \
+        with latency histograms and bytes of arrays passed
+
+HAPICallStats:
+    Aggregated counts, latency histograms and bytes of HAPI calls
+
+hapi_profile:
+    A context manager capturing HAPI calls made in a block of code, \
+        to find RPC storms such as per-element string fetches
+
+Example usage:
+
+import pyhapi as ph
+
+with ph.hapi_profile() as profile:
+    session_task(session)
+print(profile.report(top=10))
+
+#or trace all calls of the process
+tracer = ph.HAPITracer.install()
+...
+print(tracer.stats.report())
+"""
+import time
+import bisect
+import threading
+import contextlib
+import ctypes
+
+from . import hdata as HDATA
+from . import hapi as HAPI
+
+__all__ = [
+    # Classes
+    'HAPITracer', 'HAPICallStats',
+    # Functions
+    'hapi_profile'
+]
+
+
+# guards installing and uninstalling the tracer of HAPI_LIB
+_INSTALL_LOCK = threading.Lock()
+
+
+def _session_id(args):
+    # HAPI_* functions taking a session get byref(session) first
+    if not args:
+        return None
+    obj = getattr(args[0], "_obj", None)
+    if isinstance(obj, HDATA.Session):
+        return obj.id
+    return None
+
+
+def _array_bytes(args):
+    # bytes of ctypes arrays and numpy arrays passed to a call, either direction
+    nbytes = 0
+    for arg in args:
+        obj = getattr(arg, "_obj", arg)
+        if isinstance(obj, ctypes.Array):
+            nbytes += ctypes.sizeof(obj)
+            continue
+        # pointer from ndarray.ctypes.data_as keeps its array
+        array = getattr(arg, "_arr", None)
+        if array is not None:
+            nbytes += getattr(array, "nbytes", 0)
+    return nbytes
+
+
+class HAPICallStats():
+    """Aggregated counts, latency histograms and bytes of HAPI calls, \
+        by function and session. It is thread-safe.
+
+    Attributes:
+        buckets (list(float)): upper bounds of latency histogram buckets in seconds
+    """
+
+    DEFAULT_BUCKETS = [0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0]
+
+    def __init__(self, buckets=None):
+        """Initialize
+
+        Args:
+            buckets (list(float), optional): upper bounds of latency histogram buckets \
+                in seconds. Defaults to DEFAULT_BUCKETS.
+        """
+        self.buckets = sorted(buckets or HAPICallStats.DEFAULT_BUCKETS)
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def record(self, func_name, session_id, seconds, nbytes=0):
+        """Record a call
+
+        Args:
+            func_name (str): name of HAPI function
+            session_id (int): id of session called on, None if call takes no session
+            seconds (float): seconds the call took
+            nbytes (int, optional): bytes of arrays passed. Defaults to 0.
+        """
+        key = (func_name, session_id)
+        with self._lock:
+            entry = self._calls.get(key)
+            if entry is None:
+                entry = self._calls[key] = [0, 0.0, 0, [0] * (len(self.buckets) + 1)]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += nbytes
+            entry[3][bisect.bisect_left(self.buckets, seconds)] += 1
+
+    def total_calls(self, session_id=None):
+        """Number of calls recorded
+
+        Args:
+            session_id (int, optional): count calls of this session only. Defaults to None.
+
+        Returns:
+            int: number of calls
+        """
+        with self._lock:
+            return sum(entry[0] for (_, call_session), entry in self._calls.items()\
+                if session_id is None or call_session == session_id)
+
+    def functions(self, session_id=None):
+        """Summary by HAPI function, sorted by total time descending
+
+        Args:
+            session_id (int, optional): summarize calls of this session only. Defaults to None.
+
+        Returns:
+            list(dict): name, calls, total_time, mean_time, bytes and histogram of each function
+        """
+        merged = {}
+        with self._lock:
+            for (func_name, call_session), (count, total, nbytes, histogram) in self._calls.items():
+                if session_id is not None and call_session != session_id:
+                    continue
+                summary = merged.setdefault(func_name, {"name": func_name, "calls": 0,\
+                    "total_time": 0.0, "bytes": 0, "histogram": [0] * len(histogram)})
+                summary["calls"] += count
+                summary["total_time"] += total
+                summary["bytes"] += nbytes
+                summary["histogram"] = [a + b for a, b in zip(summary["histogram"], histogram)]
+        for summary in merged.values():
+            summary["mean_time"] = summary["total_time"] / summary["calls"]
+        return sorted(merged.values(), key=lambda summary: summary["total_time"], reverse=True)
+
+    def sessions(self):
+        """Summary by session
+
+        Returns:
+            dict(int, dict): session id to its calls, total_time and bytes
+        """
+        merged = {}
+        with self._lock:
+            for (_, call_session), (count, total, nbytes, _) in self._calls.items():
+                summary = merged.setdefault(call_session, {"calls": 0, "total_time": 0.0, "bytes": 0})
+                summary["calls"] += count
+                summary["total_time"] += total
+                summary["bytes"] += nbytes
+        return merged
+
+    def to_dict(self):
+        """Convert to a json serializable dict
+
+        Returns:
+            dict: buckets, per function and per session summary
+        """
+        return {
+            "buckets": self.buckets,
+            "functions": self.functions(),
+            "sessions": [dict(summary, session=session_id)\
+                for session_id, summary in self.sessions().items()]}
+
+    def report(self, top=20, session_id=None):
+        """Format a text table of the most time consuming functions
+
+        Args:
+            top (int, optional): number of functions listed. Defaults to 20.
+            session_id (int, optional): report calls of this session only. Defaults to None.
+
+        Returns:
+            str: report text
+        """
+        lines = ["{0:<40}{1:>10}{2:>14}{3:>14}{4:>14}".format(\
+            "function", "calls", "total(ms)", "mean(us)", "bytes")]
+        for summary in self.functions(session_id)[:top]:
+            lines.append("{0:<40}{1:>10}{2:>14.3f}{3:>14.1f}{4:>14}".format(\
+                summary["name"], summary["calls"], summary["total_time"] * 1e3,\
+                    summary["mean_time"] * 1e6, summary["bytes"]))
+        return "\n".join(lines)
+
+    def clear(self):
+        """Clear all recorded calls
+        """
+        with self._lock:
+            self._calls.clear()
+
+
+class HAPITracer():
+    """A proxy of HAPI_LIB counting and timing every HAPI_* call, \
+        install it to trace all HAPI calls of this process
+
+    Attributes:
+        lib (CDLL): the wrapped HAPI library
+        stats (HAPICallStats): all calls traced
+    """
+
+    def __init__(self, lib, stats=None):
+        """Initialize
+
+        Args:
+            lib (CDLL): HAPI library to wrap
+            stats (HAPICallStats, optional): where calls are recorded. Defaults to a new one.
+        """
+        self.lib = lib
+        self.stats = HAPICallStats() if stats is None else stats
+        self._profiles = []
+        self._installs = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def install(stats=None):
+        """Replace hapi.HAPI_LIB with a tracer, or get the one installed. \
+            Installs are counted, each should be paired with an uninstall.
+
+        Args:
+            stats (HAPICallStats, optional): where calls are recorded. Defaults to a new one.
+
+        Returns:
+            HAPITracer: tracer installed
+        """
+        with _INSTALL_LOCK:
+            tracer = HAPI.HAPI_LIB
+            if not isinstance(tracer, HAPITracer):
+                tracer = HAPITracer(HAPI.HAPI_LIB, stats)
+                HAPI.HAPI_LIB = tracer
+            tracer._installs += 1
+            return tracer
+
+    @staticmethod
+    def uninstall():
+        """Undo an install, hapi.HAPI_LIB is restored to the wrapped library \
+            when every install is undone
+        """
+        with _INSTALL_LOCK:
+            tracer = HAPI.HAPI_LIB
+            if not isinstance(tracer, HAPITracer):
+                return
+            tracer._installs -= 1
+            if tracer._installs <= 0:
+                HAPI.HAPI_LIB = tracer.lib
+
+    def add_profile(self, stats):
+        """Also record calls into another stats, until removed
+
+        Args:
+            stats (HAPICallStats): stats to record into
+        """
+        with self._lock:
+            self._profiles = self._profiles + [stats]
+
+    def remove_profile(self, stats):
+        """Stop recording calls into a stats added
+
+        Args:
+            stats (HAPICallStats): stats added
+        """
+        with self._lock:
+            self._profiles = [profile for profile in self._profiles if profile is not stats]
+
+    def __getattr__(self, name):
+        func = getattr(self.lib, name)
+        if not name.startswith("HAPI_"):
+            return func
+        traced = self.__trace(name, func)
+        # cache wrapper, later lookups skip __getattr__
+        setattr(self, name, traced)
+        return traced
+
+    def __trace(self, name, func):
+        def traced(*args):
+            start = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                seconds = time.perf_counter() - start
+                session_id = _session_id(args)
+                nbytes = _array_bytes(args)
+                self.stats.record(name, session_id, seconds, nbytes)
+                for profile in self._profiles:
+                    profile.record(name, session_id, seconds, nbytes)
+        traced.__name__ = name
+        return traced
+
+
+@contextlib.contextmanager
+def hapi_profile(stats=None):
+    """Capture HAPI calls made in a block of code, from any thread. \
+        A tracer is installed until the last of overlapping blocks exits.
+
+    Args:
+        stats (HAPICallStats, optional): where calls are recorded. Defaults to a new one.
+
+    Yields:
+        HAPICallStats: calls made in the block
+    """
+    stats = HAPICallStats() if stats is None else stats
+    tracer = HAPITracer.install()
+    tracer.add_profile(stats)
+    try:
+        yield stats
+    finally:
+        tracer.remove_profile(stats)
+        HAPITracer.uninstall()
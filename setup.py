@@ -62,6 +62,7 @@ setup(
     python_requires=">=3.6",
     setup_requires=['pytest-runner'],
     install_requires=['numpy>=1.15.0'],
+    extras_require={'memory': ['psutil']},
     tests_require=['pytest', 'pytest-asyncio'],
     long_description_content_type="text/markdown",
     cmdclass={
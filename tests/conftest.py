@@ -3,9 +3,62 @@
 Author  : Maajor
 Email   : hello_myd@126.com
 """
+import os
+import sys
+import gc
+
 import pytest
 
-import pyhapi as ph
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import pyhapi as ph # pylint: disable=wrong-import-position
+from standin_hapi import StandInHAPILib # pylint: disable=wrong-import-position
+
+class FakeSession():
+    """Session without houdini server, running task coroutines in place \
+        and only knowing which hda files are loaded
+    """
+    process_id = -1
+
+    def __init__(self, hdas=None, pipe_name="fake"):
+        self.pipe_name = pipe_name
+        self.hdas = [os.path.abspath(hda) for hda in hdas or []]
+        self.task_metrics = None
+        self.reclaimed = 0
+
+    def has_asset_library(self, hda_path):
+        return os.path.abspath(hda_path) in self.hdas
+
+    async def run_task_async(self, task, *args):
+        return await task(self, *args)
+
+    async def reclaim_async(self, ready_timeout=10.0):
+        self.reclaimed += 1
+        return True
+
+@pytest.fixture(scope='function')
+def fake_session():
+    """Factory of sessions without houdini server, for testing pool and queue
+
+    Returns:
+        func: create a FakeSession from hda files it loaded and its pipe name
+    """
+    return FakeSession
+
+@pytest.fixture(scope='function')
+def standin_hapi():
+    """Run HAPI calls on a stand-in libHAPIL, for testing without houdini
+
+    Returns:
+        StandInHAPILib: stand-in library, to add nodes and parms to
+    """
+    saved_lib = ph.HAPI.HAPI_LIB
+    ph.HAPI.HAPI_LIB = StandInHAPILib()
+    try:
+        yield ph.HAPI.HAPI_LIB
+        # sessions released while they still reach the stand-in
+        gc.collect()
+    finally:
+        ph.HAPI.HAPI_LIB = saved_lib
 
 @pytest.fixture(scope='function')
 def init_session():
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""Test for offline benchmark harness
+Author  : Maajor
+Email   : hello_myd@126.com
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import bench_marshalling # pylint: disable=wrong-import-position
+
+def test_benchmark_regression_compare():
+    """Test benchmarks run on small sizes and regressions are reported against a baseline
+    """
+    current = bench_marshalling.run_benchmarks(sizes=[100], repeat=1, verbose=False)
+    assert set(current["results"].keys()) ==\
+        {"{0}/100".format(name) for name in bench_marshalling.BENCHMARKS}
+    assert current["results"]["commit_mesh/100"]["hapi_calls"] > 0
+
+    baseline = {"results": {key: dict(result, median=result["median"] * 2)\
+        for key, result in current["results"].items()}}
+    assert not any(regressed for _, _, _, regressed in bench_marshalling.compare(current, baseline))
+    baseline["results"]["get_faces/100"]["median"] = 0.0
+    assert [key for key, _, _, regressed in bench_marshalling.compare(current, baseline)\
+        if regressed] == ["get_faces/100"]
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""Test for HAPI wrappers, run on the stand-in libHAPIL
+Author  : Maajor
+Email   : hello_myd@126.com
+"""
+import numpy as np
+
+import pyhapi as ph
+
+def test_get_string_batch(standin_hapi):
+    """Test repeated string handles are fetched once, and strings come back in handle order
+    """
+    gamma, alpha, beta = [standin_hapi.intern(text) for text in ["gamma", "alpha", "beta"]]
+    session = ph.Session()
+    with ph.hapi_profile() as profile:
+        strings = ph.HAPI.get_string_batch(session, [gamma, alpha, gamma, beta, alpha, gamma])
+        empty = ph.HAPI.get_string_batch(session, [])
+
+    assert strings.tolist() == ["gamma", "alpha", "gamma", "beta", "alpha", "gamma"]
+    assert empty.shape == (0,)
+    # one batch of the three unique handles, buffer of their null terminated strings
+    assert sorted((entry["name"], entry["calls"], entry["bytes"]) for entry in profile.functions()) ==\
+        [("HAPI_GetStringBatch", 1, len(b"gamma\0alpha\0beta\0")),\
+            ("HAPI_GetStringBatchSize", 1, 3 * 4)]
+
+def test_get_parm_values(standin_hapi):
+    """Test parm values of a range are got in one call each, strings resolved in one batch
+    """
+    node_id = standin_hapi.add_node("parms", ph.NodeType.OBJ)
+    standin_hapi.add_parms(node_id, 10)
+    session = ph.Session()
+    with ph.hapi_profile() as profile:
+        ints = ph.HAPI.get_parm_int_values(session, node_id, 0, 6)
+        floats = ph.HAPI.get_parm_float_values(session, node_id, 1, 4)
+        strings = ph.HAPI.get_parm_string_values(session, node_id, 0, 2)
+        empty = ph.HAPI.get_parm_float_values(session, node_id, 0, 0)
+
+    assert ints.dtype == np.int32 and ints.tolist() == [0, 1, 0, 1, 0, 1]
+    assert floats.dtype == np.float32 and floats.tolist() == [1.0, 2.0, 3.0, 4.0]
+    assert strings.tolist() == ["value", "value"]
+    assert empty.shape == (0,)
+    assert sorted((entry["name"], entry["calls"]) for entry in profile.functions()) ==\
+        [("HAPI_GetParmFloatValues", 1), ("HAPI_GetParmIntValues", 1),\
+            ("HAPI_GetParmStringValues", 1), ("HAPI_GetStringBatch", 1),\
+                ("HAPI_GetStringBatchSize", 1)]
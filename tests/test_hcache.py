@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""Test for caches shared across nodes and sessions
+Author  : Maajor
+Email   : hello_myd@126.com
+"""
+import json
+
+import numpy as np
+
+import pyhapi as ph
+
+def test_parm_schema_cache_persist(tmp_path):
+    """Test param schema survives saving and loading cache
+    """
+    parm_info = ph.ParmInfo()
+    parm_info.id = 3
+    parm_info.nameSH = 11
+    parm_info.size = 4
+    parm_info.floatValuesIndex = 7
+    choice = ph.ParmChoiceInfo()
+    choice.parentParmId = 3
+    choice.labelSH = 12
+    schema = ph.HParmSchema([parm_info], [choice], {11: "vec4", 12: "label"})
+
+    parm_info.type = ph.ParmType.FLOAT
+    parm_info.invisible = True
+
+    cache_path = tmp_path / "parm_cache.json"
+    with ph.HParmSchemaCache(str(cache_path)) as cache:
+        cache.put(("hash", "Sop/dummy"), schema)
+        # nothing written on put, only on save or close
+        assert not cache_path.exists()
+    assert json.loads(cache_path.read_text())["schemas"][0]["key"] == ["hash", "Sop/dummy"]
+
+    loaded = ph.HParmSchemaCache(str(cache_path)).get(("hash", "Sop/dummy"))
+    assert loaded.parm_infos[0].size == 4
+    assert loaded.parm_infos[0].floatValuesIndex == 7
+    assert loaded.parm_infos[0].type == ph.ParmType.FLOAT and loaded.parm_infos[0].invisible
+    assert loaded.choice_lists[0].parentParmId == 3
+    assert loaded.string_table[loaded.parm_infos[0].nameSH] == "vec4"
+
+    # a file of other layout is ignored
+    cache_path.write_text(json.dumps({"parm_info": [], "schemas": []}))
+    assert len(ph.HParmSchemaCache(str(cache_path))) == 0
+
+def test_file_digest(tmp_path):
+    """Test file digest follows file content
+    """
+    hda_path = tmp_path / "dummy.hda"
+    hda_path.write_bytes(b"content")
+    assert ph.hcache.file_digest(str(hda_path)) == ph.hcache.file_digest(str(hda_path))
+    assert ph.hcache.file_digest(str(tmp_path / "missing.hda")) is None
+
+def test_geo_cache(tmp_path):
+    """Test geometries round trip through cache, with LRU eviction and hit/miss stats
+    """
+    hda_path = tmp_path / "dummy.hda"
+    hda_path.write_bytes(b"content")
+    vertices = np.array([[0, 0, 0], [0, 1, 0], [1, 0, 0], [1, 1, 0]], dtype=np.float32)
+    mesh = ph.HGeoMesh(vertices, np.array([[0, 1, 2], [1, 3, 2]], dtype=np.int32))
+    mesh.add_attrib(ph.AttributeOwner.PRIM, "id", np.array([[3], [5]], dtype=np.int32))
+
+    cache = ph.HGeoCache(str(tmp_path / "geos"), max_bytes=1<<20)
+    key = cache.make_key(str(hda_path), "Sop/dummy", {"seed": 1, "scale": 2.0})
+    assert key == cache.make_key(str(hda_path), "Sop/dummy", {"scale": 2.0, "seed": 1})
+    assert key != cache.make_key(str(hda_path), "Sop/dummy", {"seed": 1, "scale": 2.0},\
+        inputs=[mesh])
+    input_path = tmp_path / "input.obj"
+    input_path.write_bytes(b"v 0 0 0")
+    input_key = cache.make_key(str(hda_path), "Sop/dummy", {"seed": 1}, inputs=[str(input_path)])
+    input_path.write_bytes(b"v 1 1 1")
+    assert input_key != cache.make_key(str(hda_path), "Sop/dummy", {"seed": 1},\
+        inputs=[str(input_path)])
+    assert cache.get(key) is None
+    assert cache.put(key, [mesh])
+
+    geo = ph.HGeoCache(str(tmp_path / "geos")).get(key)[0]
+    assert isinstance(geo, ph.HGeoMesh)
+    assert geo.part_info.faceCount == 2
+    np.testing.assert_array_equal(geo.faces, mesh.faces)
+    np.testing.assert_array_equal(geo.get_attrib_data(ph.AttributeOwner.POINT, "P"), vertices)
+    assert list(geo.get_attrib_data(ph.AttributeOwner.PRIM, "id").ravel()) == [3, 5]
+    assert ph.hcache.geo_digest([geo]) == ph.hcache.geo_digest([mesh])
+
+    cache.get(key)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    cache.max_bytes = stats["bytes"]
+    other_key = cache.make_key(str(hda_path), "Sop/dummy", {"seed": 2})
+    cache.put(other_key, [mesh])
+    assert key not in cache and other_key in cache
+
+def test_buffer_pool():
+    """Test buffers released are reused by arrays of the same size bucket
+    """
+    pool = ph.HBufferPool(max_bytes=1 << 20)
+    first = pool.acquire((100, 3), np.float32)
+    assert first.shape == (100, 3) and first.flags.writeable
+    assert pool.release(first)
+    assert not pool.release(first)
+    second = pool.acquire((90, 3), np.float32)
+    assert np.shares_memory(first, second)
+    other = pool.acquire((90, 3), np.int32)
+    assert not np.shares_memory(second, other)
+    assert not pool.release(np.empty((3,), dtype=object))
+    # arrays not handed out by this pool are never taken in
+    assert not pool.release(np.empty((256,), dtype=np.float32)[:90])
+    assert not pool.release(ph.HBufferPool().acquire((90, 3), np.float32))
+    assert pool.stats()["hits"] == 1 and pool.stats()["misses"] == 2
+    pool.release(second)
+    pool.clear()
+    assert pool.stats()["bytes"] == 0
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""Test for scheduling of cook state polling
+Author  : Maajor
+Email   : hello_myd@126.com
+"""
+import pyhapi as ph
+
+def test_cook_time_model():
+    """Test cook polling is seeded by observed cook time and backs off
+    """
+    model = ph.HCookTimeModel(smoothing=0.5)
+    key = ("Sop/dummy", "/obj/dummy", "cook")
+    assert model.expected(key) is None
+    model.record(key, 2.0)
+    model.record(key, 4.0)
+    assert model.expected(key) == 3.0
+
+    intervals = ph.hcook.cook_poll_intervals(5.0, model.expected(key))
+    assert [round(next(intervals), 3) for _ in range(4)] == [2.7, 0.001, 0.002, 0.004]
+    # expected time of a slow cook never holds a query back longer than max interval
+    intervals = ph.hcook.cook_poll_intervals(0.1, model.expected(key))
+    assert [round(next(intervals), 3) for _ in range(3)] == [0.1, 0.001, 0.002]
+    intervals = ph.hcook.cook_poll_intervals(0.1)
+    assert max(next(intervals) for _ in range(20)) == 0.1
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""Test for geometry data held by HGeo
+Author  : Maajor
+Email   : hello_myd@126.com
+"""
+import numpy as np
+
+import pyhapi as ph
+
+def make_strip(size):
+    """A triangle strip of size points with normal and uv
+    """
+    points = np.zeros((size, 3), dtype=np.float32)
+    points[:, 0] = np.arange(size) // 2
+    points[:, 2] = np.arange(size) % 2
+    first = np.arange(max(size - 2, 0), dtype=np.int32)
+    mesh = ph.HGeoMesh(vertices=points, faces=np.stack([first, first + 1, first + 2], axis=1))
+    normals = np.zeros((size, 3), dtype=np.float32)
+    normals[:, 1] = 1.0
+    mesh.add_attrib(ph.AttributeOwner.POINT, "N", normals)
+    mesh.add_attrib(ph.AttributeOwner.VERTEX, "uv", np.zeros((mesh.vertex_count, 3), dtype=np.float32))
+    return mesh
+
+def test_mesh_topology():
+    """Test mesh topology is kept as a flat vertex list, dense or with face offsets
+    """
+    points = np.zeros((5, 3), dtype=np.float32)
+    quads = np.array([[0, 1, 2, 3], [1, 2, 3, 4]], dtype=np.int32)
+    mesh = ph.HGeoMesh(points, quads)
+    assert (mesh.face_size, mesh.face_offsets, mesh.vertex_count) == (4, None, 8)
+    assert np.shares_memory(mesh.faces, quads)
+    np.testing.assert_array_equal(mesh.faces, quads)
+    assert mesh.face_counts.tolist() == [4, 4]
+
+    ragged = ph.HGeoMesh(points, [[0, 1, 2], [1, 2, 3, 4]])
+    assert ragged.face_size is None
+    assert ragged.get_face_offsets().tolist() == [0, 3, 7]
+    assert isinstance(ragged.faces, ph.HFaceList)
+    assert ragged.faces.tolist() == [[0, 1, 2], [1, 2, 3, 4]]
+    assert ragged.faces[-1].tolist() == [1, 2, 3, 4]
+    assert (ragged.part_info.faceCount, ragged.part_info.vertexCount) == (2, 7)
+
+    same = ph.HGeoMesh(points, vertex_list=ragged.vertex_list, face_offsets=ragged.face_offsets)
+    assert same.faces.tolist() == ragged.faces.tolist()
+    dense = ph.HGeoMesh(points, vertex_list=quads.ravel(), face_offsets=[0, 4, 8])
+    assert dense.face_size == 4 and dense.faces.shape == (2, 4)
+
+def test_mesh_topology_copies_counted():
+    """Test topology not already contiguous int32 is copied once and counted
+    """
+    points = np.zeros((5, 3), dtype=np.float32)
+    quads = np.array([[0, 1, 2, 3], [1, 2, 3, 4]], dtype=np.int32)
+    copied = ph.HAPI.copied_bytes()
+    ph.HGeoMesh(points, quads)
+    assert ph.HAPI.copied_bytes() == copied
+
+    ph.HGeoMesh(points, quads.astype(np.int64))
+    assert ph.HAPI.copied_bytes() == copied + quads.nbytes
+
+def test_mesh_polygon_soup_constructors():
+    """Test meshes of mixed polygons are built from counts, ragged lists and per size arrays
+    """
+    points = np.zeros((6, 3), dtype=np.float32)
+    tris = np.array([[0, 1, 2], [2, 3, 4]], dtype=np.int32)
+    quads = np.array([[1, 2, 4, 5]], dtype=np.int32)
+    expected = [[0, 1, 2], [2, 3, 4], [1, 2, 4, 5]]
+
+    from_counts = ph.HGeoMesh.from_face_counts(points, [0, 1, 2, 2, 3, 4, 1, 2, 4, 5], [3, 3, 4])
+    from_ragged = ph.HGeoMesh.from_ragged(points, [np.array(face) for face in expected])
+    from_arrays = ph.HGeoMesh.from_polygon_arrays(points, tris, quads)
+    for mesh in (from_counts, from_ragged, from_arrays):
+        assert mesh.faces.tolist() == expected
+        assert mesh.face_counts.tolist() == [3, 3, 4]
+        assert (mesh.face_count, mesh.vertex_count) == (3, 10)
+
+    only_tris = ph.HGeoMesh.from_polygon_arrays(points, tris, None)
+    assert only_tris.face_size == 3
+    assert ph.HGeoMesh.from_ragged(points, []).face_count == 0
+
+def test_mesh_round_trip(standin_hapi):
+    """Test a mesh committed to a node comes back from get_display_geos
+    """
+    session = ph.HSession()
+    node = ph.HInputNode(session, "mesh")
+    mesh = make_strip(6)
+    node.set_geometry(mesh)
+    geos = node.get_display_geos()
+
+    assert len(geos) == 1
+    geo = geos[0]
+    np.testing.assert_array_equal(geo.get_attrib_data(ph.AttributeOwner.POINT, "P"),\
+        mesh.get_attrib_data(ph.AttributeOwner.POINT, "P"))
+    assert geo.get_attrib_data(ph.AttributeOwner.VERTEX, "uv").shape == (12, 3)
+    assert [list(face) for face in geo.faces] == mesh.faces.tolist()
+
+def test_ragged_mesh_round_trip(standin_hapi):
+    """Test a mesh of faces with different sizes keeps its topology through extraction
+    """
+    points = np.zeros((5, 3), dtype=np.float32)
+    mesh = ph.HGeoMesh(points, [[0, 1, 2], [1, 2, 3, 4], [0, 2, 4]])
+    session = ph.HSession()
+    node = ph.HInputNode(session, "mesh")
+    node.set_geometry(mesh)
+    geo = node.get_display_geos()[0]
+
+    assert geo.face_size is None
+    np.testing.assert_array_equal(geo.vertex_list, mesh.vertex_list)
+    assert geo.faces.tolist() == mesh.faces.tolist()
+
+def test_extract_into_buffers(standin_hapi):
+    """Test attributes and topology are extracted into caller's arrays and pooled buffers
+    """
+    session = ph.HSession()
+    node = ph.HInputNode(session, "mesh")
+    mesh = make_strip(6)
+    node.set_geometry(mesh)
+    part_info = ph.HAPI.get_part_info(session.hapi_session, node.node_id, 0)
+    positions = np.zeros((6, 3), dtype=np.float32)
+    buffer_pool = ph.HBufferPool()
+    geo = ph.HGeoMesh()
+    geo.extract_from_sop(session, part_info, node.node_id, 0,\
+        out={(ph.AttributeOwner.POINT, "P"): positions}, buffer_pool=buffer_pool)
+
+    assert geo.get_attrib_data(ph.AttributeOwner.POINT, "P") is positions
+    np.testing.assert_array_equal(positions, mesh.get_attrib_data(ph.AttributeOwner.POINT, "P"))
+    normals = geo.get_attrib_data(ph.AttributeOwner.POINT, "N")
+    assert normals.flags.writeable and normals[0, 1] == 1.0
+    assert geo.vertex_list.flags.writeable and geo.vertex_list.base is not None
+    np.testing.assert_array_equal(geo.vertex_list, mesh.vertex_list)
+    assert buffer_pool.stats()["misses"] == 5
+    assert buffer_pool.release_geos([geo]) == 3
+
+def test_commit_without_copies(standin_hapi):
+    """Test committing contiguous arrays copies nothing, and other layouts are counted
+    """
+    session = ph.HSession()
+    node = ph.HInputNode(session, "mesh")
+    mesh = make_strip(6)
+    node.set_geometry(mesh)
+    assert mesh.copied_bytes == 0
+
+    strided = np.zeros((6, 6), dtype=np.float64)[:, ::2]
+    mesh.add_attrib(ph.AttributeOwner.POINT, "Cd", strided)
+    node.set_geometry(mesh)
+    assert mesh.copied_bytes == strided.nbytes
+    geos = node.get_display_geos()
+    np.testing.assert_array_equal(geos[0].get_attrib_data(ph.AttributeOwner.POINT, "Cd"), strided)
+
+def test_selective_lazy_extraction(standin_hapi):
+    """Test only attributes passing filters are fetched, and lazy ones on first access
+    """
+    session = ph.HSession()
+    node = ph.HInputNode(session, "mesh")
+    node.set_geometry(make_strip(6))
+    with ph.hapi_profile() as profile:
+        geo = node.get_display_geos(include=["P", (ph.AttributeOwner.POINT, "N")])[0]
+    assert sorted(name for name, _ in geo.get_attrib_names()) == ["N", "P"]
+    assert [entry["calls"] for entry in profile.functions()\
+        if entry["name"] == "HAPI_GetAttributeFloatData"] == [2]
+
+    geo = node.get_display_geos(exclude=[(ph.AttributeOwner.VERTEX, "*")], lazy=True)[0]
+    assert not geo.attribs and len(geo.lazy_attribs) == 2
+    assert geo.get_attrib_data(ph.AttributeOwner.POINT, "N")[0, 1] == 1.0
+    assert list(geo.lazy_attribs) == [(ph.AttributeOwner.POINT, "P")]
+    geo.fetch_attribs()
+    assert not geo.lazy_attribs and geo.get_attrib_data(ph.AttributeOwner.POINT, "P").shape == (6, 3)
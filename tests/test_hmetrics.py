@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Test for latency instrumentation of session tasks
+Author  : Maajor
+Email   : hello_myd@126.com
+"""
+import asyncio
+import json
+
+import pyhapi as ph
+from pyhapi.hmetrics import SPAN_QUEUE_WAIT, SPAN_COOK, SPAN_RUN
+
+async def cook_task(session, value):
+    """Spend a cook span on an asset, fail on negative
+    """
+    with ph.task_span(session, SPAN_COOK, "box"):
+        await asyncio.sleep(0.01)
+    if value < 0:
+        raise ValueError(value)
+    return value
+
+def test_metrics_collector():
+    """Test spans are aggregated by stage and asset and exported
+    """
+    collector = ph.HMetricsCollector(buckets=[0.1, 1.0])
+    metrics = ph.HTaskMetrics("task", "session0")
+    metrics.add_span(SPAN_COOK, 0.05, "box")
+    metrics.add_span(SPAN_COOK, 0.5)
+    metrics.add_span(SPAN_QUEUE_WAIT, 2.0)
+    collector.record(metrics)
+
+    text = collector.to_prometheus()
+    assert 'pyhapi_task_span_seconds_bucket{span="cook",asset="box",le="0.1"} 1' in text
+    assert 'pyhapi_task_span_seconds_bucket{span="cook",asset="",le="0.1"} 0' in text
+    assert 'pyhapi_task_span_seconds_bucket{span="cook",asset="",le="1.0"} 1' in text
+    assert 'pyhapi_task_span_seconds_bucket{span="queue_wait",asset="",le="+Inf"} 1' in text
+    assert 'pyhapi_tasks_total{task="task",session="session0",status="ok"} 1' in text
+
+    data = json.loads(collector.to_json())
+    assert len(data["spans"]) == 3
+    assert data["recent"][0]["assets"] == ["box"]
+    collector.clear()
+    assert json.loads(collector.to_json())["spans"] == []
+
+def test_session_pool_metrics(fake_session):
+    """Test pool records spans of every task to its sink
+    """
+    collector = ph.HMetricsCollector()
+
+    async def run():
+        session_pool = ph.HSessionPool(1, metrics_sink=collector)
+        session = fake_session()
+        session_pool.sessions.append(session)
+        futures = [await session_pool.enqueue_task_async(cook_task, value) for value in (1, -1)]
+        consumer = asyncio.ensure_future(session_pool.run_on_task_producer_async(None))
+        await asyncio.wait(futures)
+        consumer.cancel()
+        await asyncio.gather(consumer, return_exceptions=True)
+        assert isinstance(futures[1].exception(), ValueError)
+        return session
+
+    session = asyncio.run(run())
+    assert session.task_metrics is None
+    recent = list(collector.recent)
+    assert [metrics.status for metrics in recent] == ["ok", "error"]
+    for metrics in recent:
+        assert metrics.task_name == "cook_task"
+        assert metrics.session_id == "fake"
+        assert metrics.spans[SPAN_RUN] >= metrics.asset_spans[(SPAN_COOK, "box")] > 0
+        assert SPAN_QUEUE_WAIT in metrics.spans
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""Test for autoscaling of session pool
+Author  : Maajor
+Email   : hello_myd@126.com
+"""
+import os
+
+import pyhapi as ph
+
+def test_autoscale_delta():
+    """Test grow on queue wait and depth, shrink idle sessions after cooldown
+    """
+    scaler = ph.HSessionAutoscaler(min_sessions=1, max_sessions=4, max_queue_wait=1.0,\
+        max_queue_depth=8, idle_cooldown=60.0, scale_step=2)
+    assert scaler.scale_delta(0, 4, 0, 0.0, []) == 1
+    assert scaler.scale_delta(2, 4, 3, 2.0, []) == 2
+    assert scaler.scale_delta(3, 4, 9, 0.1, []) == 1
+    assert scaler.scale_delta(4, 4, 9, 5.0, []) == 0
+    assert scaler.scale_delta(2, 4, 3, 0.5, []) == 0
+    assert scaler.scale_delta(3, 4, 0, 0.0, [120.0, 90.0, 10.0]) == -2
+    assert scaler.scale_delta(2, 4, 0, 0.0, [120.0, 90.0]) == -1
+    assert scaler.scale_delta(3, 4, 2, 0.5, [120.0]) == 0
+
+def test_autoscale_memory_budget(fake_session):
+    """Test pool capacity is bounded by memory budget
+    """
+    scaler = ph.HSessionAutoscaler(min_sessions=1, max_sessions=8,\
+        memory_budget=5<<30, session_memory=2<<30)
+    # session whose server process cannot be measured
+    sessions = [fake_session()]
+    assert scaler.capacity(sessions) == 2
+    assert scaler.capacity(sessions * 2) == 2
+    # 3 sessions of 2GB are over a 5GB budget
+    capacity = scaler.capacity(sessions * 3)
+    assert capacity == 2
+    assert scaler.scale_delta(3, capacity, 0, 0.0, [1.0, 1.0]) == -1
+    assert scaler.capacity(sessions * 6) == 2
+
+def test_autoscale_measured_memory(fake_session):
+    """Test a session whose server process is measurable uses its resident memory
+    """
+    scaler = ph.HSessionAutoscaler(session_memory=1<<50)
+    session = fake_session()
+    session.process_id = os.getpid()
+    assert 0 < scaler.session_memory_usage(session) < 1<<50
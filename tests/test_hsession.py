@@ -3,6 +3,8 @@
 Author  : Maajor
 Email   : hello_myd@126.com
 """
+import pytest
+
 import pyhapi as ph
 
 def test_init_session(init_session):
@@ -25,3 +27,30 @@ def test_load_hip(init_session):
     """
     #session = ph.HSessionManager.get_or_create_default_session()
     init_session.load_hip("hda/FourShapes.hip", True)
+
+def test_session_executor():
+    """Test executor runs calls on its dedicated thread
+    """
+    import threading
+    executor = ph.HSessionExecutor("test-executor")
+    thread_name = executor.call(lambda: threading.current_thread().name).result()
+    assert thread_name == "test-executor"
+    executor.shutdown()
+    assert not executor.is_running()
+
+@ph.HSessionTask
+async def _instantiate_task(session):
+    hda_asset = ph.HAsset(session, "hda/FourShapes.hda")
+    return hda_asset.instantiate(node_name="Processor")
+
+@pytest.mark.asyncio
+async def test_reset_delete_nodes(init_session):
+    """Test resetting session by deleting task nodes keeps asset libraries
+    """
+    init_session.reset_mode = ph.SessionResetMode.DELETE_NODES
+    try:
+        node = await _instantiate_task(init_session)
+        assert not node.instantiated
+        assert init_session.has_asset_library("hda/FourShapes.hda")
+    finally:
+        init_session.reset_mode = ph.SessionResetMode.RESTART
@@ -3,9 +3,172 @@
 Author  : Maajor
 Email   : hello_myd@126.com
 """
+import asyncio
+
 import pyhapi as ph
 
 def test_init_session_pool(init_session_pool):
     """[summary]
     """
     assert init_session_pool._session_count == 5
+
+def test_session_pool_startup_timings(init_session_pool):
+    """Every session reports its startup timings
+    """
+    timings = init_session_pool.get_startup_timings()
+    assert len(timings) == init_session_pool._session_count
+    for session_timings in timings.values():
+        assert session_timings["total"] >= session_timings["start_server"]
+
+async def echo_task(session, value):
+    """Return value after a delay, fail on negative
+    """
+    await asyncio.sleep(0.01 * abs(value))
+    if value < 0:
+        raise ValueError(value)
+    return value
+
+def test_session_pool_results(fake_session):
+    """Test task results and exceptions come back through futures in completion order
+    """
+    async def run():
+        session_pool = ph.HSessionPool(1)
+        session_pool.sessions.append(fake_session())
+        futures = [await session_pool.enqueue_task_async(echo_task, value) for value in (3, -1, 2)]
+        consumer = asyncio.ensure_future(session_pool.run_on_task_producer_async(None))
+        completed = []
+        async for fut in session_pool.as_completed(futures):
+            completed.append(fut.result() if fut.exception() is None else type(fut.exception()))
+        consumer.cancel()
+        await asyncio.gather(consumer, return_exceptions=True)
+        return completed
+
+    assert asyncio.run(run()) == [3, ValueError, 2]
+
+def test_session_pool_executor(fake_session):
+    """Test blocking on executor futures from synchronous code
+    """
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    session_pool = ph.HSessionPool(1)
+    session_pool.sessions.append(fake_session())
+    executor = ph.HSessionPoolExecutor(session_pool)
+    try:
+        assert list(executor.map(echo_task, [1, 2, 3], timeout=5.0)) == [1, 2, 3]
+        failed = executor.submit(echo_task, -1)
+        assert isinstance(failed.exception(timeout=5.0), ValueError)
+    finally:
+        executor.shutdown()
+    assert not session_pool.is_consuming_on_background()
+
+def test_session_pool_interrupt_timeout(fake_session):
+    """Test a task exceeding max task time interrupts its session before next task
+    """
+    async def run():
+        session = fake_session()
+        session_pool = ph.HSessionPool(1, max_task_time=0.05)
+        session_pool.sessions.append(session)
+        slow = await session_pool.enqueue_task_async(echo_task, 100)
+        fast = await session_pool.enqueue_task_async(echo_task, 1)
+        consumer = asyncio.ensure_future(session_pool.run_on_task_producer_async(None))
+        await asyncio.wait_for(asyncio.wait([slow, fast]), 1.0)
+        consumer.cancel()
+        await asyncio.gather(consumer, return_exceptions=True)
+        return isinstance(slow.exception(), asyncio.TimeoutError), fast.result(), session.reclaimed
+
+    assert asyncio.run(run()) == (True, 1, 1)
+
+def test_session_pool_coalesce(fake_session):
+    """Test identical tasks in flight share one execution
+    """
+    async def run():
+        session_pool = ph.HSessionPool(1, coalesce=True)
+        session_pool.sessions.append(fake_session())
+        futures = [await session_pool.enqueue_task_async(echo_task, value) for value in (2, 2, 3)]
+        queued = session_pool.task_queue.qsize()
+        consumer = asyncio.ensure_future(session_pool.run_on_task_producer_async(None))
+        results = await asyncio.wait_for(asyncio.gather(*futures), 1.0)
+        consumer.cancel()
+        await asyncio.gather(consumer, return_exceptions=True)
+        return queued, results
+
+    assert asyncio.run(run()) == (2, [2, 2, 3])
+
+def test_session_pool_coalesce_priority_and_deadline(fake_session):
+    """Test a caller attaching to a queued twin lifts its priority and relaxes its deadline
+    """
+    async def run():
+        session_pool = ph.HSessionPool(1, coalesce=True)
+        session_pool.sessions.append(fake_session())
+        completed = []
+        async def record(session, value):
+            completed.append(value)
+            return value
+        twin = await session_pool.enqueue_task_async(record, "twin", deadline=0.01)
+        other = await session_pool.enqueue_task_async(record, "other", priority=1)
+        attached = await session_pool.enqueue_task_async(record, "twin", priority=2)
+        await asyncio.sleep(0.02)
+        consumer = asyncio.ensure_future(session_pool.run_on_task_producer_async(None))
+        results = await asyncio.wait_for(asyncio.gather(twin, other, attached), 1.0)
+        consumer.cancel()
+        await asyncio.gather(consumer, return_exceptions=True)
+        return results, completed
+
+    assert asyncio.run(run()) == (["twin", "other", "twin"], ["twin", "other"])
+
+class ResetSession(ph.HSession):
+    """HSession without server, recording resets and reclaims
+    """
+    pipe_name = "reset"
+    process_id = -1
+    executor = None
+    task_metrics = None
+
+    def __init__(self):# pylint: disable=super-init-not-called
+        self.needs_reclaim = False
+        self.resets = []
+        self.reclaimed = 0
+
+    def __del__(self):
+        pass
+
+    def has_asset_library(self, hda_path):
+        return False
+
+    def begin_task(self):
+        pass
+
+    def interrupt(self):
+        return True
+
+    def reset_after_task(self, failed=False):
+        self.resets.append(failed)
+        return self
+
+    async def reclaim_async(self, ready_timeout=10.0, poll_interval=0.05):
+        self.reclaimed += 1
+        self.needs_reclaim = False
+        return True
+
+@ph.HSessionTask
+async def reset_task(session, value):
+    """HSessionTask returning value after a delay
+    """
+    return await echo_task(session, value)
+
+def test_session_pool_timeout_reclaims_once():
+    """Test a timed out HSessionTask is reset only by the pool's reclaim
+    """
+    async def run():
+        session = ResetSession()
+        session_pool = ph.HSessionPool(1, max_task_time=0.05)
+        session_pool.sessions.append(session)
+        slow = await session_pool.enqueue_task_async(reset_task, 100)
+        fast = await session_pool.enqueue_task_async(reset_task, 1)
+        consumer = asyncio.ensure_future(session_pool.run_on_task_producer_async(None))
+        await asyncio.wait_for(asyncio.wait([slow, fast]), 1.0)
+        consumer.cancel()
+        await asyncio.gather(consumer, return_exceptions=True)
+        return isinstance(slow.exception(), asyncio.TimeoutError), fast.result(),\
+            session.reclaimed, session.resets, session.needs_reclaim
+
+    assert asyncio.run(run()) == (True, 1, 1, [False], False)
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""Test for task queue of session pool
+Author  : Maajor
+Email   : hello_myd@126.com
+"""
+import asyncio
+
+import pyhapi as ph
+
+def test_queue_prefers_loaded_session(fake_session):
+    """Test task declaring hda goes to session loaded it
+    """
+    cold, warm = fake_session([]), fake_session(["hda/save_cube.hda"])
+
+    async def run():
+        queue = ph.HSessionTaskQueue([cold, warm], affinity_wait=10.0)
+        queue.put_nowait(ph.HSessionTaskItem(None, "cube", (), ["hda/save_cube.hda"]))
+        queue.put_nowait(ph.HSessionTaskItem(None, "plain", ()))
+        cold_item = await queue.get(cold)
+        warm_item = await queue.get(warm)
+        return cold_item.task, warm_item.task
+
+    assert asyncio.run(run()) == ("plain", "cube")
+
+def test_queue_affinity_fallback(fake_session):
+    """Test task falls back to any session after affinity wait
+    """
+    cold, warm = fake_session([]), fake_session(["hda/save_cube.hda"])
+
+    async def run():
+        queue = ph.HSessionTaskQueue([cold, warm], affinity_wait=0.05)
+        queue.put_nowait(ph.HSessionTaskItem(None, "cube", (), ["hda/save_cube.hda"]))
+        item = await asyncio.wait_for(queue.get(cold), 1.0)
+        queue.task_done()
+        await asyncio.wait_for(queue.join(), 1.0)
+        return item.task
+
+    assert asyncio.run(run()) == "cube"
+
+def test_queue_priority_and_deadline(fake_session):
+    """Test higher priority first, earliest deadline first within a priority
+    """
+    session = fake_session([])
+
+    async def run():
+        queue = ph.HSessionTaskQueue([session])
+        queue.put_nowait(ph.HSessionTaskItem(None, "batch", ()))
+        queue.put_nowait(ph.HSessionTaskItem(None, "late", (), priority=1, deadline=60.0))
+        queue.put_nowait(ph.HSessionTaskItem(None, "soon", (), priority=1, deadline=30.0))
+        queue.put_nowait(ph.HSessionTaskItem(None, "urgent", (), priority=2))
+        return [(await queue.get(session)).task for _ in range(4)]
+
+    assert asyncio.run(run()) == ["urgent", "soon", "late", "batch"]
+
+def test_queue_merge(fake_session):
+    """Test a queued task merged with an identical one takes the higher priority \
+        and the later deadline, and a running one is not merged
+    """
+    session = fake_session([])
+
+    async def run():
+        queue = ph.HSessionTaskQueue([session])
+        twin = ph.HSessionTaskItem(None, "twin", (), deadline=0.01)
+        queue.put_nowait(twin)
+        queue.put_nowait(ph.HSessionTaskItem(None, "other", (), priority=1))
+        assert queue.merge(twin, ph.HSessionTaskItem(None, "twin", (), priority=2))
+        assert (twin.priority, twin.deadline, queue.qsize()) == (2, None, 2)
+        await asyncio.sleep(0.02)
+        order = [(await queue.get(session)).task for _ in range(2)]
+        return order, queue.merge(twin, ph.HSessionTaskItem(None, "twin", (), priority=3))
+
+    assert asyncio.run(run()) == (["twin", "other"], False)
+
+def test_queue_drop_expired(fake_session):
+    """Test task whose deadline passed is dropped with TimeoutError
+    """
+    session = fake_session([])
+
+    async def run():
+        queue = ph.HSessionTaskQueue([session])
+        expired = asyncio.get_event_loop().create_future()
+        queue.put_nowait(ph.HSessionTaskItem(expired, "expired", (), priority=1, deadline=0.01))
+        queue.put_nowait(ph.HSessionTaskItem(None, "plain", ()))
+        await asyncio.sleep(0.02)
+        item = await queue.get(session)
+        queue.task_done()
+        await asyncio.wait_for(queue.join(), 1.0)
+        return item.task, isinstance(expired.exception(), asyncio.TimeoutError)
+
+    assert asyncio.run(run()) == ("plain", True)
+
+def test_queue_bounded_backpressure(fake_session):
+    """Test producer waits for room in a bounded queue
+    """
+    session = fake_session([])
+
+    async def run():
+        queue = ph.HSessionTaskQueue([session], maxsize=1)
+        await queue.put(ph.HSessionTaskItem(None, "first", ()))
+        producer = asyncio.ensure_future(queue.put(ph.HSessionTaskItem(None, "second", ())))
+        await asyncio.sleep(0.01)
+        blocked = not producer.done() and queue.full()
+        first = await queue.get(session)
+        await asyncio.wait_for(producer, 1.0)
+        second = await queue.get(session)
+        return blocked, first.task, second.task
+
+    assert asyncio.run(run()) == (True, "first", "second")
+
+def test_task_key(tmp_path):
+    """Test task key is canonical over argument order and follows hda file content, \
+        while string arguments are values even if naming a file
+    """
+    hda_path = tmp_path / "dummy.hda"
+    hda_path.write_bytes(b"hda")
+    input_path = tmp_path / "input.obj"
+    input_path.write_bytes(b"v 0 0 0")
+
+    async def task(session, params, path):
+        return params, path
+
+    key = ph.task_key(task, ({"a": 1, "b": [1.0, 2.0]}, str(input_path)), [str(hda_path)])
+    assert key == ph.task_key(task, ({"b": [1.0, 2.0], "a": 1}, str(input_path)), [str(hda_path)])
+    assert key != ph.task_key(task, ({"a": 2, "b": [1.0, 2.0]}, str(input_path)), [str(hda_path)])
+    input_path.write_bytes(b"v 1 1 1 1")
+    assert key == ph.task_key(task, ({"a": 1, "b": [1.0, 2.0]}, str(input_path)), [str(hda_path)])
+    hda_path.write_bytes(b"hda changed")
+    assert key != ph.task_key(task, ({"a": 1, "b": [1.0, 2.0]}, str(input_path)), [str(hda_path)])
+
+def test_queue_large_drain(fake_session):
+    """Test a large queue drains in order, with expired tasks dropped from deadline heap
+    """
+    session = fake_session([])
+
+    async def run():
+        queue = ph.HSessionTaskQueue([session])
+        for index in range(20000):
+            queue.put_nowait(ph.HSessionTaskItem(None, index, (), priority=index % 3))
+        queue.put_nowait(ph.HSessionTaskItem(None, "expired", (), priority=5, deadline=0.0))
+        await asyncio.sleep(0.01)
+        oldest_wait = queue.oldest_wait()
+        tasks = [(await queue.get(session)).task for _ in range(20000)]
+        return oldest_wait, tasks, queue.qsize(), queue.oldest_wait()
+
+    oldest_wait, tasks, size, empty_wait = asyncio.run(run())
+    assert oldest_wait > 0.0
+    assert tasks == sorted(range(20000), key=lambda index: (-(index % 3), index))
+    assert (size, empty_wait) == (0, 0.0)
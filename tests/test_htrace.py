@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""Test for tracing of HAPI calls
+Author  : Maajor
+Email   : hello_myd@126.com
+"""
+from ctypes import byref, c_float
+
+import numpy as np
+
+import pyhapi as ph
+
+class RecordingLib():
+    """Library whose HAPI functions succeed without doing anything
+    """
+    def HAPI_IsSessionValid(self, session):
+        return ph.Result.SUCCESS
+
+    def HAPI_SetCurveCounts(self, session, node_id, part_id, counts, start, length):
+        return ph.Result.SUCCESS
+
+def test_hapi_profile():
+    """Test calls in a profile block are counted per function and session with bytes passed
+    """
+    saved_lib = ph.HAPI.HAPI_LIB
+    ph.HAPI.HAPI_LIB = RecordingLib()
+    try:
+        session = ph.Session()
+        session.id = 7
+        with ph.hapi_profile() as profile:
+            for _ in range(3):
+                ph.HAPI.is_session_valid(session)
+            buffer = (c_float * 4)()
+            ph.HAPI.HAPI_LIB.HAPI_SetCurveCounts(byref(session), 0, 0, byref(buffer), 0, 4)
+            counts = np.zeros(8, dtype=np.int32)
+            ph.HAPI.HAPI_LIB.HAPI_SetCurveCounts(byref(session), 0, 0,\
+                counts.ctypes.data_as(ph.HAPI.POINTER(ph.HAPI.c_int32)), 0, 8)
+        assert isinstance(ph.HAPI.HAPI_LIB, RecordingLib)
+    finally:
+        ph.HAPI.HAPI_LIB = saved_lib
+
+    functions = {summary["name"]: summary for summary in profile.functions()}
+    assert functions["HAPI_IsSessionValid"]["calls"] == 3
+    assert functions["HAPI_SetCurveCounts"]["bytes"] == 16 + 32
+    assert sum(functions["HAPI_SetCurveCounts"]["histogram"]) == 2
+    assert profile.sessions()[7]["calls"] == 5
+    assert profile.total_calls(session_id=8) == 0
+    assert "HAPI_IsSessionValid" in profile.report()
+
+def test_overlapping_profiles():
+    """Test a profile keeps recording after an overlapping one exits first
+    """
+    saved_lib = ph.HAPI.HAPI_LIB
+    ph.HAPI.HAPI_LIB = RecordingLib()
+    try:
+        session = ph.Session()
+        first = ph.hapi_profile()
+        first_stats = first.__enter__()
+        with ph.hapi_profile() as second_stats:
+            first.__exit__(None, None, None)
+            ph.HAPI.is_session_valid(session)
+        assert isinstance(ph.HAPI.HAPI_LIB, RecordingLib)
+    finally:
+        ph.HAPI.HAPI_LIB = saved_lib
+
+    assert (first_stats.total_calls(), second_stats.total_calls()) == (0, 1)
@@ -7,6 +7,7 @@ import numpy as np
 import pytest
 
 import pyhapi as ph
+from pyhapi.hnode import HExistingNode
 
 def test_create_input_node_and_set_curve(init_session):
     """Create input node and marshall in curve
@@ -263,3 +264,51 @@ def test_get_node_geo_heightfield(init_session):
     _x,_y,_z = _vol.volume.shape
     assert _x == 500 and _y == 500 and _z == 1 \
         and _vol.volume_name == "height"
+
+def test_get_set_param_values(init_session):
+    """Test get and set params in bulk
+    """
+    hda_asset = ph.HAsset(init_session, "hda/dummy_params.hda")
+    asset_node = hda_asset.instantiate(node_name="params")
+    asset_node.set_param_values({
+        "vec4": [0.4, 0.5, 0.6, 0.7],
+        "intvec3": [1, 1, 1],
+        "toggle": True,
+        "strings5": ["str0", "str1", "str2", "str3", "str4"]})
+    values = asset_node.get_param_values()
+    assert pytest.approx(values["vec4"][3]) == 0.7
+    assert values["intvec3"][2] == 1
+    assert values["toggle"] == True
+    assert values["strings5"][2] == "str2"
+
+def test_lazy_parms(standin_hapi):
+    """Test parms are collected on first access and again only by refresh_params, \
+        and a cached schema is only used on first collection
+    """
+    def get_parameters_calls(profile):
+        return sum(entry["calls"] for entry in profile.functions()\
+            if entry["name"] == "HAPI_GetParameters")
+
+    session = ph.HSession()
+    node_id = standin_hapi.add_node("parms", ph.NodeType.OBJ)
+    standin_hapi.add_parms(node_id, 10)
+    with ph.hapi_profile() as profile:
+        node = HExistingNode(session, node_id)
+        assert get_parameters_calls(profile) == 0
+        names = list(node.parms)
+        assert len(names) == 10 and list(node.get_param_names()) == names
+        assert get_parameters_calls(profile) == 1
+        assert node.refresh_params().parms.keys() == set(names)
+        node.get_param_values()
+        assert get_parameters_calls(profile) == 2
+
+    session.parm_cache = ph.HParmSchemaCache()
+    with ph.hapi_profile() as profile:
+        first = HExistingNode(session, node_id)
+        first._parm_cache_key = "parms"# pylint: disable=protected-access
+        second = HExistingNode(session, node_id)
+        second._parm_cache_key = "parms"# pylint: disable=protected-access
+        assert list(first.parms) == names and list(second.parms) == names
+        assert get_parameters_calls(profile) == 1
+        second.refresh_params()
+        assert get_parameters_calls(profile) == 2